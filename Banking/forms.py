@@ -4,9 +4,10 @@ from decimal import Decimal
 from django.forms import inlineformset_factory
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from .models import Payment, PaymentLine, PaymentMethod
+from .models import Payment, PaymentLine, PaymentMethod, PAYMENT_SEQUENCE, last_payment_number
 from config.forms import BaseFilterForm, CustomTextarea
 from global_settings.models import Currency
+from global_settings.sequences import peek_next_value
 from BusinessPartnerMasterData.models import BusinessPartner
 from Finance.models import ChartOfAccounts 
 class PaymentMethodForm(forms.ModelForm):
@@ -84,19 +85,10 @@ class PaymentForm(forms.ModelForm):
 
     def generate_doc_num(self):
         """
-        A custom method to generate doc_num. 
-        This method ensures that we always increment from the last doc_num.
+        Suggest the next PAY- number from the payment DocumentSequence.
+        The number is only reserved when the payment is saved.
         """
-        last_payment = Payment.objects.order_by('-id').first()  # Get the most recent Payment object
-
-        if last_payment:
-            try:
-                last_num = int(last_payment.doc_num.split('-')[1])  # Extract the number after the dash
-                return f"PAY-{last_num + 1}"  # Increment the last number by 1
-            except (IndexError, ValueError):  # Handle cases where doc_num format is not as expected
-                return f"PAY-1"  # If the format is incorrect, start with PAY-1
-        else:
-            return f"PAY-1"  # If no payments exist, start with PAY-1
+        return f"{PAYMENT_SEQUENCE}{peek_next_value(PAYMENT_SEQUENCE, seed=last_payment_number)}"
 
     def clean(self):
         cleaned_data = super().clean()
@@ -5,9 +5,19 @@ from Finance.models import ChartOfAccounts
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 import datetime
+import re
 from Sales.models import SalesOrder  
 from django.core.exceptions import ValidationError
 from Banking.utils.payment_utils import validate_payment_amount, calculate_remaining_balance,set_business_partner
+from global_settings.sequences import advance_to, max_trailing_number
+PAYMENT_SEQUENCE = 'PAY-'
+
+def last_payment_number():
+    """Highest PAY-<n> number already used, to seed the payment DocumentSequence."""
+    return max_trailing_number(
+        Payment.objects.filter(doc_num__startswith=PAYMENT_SEQUENCE).values_list('doc_num', flat=True)
+    )
+
 class BaseModel(models.Model):
     """Base model with common fields for all models."""
     created_at = models.DateTimeField(_("Created At"), default=timezone.now)
@@ -86,6 +96,11 @@ class Payment(BaseModel):
         
         # Proceed with the saving of the payment instance
         super().save(*args, **kwargs)
+
+        # Keep the PAY- sequence ahead of numbers entered on the form
+        match = re.fullmatch(r'PAY-(\d+)', self.doc_num or '')
+        if match:
+            advance_to(PAYMENT_SEQUENCE, int(match.group(1)), seed=last_payment_number)
 class PaymentLine(BaseModel):
     """
     Represents the detailed line items for payments (can be multiple for partial payments).
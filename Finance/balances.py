@@ -0,0 +1,357 @@
+"""
+Account balance aggregation for the financial statements.
+
+Balances come from a single grouped ``GeneralLedger`` query (one row per
+account) and are rolled up the ``ChartOfAccounts.parent`` hierarchy in
+memory, so statements no longer issue a query per account.
+
+Closing an ``AccountingPeriod`` stores cumulative per-account, per-cost-center,
+per-currency balances for the month. Cumulative totals then start from the
+latest valid snapshot and only add the GL movements after it. Any GL change
+dated inside or before a snapshotted period, or reopening a period,
+invalidates that period's snapshots and every later one.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import AccountBalanceSnapshot, AccountingPeriod, ChartOfAccounts, CostCenter, GeneralLedger
+
+ZERO = Decimal('0')
+
+
+def get_cost_center_ids(cost_center):
+    """``cost_center`` and all of its descendants, as a set of ids."""
+    children = defaultdict(list)
+    for pk, parent_id in CostCenter.objects.values_list('id', 'parent_id'):
+        children[parent_id].append(pk)
+
+    root = cost_center.pk if isinstance(cost_center, CostCenter) else int(cost_center)
+    ids, stack = set(), [root]
+    while stack:
+        pk = stack.pop()
+        if pk not in ids:
+            ids.add(pk)
+            stack.extend(children[pk])
+    return ids
+
+
+def _filter_entries(queryset, cost_center=None, accounts=None):
+    if cost_center:
+        queryset = queryset.filter(cost_center_id__in=get_cost_center_ids(cost_center))
+    if accounts is not None:
+        queryset = queryset.filter(account__in=accounts)
+    return queryset
+
+
+def _add_totals(totals, rows):
+    for account_id, debit, credit in rows:
+        current_debit, current_credit = totals.get(account_id, (ZERO, ZERO))
+        totals[account_id] = (current_debit + (debit or ZERO), current_credit + (credit or ZERO))
+    return totals
+
+
+def get_latest_snapshot_period(as_of_date=None):
+    """Latest closed period with valid snapshots ending on or before ``as_of_date``."""
+    periods = AccountingPeriod.objects.filter(is_closed=True, snapshot_valid=True)
+    if as_of_date:
+        periods = periods.filter(end_date__lte=as_of_date)
+    return periods.order_by('-end_date').first()
+
+
+def get_ledger_totals(as_of_date=None, start_date=None, cost_center=None, accounts=None):
+    """
+    ``{account_id: (debit_sum, credit_sum)}`` from grouped GL queries.
+
+    ``as_of_date``/``start_date`` bound ``posting_date`` (inclusive);
+    ``cost_center`` includes its child cost centers. Cumulative totals (no
+    ``start_date``) start from the latest valid period snapshot and only
+    aggregate the GL movements posted after it.
+    """
+    totals = {}
+    entries = GeneralLedger.objects.all()
+    if start_date:
+        entries = entries.filter(posting_date__gte=start_date)
+    else:
+        period = get_latest_snapshot_period(as_of_date)
+        if period:
+            snapshots = _filter_entries(period.balance_snapshots.all(), cost_center, accounts)
+            _add_totals(totals, snapshots.order_by().values('account_id').annotate(
+                debit=Sum('closing_debit'), credit=Sum('closing_credit')
+            ).values_list('account_id', 'debit', 'credit'))
+            entries = entries.filter(posting_date__gt=period.end_date)
+    if as_of_date:
+        entries = entries.filter(posting_date__lte=as_of_date)
+
+    rows = _filter_entries(entries, cost_center, accounts).order_by().values('account_id').annotate(
+        debit=Sum('debit_amount'), credit=Sum('credit_amount')
+    ).values_list('account_id', 'debit', 'credit')
+    return _add_totals(totals, rows)
+
+
+def natural_balance(account, debit, credit):
+    """Balance in the account's normal direction (debit - credit for debit accounts)."""
+    return debit - credit if account.account_type.is_debit else credit - debit
+
+
+def build_account_balances(totals, accounts=None):
+    """
+    Roll ledger ``totals`` up the account hierarchy.
+
+    Returns ``{account_id: node}`` for every account in ``accounts`` (default:
+    the whole chart, fetched with its account type in one query). Each node
+    holds the account's own ``debit``/``credit`` plus ``total_debit``/
+    ``total_credit`` including all descendants, its ``level`` in the tree and
+    whether it ``has_children``.
+    """
+    if accounts is None:
+        accounts = ChartOfAccounts.objects.select_related('account_type').order_by('code')
+
+    nodes = {}
+    for account in accounts:
+        debit, credit = totals.get(account.pk, (ZERO, ZERO))
+        nodes[account.pk] = {
+            'account': account,
+            'debit': debit,
+            'credit': credit,
+            'total_debit': debit,
+            'total_credit': credit,
+            'level': 0,
+            'has_children': False,
+        }
+
+    for node in nodes.values():
+        seen = {node['account'].pk}
+        parent_id = node['account'].parent_id
+        while parent_id in nodes and parent_id not in seen:
+            parent = nodes[parent_id]
+            parent['has_children'] = True
+            parent['total_debit'] += node['debit']
+            parent['total_credit'] += node['credit']
+            node['level'] += 1
+            seen.add(parent_id)
+            parent_id = parent['account'].parent_id
+
+    for node in nodes.values():
+        account = node['account']
+        node['balance'] = natural_balance(account, node['debit'], node['credit'])
+        node['total_balance'] = natural_balance(account, node['total_debit'], node['total_credit'])
+    return nodes
+
+
+def get_account_balances(as_of_date=None, start_date=None, cost_center=None, accounts=None):
+    """Ledger totals for the given filters rolled up the chart of accounts."""
+    return build_account_balances(
+        get_ledger_totals(as_of_date=as_of_date, start_date=start_date, cost_center=cost_center),
+        accounts=accounts,
+    )
+
+
+def get_period(year, month):
+    """The ``AccountingPeriod`` for a calendar month, created (open) if missing."""
+    period, _ = AccountingPeriod.objects.get_or_create(
+        year=year, month=month,
+        defaults={
+            'start_date': date(year, month, 1),
+            'end_date': date(year, month, calendar.monthrange(year, month)[1]),
+        }
+    )
+    return period
+
+
+def _grouped_movements(start_date=None, end_date=None):
+    entries = GeneralLedger.objects.all()
+    if start_date:
+        entries = entries.filter(posting_date__gte=start_date)
+    if end_date:
+        entries = entries.filter(posting_date__lte=end_date)
+    rows = entries.order_by().values('account_id', 'cost_center_id', 'currency_id').annotate(
+        debit=Sum('debit_amount'), credit=Sum('credit_amount')
+    ).values_list('account_id', 'cost_center_id', 'currency_id', 'debit', 'credit')
+    return {(account_id, cost_center_id, currency_id): (debit or ZERO, credit or ZERO)
+            for account_id, cost_center_id, currency_id, debit, credit in rows}
+
+
+def build_period_snapshots(period):
+    """
+    (Re)write the balance snapshots of a closed period.
+
+    Opening balances come from the previous valid snapshot plus any movements
+    between it and this period (the whole ledger only if none exists), so a
+    month-end close aggregates one month of GL rows.
+    """
+    previous = get_latest_snapshot_period(period.start_date - timedelta(days=1))
+    opening = defaultdict(lambda: (ZERO, ZERO))
+    if previous:
+        for snapshot in previous.balance_snapshots.all():
+            opening[(snapshot.account_id, snapshot.cost_center_id, snapshot.currency_id)] = (
+                snapshot.closing_debit, snapshot.closing_credit
+            )
+        gap = _grouped_movements(previous.end_date + timedelta(days=1), period.start_date - timedelta(days=1))
+    else:
+        gap = _grouped_movements(end_date=period.start_date - timedelta(days=1))
+    for key, (debit, credit) in gap.items():
+        opening_debit, opening_credit = opening[key]
+        opening[key] = (opening_debit + debit, opening_credit + credit)
+
+    movements = _grouped_movements(period.start_date, period.end_date)
+    snapshots = []
+    for key in set(opening) | set(movements):
+        opening_debit, opening_credit = opening.get(key, (ZERO, ZERO))
+        period_debit, period_credit = movements.get(key, (ZERO, ZERO))
+        account_id, cost_center_id, currency_id = key
+        snapshots.append(AccountBalanceSnapshot(
+            period=period,
+            account_id=account_id,
+            cost_center_id=cost_center_id,
+            currency_id=currency_id,
+            opening_debit=opening_debit,
+            opening_credit=opening_credit,
+            period_debit=period_debit,
+            period_credit=period_credit,
+            closing_debit=opening_debit + period_debit,
+            closing_credit=opening_credit + period_credit,
+        ))
+
+    with transaction.atomic():
+        period.balance_snapshots.all().delete()
+        AccountBalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+        AccountingPeriod.objects.filter(pk=period.pk).update(snapshot_valid=True)
+        period.snapshot_valid = True
+    return len(snapshots)
+
+
+def close_period(year, month):
+    """
+    Close a month and snapshot its balances.
+
+    Later closed periods whose snapshots were invalidated (e.g. because this
+    one was reopened) are rebuilt in order. Returns the period.
+    """
+    period = get_period(year, month)
+    period.is_closed = True
+    period.closed_at = timezone.now()
+    period.save(update_fields=['is_closed', 'closed_at'])
+
+    stale = AccountingPeriod.objects.filter(
+        is_closed=True, snapshot_valid=False, start_date__gte=period.start_date
+    ).order_by('start_date')
+    for stale_period in stale:
+        build_period_snapshots(stale_period)
+    period.refresh_from_db()
+    return period
+
+
+def reopen_period(year, month):
+    """Reopen a closed month, invalidating its snapshots and every later one."""
+    period = get_period(year, month)
+    period.is_closed = False
+    period.closed_at = None
+    period.save(update_fields=['is_closed', 'closed_at'])
+    invalidate_snapshots(period.start_date)
+    period.refresh_from_db()
+    return period
+
+
+def invalidate_snapshots(from_date):
+    """Drop the snapshots of every period ending on or after ``from_date``."""
+    affected = AccountingPeriod.objects.filter(snapshot_valid=True, end_date__gte=from_date)
+    if affected.update(snapshot_valid=False):
+        AccountBalanceSnapshot.objects.filter(period__end_date__gte=from_date).delete()
+
+
+LEDGER_PAGE_SIZE = 100
+
+
+def encode_ledger_cursor(entry):
+    """Opaque keyset cursor for a GL entry: ``<posting_date>_<id>``."""
+    return f"{entry.posting_date.isoformat()}_{entry.pk}"
+
+
+def decode_ledger_cursor(cursor):
+    """``(posting_date, id)`` from a cursor, or ``None`` if it is missing or malformed."""
+    try:
+        posting_date, pk = cursor.split('_', 1)
+        return date.fromisoformat(posting_date), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _before_key(posting_date, pk=None):
+    """GL rows ordered before ``(posting_date, pk)``; all rows of earlier days if ``pk`` is None."""
+    condition = Q(posting_date__lt=posting_date)
+    if pk is not None:
+        condition |= Q(posting_date=posting_date, pk__lt=pk)
+    return condition
+
+
+def get_opening_balance(account, posting_date, pk=None):
+    """
+    Natural balance of ``account`` just before ``(posting_date, pk)``.
+
+    Starts from the latest valid period snapshot before that date and adds the
+    later GL rows with a single aggregate, so the cost does not depend on how
+    deep into the ledger the key is.
+    """
+    debit = credit = ZERO
+    entries = GeneralLedger.objects.filter(_before_key(posting_date, pk), account=account)
+    period = get_latest_snapshot_period(posting_date - timedelta(days=1))
+    if period:
+        snapshot = period.balance_snapshots.filter(account=account).aggregate(
+            debit=Sum('closing_debit'), credit=Sum('closing_credit')
+        )
+        debit, credit = snapshot['debit'] or ZERO, snapshot['credit'] or ZERO
+        entries = entries.filter(posting_date__gt=period.end_date)
+
+    totals = entries.aggregate(debit=Sum('debit_amount'), credit=Sum('credit_amount'))
+    return natural_balance(account, debit + (totals['debit'] or ZERO), credit + (totals['credit'] or ZERO))
+
+
+def get_ledger_page(account, cursor=None, start_date=None, end_date=None, page_size=LEDGER_PAGE_SIZE):
+    """
+    One page of an account's ledger in ``(posting_date, id)`` order.
+
+    ``cursor`` is the ``next_cursor`` of the previous page. Rows are fetched
+    with a keyset condition instead of an OFFSET, and the page's opening
+    balance comes from ``get_opening_balance``, so deep pages cost the same as
+    the first. Returns ``{'opening_balance', 'entries', 'closing_balance',
+    'next_cursor', 'has_more'}`` where ``entries`` are
+    ``{'entry', 'running_balance'}`` dicts.
+    """
+    key = decode_ledger_cursor(cursor) if cursor else None
+    entries = GeneralLedger.objects.filter(account=account).select_related('journal_entry')
+    if start_date:
+        entries = entries.filter(posting_date__gte=start_date)
+    if end_date:
+        entries = entries.filter(posting_date__lte=end_date)
+
+    if key and (not start_date or key[0] >= start_date):
+        entries = entries.exclude(_before_key(key[0], key[1] + 1))
+        opening_balance = get_opening_balance(account, key[0], key[1] + 1)
+    elif start_date:
+        opening_balance = get_opening_balance(account, start_date)
+    else:
+        opening_balance = ZERO
+
+    rows = list(entries.order_by('posting_date', 'pk')[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    running_balance = opening_balance
+    page = []
+    for entry in rows:
+        running_balance += natural_balance(account, entry.debit_amount, entry.credit_amount)
+        page.append({'entry': entry, 'running_balance': running_balance})
+
+    return {
+        'opening_balance': opening_balance,
+        'entries': page,
+        'closing_balance': running_balance,
+        'next_cursor': encode_ledger_cursor(rows[-1]) if has_more else None,
+        'has_more': has_more,
+    }
@@ -13,3 +13,5 @@ from .general_ledger_forms import GeneralLedgerForm, GeneralLedgerFilterForm
 # Import Cost Center forms
 from .cost_center_forms import CostCenterForm, CostCenterFilterForm
 
+# Import Financial Statement forms
+from .report_forms import FinancialStatementFilterForm
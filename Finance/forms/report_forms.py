@@ -0,0 +1,18 @@
+from django import forms
+from django.utils.translation import gettext_lazy as _
+from ..models import CostCenter
+
+class FinancialStatementFilterForm(forms.Form):
+    """As-of date and cost center filter for the trial balance and balance sheet"""
+    end_date = forms.DateField(
+        label=_("As of Date"),
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    cost_center = forms.ModelChoiceField(
+        label=_("Cost Center"),
+        queryset=CostCenter.objects.filter(is_active=True).order_by('code'),
+        required=False,
+        empty_label=_("All Cost Centers"),
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
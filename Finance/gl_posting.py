@@ -0,0 +1,130 @@
+"""
+General Ledger posting engine for journal entries.
+
+``sync_journal_entry_gl`` brings the GL rows of one journal entry in line
+with its lines by applying only the difference: new lines are bulk inserted,
+changed ones bulk updated and orphaned rows deleted. Signals do not call it
+directly; ``schedule_gl_posting`` defers it to ``transaction.on_commit`` and
+registers at most one pending posting per journal entry, so saving an entry
+with hundreds of lines posts it once. Posting errors are logged and do not
+fail the save, as with the old signals.
+"""
+import traceback
+
+from django.db import transaction
+
+from global_settings.on_commit import defer_once
+
+from .balances import invalidate_snapshots
+from .models import GeneralLedger, JournalEntry
+
+GL_SYNC_FIELDS = ['account', 'posting_date', 'debit_amount', 'credit_amount', 'balance', 'currency', 'cost_center']
+
+
+def _line_balance(line):
+    # Debit account: Dr increases, Cr decreases; credit account the other way round
+    if line.account.account_type.is_debit:
+        return line.debit_amount - line.credit_amount
+    return line.credit_amount - line.debit_amount
+
+
+def _gl_values(journal_entry, line):
+    return {
+        'account_id': line.account_id,
+        'posting_date': journal_entry.posting_date,
+        'debit_amount': line.debit_amount,
+        'credit_amount': line.credit_amount,
+        'balance': _line_balance(line),
+        'currency_id': journal_entry.currency_id,
+        'cost_center_id': journal_entry.cost_center_id,
+    }
+
+
+def sync_journal_entry_gl(journal_entry, lines=None):
+    """
+    Apply the line-level diff between a journal entry and its GL rows.
+
+    Unposted entries lose their GL rows. ``lines`` may be passed pre-fetched
+    (with ``account__account_type``). GL rows from before rows were linked to
+    their line are replaced once. Returns ``{'created', 'updated', 'deleted'}``.
+    """
+    result = {'created': 0, 'updated': 0, 'deleted': 0}
+    existing = list(GeneralLedger.objects.filter(journal_entry=journal_entry))
+
+    if journal_entry.is_posted:
+        if lines is None:
+            lines = journal_entry.lines.select_related('account__account_type')
+        wanted = {line.pk: _gl_values(journal_entry, line) for line in lines}
+    else:
+        wanted = {}
+
+    by_line = {}
+    to_delete = []
+    for entry in existing:
+        if entry.journal_entry_line_id in wanted and entry.journal_entry_line_id not in by_line:
+            by_line[entry.journal_entry_line_id] = entry
+        else:
+            to_delete.append(entry)
+
+    to_create = []
+    to_update = []
+    changed_dates = {entry.posting_date for entry in to_delete}
+    for line_id, values in wanted.items():
+        entry = by_line.get(line_id)
+        if entry is None:
+            to_create.append(GeneralLedger(journal_entry=journal_entry, journal_entry_line_id=line_id, **values))
+            changed_dates.add(values['posting_date'])
+            continue
+        changed = False
+        for field, value in values.items():
+            if getattr(entry, field) != value:
+                if field == 'posting_date':
+                    changed_dates.add(entry.posting_date)
+                setattr(entry, field, value)
+                changed = True
+        if changed:
+            to_update.append(entry)
+            changed_dates.add(values['posting_date'])
+
+    if not (to_create or to_update or to_delete):
+        return result
+
+    with transaction.atomic():
+        if to_delete:
+            GeneralLedger.objects.filter(pk__in=[entry.pk for entry in to_delete]).delete()
+        if to_update:
+            GeneralLedger.objects.bulk_update(to_update, GL_SYNC_FIELDS, batch_size=500)
+        if to_create:
+            GeneralLedger.objects.bulk_create(to_create, batch_size=500)
+        # Bulk writes bypass the GL signals, so stale period snapshots are dropped here
+        invalidate_snapshots(min(changed_dates))
+
+    result.update(created=len(to_create), updated=len(to_update), deleted=len(to_delete))
+    return result
+
+
+def _post_after_commit(journal_entry_id):
+    try:
+        journal_entry = JournalEntry.objects.filter(pk=journal_entry_id).first()
+        if journal_entry is None:
+            # Entry deleted in the same transaction; its GL rows went with it
+            return
+        result = sync_journal_entry_gl(journal_entry)
+        if any(result.values()):
+            print(f"✅ GL synced for JE {journal_entry.doc_num}: {result['created']} created, "
+                  f"{result['updated']} updated, {result['deleted']} deleted")
+    except Exception as e:
+        print(f"❌ Error posting JE to GL: {e}")
+        traceback.print_exc()
+
+
+def schedule_gl_posting(journal_entry_id):
+    """
+    Sync a journal entry's GL once the current transaction commits.
+
+    ``defer_once`` keeps one pending posting per journal entry and
+    transaction, and forgets it when the transaction (or savepoint) rolls
+    back. Outside an atomic block the posting runs immediately, so code
+    writing an entry and its lines should do it in one transaction.
+    """
+    defer_once('gl_posting', journal_entry_id, _post_after_commit, journal_entry_id)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Finance.balances import close_period, reopen_period
+
+
+class Command(BaseCommand):
+    help = (
+        "Close an accounting month and snapshot per-account, per-cost-center, per-currency balances, "
+        "or reopen it (--reopen), which invalidates its snapshots and all later ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('period', help="Month to close, as YYYY-MM.")
+        parser.add_argument('--reopen', action='store_true', help="Reopen the month instead of closing it.")
+
+    def handle(self, *args, **options):
+        try:
+            year, month = (int(part) for part in options['period'].split('-'))
+            if not 1 <= month <= 12:
+                raise ValueError
+        except ValueError:
+            raise CommandError(f"Invalid period {options['period']!r}, expected YYYY-MM")
+
+        if options['reopen']:
+            period = reopen_period(year, month)
+            self.stdout.write(self.style.SUCCESS(f"Reopened {period}; snapshots from {period.start_date} invalidated"))
+            return
+
+        period = close_period(year, month)
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {period} with {period.balance_snapshots.count()} balance snapshots"
+        ))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from Finance.gl_posting import sync_journal_entry_gl
+from Finance.models import JournalEntry, JournalEntryLine
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill or repair General Ledger rows of posted journal entries. Uses the same "
+        "diff-based engine as the signals, so entries already in sync are left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journal-entries', nargs='+', type=int, help="Only repost these JournalEntry ids.")
+        parser.add_argument('--from-date', help="Only entries posted on or after this date (YYYY-MM-DD).")
+        parser.add_argument('--to-date', help="Only entries posted on or before this date (YYYY-MM-DD).")
+        parser.add_argument('--batch-size', type=int, default=200, help="Journal entries loaded per batch.")
+
+    def handle(self, *args, **options):
+        entries = JournalEntry.objects.filter(is_posted=True)
+        if options['journal_entries']:
+            entries = entries.filter(pk__in=options['journal_entries'])
+        if options['from_date']:
+            entries = entries.filter(posting_date__gte=options['from_date'])
+        if options['to_date']:
+            entries = entries.filter(posting_date__lte=options['to_date'])
+        entries = entries.order_by('pk').prefetch_related(
+            Prefetch('lines', queryset=JournalEntryLine.objects.select_related('account__account_type'))
+        )
+
+        totals = {'entries': 0, 'changed': 0, 'created': 0, 'updated': 0, 'deleted': 0}
+        for journal_entry in entries.iterator(chunk_size=options['batch_size']):
+            result = sync_journal_entry_gl(journal_entry, lines=journal_entry.lines.all())
+            totals['entries'] += 1
+            if any(result.values()):
+                totals['changed'] += 1
+                for key, value in result.items():
+                    totals[key] += value
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"JE {journal_entry.doc_num}: {result}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {totals['entries']} journal entries, {totals['changed']} changed: "
+            f"{totals['created']} GL rows created, {totals['updated']} updated, {totals['deleted']} deleted"
+        ))
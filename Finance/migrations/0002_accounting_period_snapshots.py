@@ -0,0 +1,60 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_settings', '0001_initial'),
+        ('Finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Updated At')),
+                ('year', models.PositiveIntegerField(verbose_name='Year')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month')),
+                ('start_date', models.DateField(verbose_name='Start Date')),
+                ('end_date', models.DateField(verbose_name='End Date')),
+                ('is_closed', models.BooleanField(default=False, verbose_name='Is Closed')),
+                ('closed_at', models.DateTimeField(blank=True, null=True, verbose_name='Closed At')),
+                ('snapshot_valid', models.BooleanField(default=False, help_text='Balance snapshots are up to date with the General Ledger', verbose_name='Snapshot Valid')),
+            ],
+            options={
+                'verbose_name': 'Accounting Period',
+                'verbose_name_plural': 'Accounting Periods',
+                'ordering': ['start_date'],
+                'unique_together': {('year', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Updated At')),
+                ('opening_debit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Opening Debit')),
+                ('opening_credit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Opening Credit')),
+                ('period_debit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Period Debit')),
+                ('period_credit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Period Credit')),
+                ('closing_debit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Closing Debit')),
+                ('closing_credit', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Closing Credit')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Finance.chartofaccounts', verbose_name='Account')),
+                ('cost_center', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='Finance.costcenter', verbose_name='Cost Center')),
+                ('currency', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='global_settings.currency', verbose_name='Currency')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='Finance.accountingperiod', verbose_name='Period')),
+            ],
+            options={
+                'verbose_name': 'Account Balance Snapshot',
+                'verbose_name_plural': 'Account Balance Snapshots',
+                'unique_together': {('period', 'account', 'cost_center', 'currency')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finance', '0002_accounting_period_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='generalledger',
+            index=models.Index(fields=['account', 'posting_date', 'id'], name='finance_gl_account_key_idx'),
+        ),
+    ]
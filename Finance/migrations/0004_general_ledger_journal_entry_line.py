@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Finance', '0003_general_ledger_account_key_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generalledger',
+            name='journal_entry_line',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='gl_entries', to='Finance.journalentryline', verbose_name='Journal Entry Line'),
+        ),
+    ]
@@ -78,6 +78,7 @@ class GeneralLedger(BaseModel):
     account = models.ForeignKey(ChartOfAccounts, on_delete=models.PROTECT, verbose_name=_("Account"))
     posting_date = models.DateField(_("Posting Date"))
     journal_entry = models.ForeignKey(JournalEntry, on_delete=models.CASCADE, verbose_name=_("Journal Entry")) 
+    journal_entry_line = models.ForeignKey(JournalEntryLine, on_delete=models.SET_NULL, null=True, blank=True, related_name='gl_entries', verbose_name=_("Journal Entry Line"))
     debit_amount = models.DecimalField(_("Debit Amount"), max_digits=15, decimal_places=2, default=0)
     credit_amount = models.DecimalField(_("Credit Amount"), max_digits=15, decimal_places=2, default=0)
     balance = models.DecimalField(_("Balance"), max_digits=15, decimal_places=2)
@@ -87,6 +88,9 @@ class GeneralLedger(BaseModel):
     class Meta:
         verbose_name = _("General Ledger")
         verbose_name_plural = _("General Ledger")
+        indexes = [
+            models.Index(fields=['account', 'posting_date', 'id'], name='finance_gl_account_key_idx'),
+        ]
 
     def __str__(self):
         return f"{self.account.code} - {self.posting_date}"
@@ -103,4 +107,53 @@ class CostCenter(BaseModel):
         verbose_name_plural = _("Cost Centers")
 
     def __str__(self):
-        return f"{self.code} - {self.name}"
\ No newline at end of file
+        return f"{self.code} - {self.name}"
+
+class AccountingPeriod(BaseModel):
+    """A calendar month of the books; closing it snapshots every account balance."""
+    year = models.PositiveIntegerField(_("Year"))
+    month = models.PositiveSmallIntegerField(_("Month"))
+    start_date = models.DateField(_("Start Date"))
+    end_date = models.DateField(_("End Date"))
+    is_closed = models.BooleanField(_("Is Closed"), default=False)
+    closed_at = models.DateTimeField(_("Closed At"), null=True, blank=True)
+    snapshot_valid = models.BooleanField(_("Snapshot Valid"), default=False,
+                                         help_text=_("Balance snapshots are up to date with the General Ledger"))
+
+    class Meta:
+        verbose_name = _("Accounting Period")
+        verbose_name_plural = _("Accounting Periods")
+        unique_together = ('year', 'month')
+        ordering = ['start_date']
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d}"
+
+class AccountBalanceSnapshot(BaseModel):
+    """Cumulative GL balances of one account/cost center/currency at the end of a closed period."""
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.CASCADE, related_name='balance_snapshots', verbose_name=_("Period"))
+    account = models.ForeignKey(ChartOfAccounts, on_delete=models.CASCADE, verbose_name=_("Account"))
+    cost_center = models.ForeignKey(CostCenter, on_delete=models.CASCADE, null=True, blank=True, verbose_name=_("Cost Center"))
+    currency = models.ForeignKey(Currency, on_delete=models.PROTECT, verbose_name=_("Currency"))
+    opening_debit = models.DecimalField(_("Opening Debit"), max_digits=18, decimal_places=2, default=0)
+    opening_credit = models.DecimalField(_("Opening Credit"), max_digits=18, decimal_places=2, default=0)
+    period_debit = models.DecimalField(_("Period Debit"), max_digits=18, decimal_places=2, default=0)
+    period_credit = models.DecimalField(_("Period Credit"), max_digits=18, decimal_places=2, default=0)
+    closing_debit = models.DecimalField(_("Closing Debit"), max_digits=18, decimal_places=2, default=0)
+    closing_credit = models.DecimalField(_("Closing Credit"), max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _("Account Balance Snapshot")
+        verbose_name_plural = _("Account Balance Snapshots")
+        unique_together = ('period', 'account', 'cost_center', 'currency')
+
+    @property
+    def opening_balance(self):
+        return self.opening_debit - self.opening_credit
+
+    @property
+    def closing_balance(self):
+        return self.closing_debit - self.closing_credit
+
+    def __str__(self):
+        return f"{self.period} - {self.account.code}"
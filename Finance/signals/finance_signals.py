@@ -32,4 +32,11 @@ def account_deleted(sender, instance, **kwargs):
     """Chart of Accounts Delete → Log Deletion"""
     print(f"🗑️ Account Deleted: {instance.code} - {instance.name}")
 
+@receiver(post_save, sender='Finance.GeneralLedger')
+@receiver(post_delete, sender='Finance.GeneralLedger')
+def general_ledger_changed(sender, instance, **kwargs):
+    """General Ledger Change → Invalidate balance snapshots from its posting date on"""
+    from Finance.balances import invalidate_snapshots
+    invalidate_snapshots(instance.posting_date)
+
 print("📡 Finance signals loaded successfully")
@@ -9,7 +9,6 @@ from django.db import transaction
 from django.dispatch import receiver
 from django.apps import apps
 from decimal import Decimal
-import re
 
 def get_models():
     """Lazy model imports"""
@@ -61,37 +60,19 @@ def get_account_by_code(code):
         return None
 
 def generate_doc_number(prefix="JE"):
-    """Generate unique document number"""
+    """Generate unique document number from the row-locked DocumentSequence"""
+    from global_settings.sequences import max_trailing_number, next_value
+
     models = get_models()
     JournalEntry = models.get('JournalEntry')
     
     if not JournalEntry:
         return f"{prefix}-000001"
         
-    try:
-        last_entries = JournalEntry.objects.filter(
-            doc_num__startswith=prefix
-        ).values_list('doc_num', flat=True)
-        
-        if not last_entries:
-            return f"{prefix}-000001"
-        
-        max_number = 0
-        for doc_num in last_entries:
-            match = re.search(r'-(\d+)$', doc_num)
-            if match:
-                number = int(match.group(1))
-                if number > max_number:
-                    max_number = number
-        
-        next_number = max_number + 1
-        return f"{prefix}-{next_number:06d}"
-        
-    except Exception as e:
-        print(f"Error generating doc number: {e}")
-        import time
-        timestamp = int(time.time() * 1000) % 1000000
-        return f"{prefix}-{timestamp:06d}"
+    next_number = next_value(f"{prefix}-", seed=lambda: max_trailing_number(
+        JournalEntry.objects.filter(doc_num__startswith=f"{prefix}-").values_list('doc_num', flat=True)
+    ))
+    return f"{prefix}-{next_number:06d}"
 
 def calculate_invoice_total(invoice):
     """Calculate total amount from invoice lines"""
@@ -120,75 +101,76 @@ def create_invoice_journal_entry(sender, instance, created, **kwargs):
     """
     def create_je():
         try:
-            models = get_models()
-            JournalEntry = models.get('JournalEntry')
-            JournalEntryLine = models.get('JournalEntryLine')
-            Currency = models.get('Currency')
+            with transaction.atomic():
+                models = get_models()
+                JournalEntry = models.get('JournalEntry')
+                JournalEntryLine = models.get('JournalEntryLine')
+                Currency = models.get('Currency')
             
-            if not all([JournalEntry, JournalEntryLine, Currency]):
-                print("❌ Required models not available")
-                return
+                if not all([JournalEntry, JournalEntryLine, Currency]):
+                    print("❌ Required models not available")
+                    return
                 
-            print(f"🔔 AR Invoice #{instance.id} saved → Creating Journal Entry")
+                print(f"🔔 AR Invoice #{instance.id} saved → Creating Journal Entry")
             
-            # Total amount calculate
-            total_amount = calculate_invoice_total(instance)
+                # Total amount calculate
+                total_amount = calculate_invoice_total(instance)
             
-            if total_amount <= 0:
-                print(f"⚠️ Total amount is {total_amount}, skipping")
-                return
+                if total_amount <= 0:
+                    print(f"⚠️ Total amount is {total_amount}, skipping")
+                    return
             
-            if instance.status not in ['Open', 'Partially Paid', 'Paid']:
-                print(f"⚠️ Status {instance.status} doesn't require journal entry")
-                return
+                if instance.status not in ['Open', 'Partially Paid', 'Paid']:
+                    print(f"⚠️ Status {instance.status} doesn't require journal entry")
+                    return
             
-            # Delete old entries
-            old_entries = JournalEntry.objects.filter(
-                reference=f"AR-INVOICE-{instance.id}"
-            )
-            if old_entries.exists():
-                print(f"🗑️ Deleting {old_entries.count()} old journal entries")
-                old_entries.delete()
+                # Delete old entries
+                old_entries = JournalEntry.objects.filter(
+                    reference=f"AR-INVOICE-{instance.id}"
+                )
+                if old_entries.exists():
+                    print(f"🗑️ Deleting {old_entries.count()} old journal entries")
+                    old_entries.delete()
             
-            # Get currency and accounts
-            currency = instance.currency or Currency.objects.first()
-            ar_account = get_account_by_code("1200")  # Accounts Receivable
-            sales_account = get_account_by_code("4000")  # Sales Revenue
+                # Get currency and accounts
+                currency = instance.currency or Currency.objects.first()
+                ar_account = get_account_by_code("1200")  # Accounts Receivable
+                sales_account = get_account_by_code("4000")  # Sales Revenue
             
-            if not all([currency, ar_account, sales_account]):
-                print("❌ Required data not found!")
-                return
+                if not all([currency, ar_account, sales_account]):
+                    print("❌ Required data not found!")
+                    return
             
-            # Create Journal Entry
-            je = JournalEntry.objects.create(
-                doc_num=generate_doc_number("JE"),
-                posting_date=instance.posting_date,
-                reference=f"AR-INVOICE-{instance.id}",
-                remarks=f"Sales Invoice - {instance.customer.name}",
-                currency=currency,
-                total_debit=total_amount,
-                total_credit=total_amount,
-                is_posted=True
-            )
+                # Create Journal Entry
+                je = JournalEntry.objects.create(
+                    doc_num=generate_doc_number("JE"),
+                    posting_date=instance.posting_date,
+                    reference=f"AR-INVOICE-{instance.id}",
+                    remarks=f"Sales Invoice - {instance.customer.name}",
+                    currency=currency,
+                    total_debit=total_amount,
+                    total_credit=total_amount,
+                    is_posted=True
+                )
             
-            # Create Journal Entry Lines
-            JournalEntryLine.objects.create(
-                journal_entry=je,
-                account=ar_account,
-                debit_amount=total_amount,
-                credit_amount=Decimal('0'),
-                description=f"AR Invoice #{instance.id} - {instance.customer.name}"
-            )
+                # Create Journal Entry Lines
+                JournalEntryLine.objects.create(
+                    journal_entry=je,
+                    account=ar_account,
+                    debit_amount=total_amount,
+                    credit_amount=Decimal('0'),
+                    description=f"AR Invoice #{instance.id} - {instance.customer.name}"
+                )
             
-            JournalEntryLine.objects.create(
-                journal_entry=je,
-                account=sales_account,
-                debit_amount=Decimal('0'),
-                credit_amount=total_amount,
-                description=f"Sales Revenue - Invoice #{instance.id}"
-            )
+                JournalEntryLine.objects.create(
+                    journal_entry=je,
+                    account=sales_account,
+                    debit_amount=Decimal('0'),
+                    credit_amount=total_amount,
+                    description=f"Sales Revenue - Invoice #{instance.id}"
+                )
             
-            print(f"✅ Journal Entry {je.doc_num} created for Invoice #{instance.id}")
+                print(f"✅ Journal Entry {je.doc_num} created for Invoice #{instance.id}")
             
         except Exception as e:
             print(f"❌ Error creating invoice journal entry: {e}")
@@ -207,69 +189,70 @@ def create_payment_journal_entry(sender, instance, **kwargs):
     if instance.paid_amount and instance.paid_amount > 0 and instance.payment_date:
         def create_payment_je():
             try:
-                models = get_models()
-                JournalEntry = models.get('JournalEntry')
-                JournalEntryLine = models.get('JournalEntryLine')
-                Currency = models.get('Currency')
+                with transaction.atomic():
+                    models = get_models()
+                    JournalEntry = models.get('JournalEntry')
+                    JournalEntryLine = models.get('JournalEntryLine')
+                    Currency = models.get('Currency')
                 
-                print(f"💳 AR Invoice #{instance.id} payment → Creating Payment Journal Entry")
+                    print(f"💳 AR Invoice #{instance.id} payment → Creating Payment Journal Entry")
                 
-                # Get or create payment entry
-                existing_payment_je = JournalEntry.objects.filter(
-                    reference=f"AR-PAYMENT-{instance.id}"
-                ).first()
+                    # Get or create payment entry
+                    existing_payment_je = JournalEntry.objects.filter(
+                        reference=f"AR-PAYMENT-{instance.id}"
+                    ).first()
                 
-                currency = instance.currency or Currency.objects.first()
+                    currency = instance.currency or Currency.objects.first()
                 
-                # Determine cash/bank account
-                if instance.payment_method and 'bank' in instance.payment_method.lower():
-                    cash_account = get_account_by_code("1100")  # Bank
-                else:
-                    cash_account = get_account_by_code("1000")  # Cash
+                    # Determine cash/bank account
+                    if instance.payment_method and 'bank' in instance.payment_method.lower():
+                        cash_account = get_account_by_code("1100")  # Bank
+                    else:
+                        cash_account = get_account_by_code("1000")  # Cash
                 
-                ar_account = get_account_by_code("1200")  # AR
+                    ar_account = get_account_by_code("1200")  # AR
                 
-                if not all([cash_account, ar_account]):
-                    print("❌ Required payment accounts not found!")
-                    return
+                    if not all([cash_account, ar_account]):
+                        print("❌ Required payment accounts not found!")
+                        return
                 
-                if existing_payment_je:
-                    # Update existing
-                    existing_payment_je.total_debit = instance.paid_amount
-                    existing_payment_je.total_credit = instance.paid_amount
-                    existing_payment_je.save()
-                    existing_payment_je.lines.all().delete()
-                else:
-                    # Create new
-                    existing_payment_je = JournalEntry.objects.create(
-                        doc_num=generate_doc_number("JE"),
-                        posting_date=instance.payment_date,
-                        reference=f"AR-PAYMENT-{instance.id}",
-                        remarks=f"Payment from {instance.customer.name}",
-                        currency=currency,
-                        total_debit=instance.paid_amount,
-                        total_credit=instance.paid_amount,
-                        is_posted=True
-                    )
+                    if existing_payment_je:
+                        # Update existing
+                        existing_payment_je.total_debit = instance.paid_amount
+                        existing_payment_je.total_credit = instance.paid_amount
+                        existing_payment_je.save()
+                        existing_payment_je.lines.all().delete()
+                    else:
+                        # Create new
+                        existing_payment_je = JournalEntry.objects.create(
+                            doc_num=generate_doc_number("JE"),
+                            posting_date=instance.payment_date,
+                            reference=f"AR-PAYMENT-{instance.id}",
+                            remarks=f"Payment from {instance.customer.name}",
+                            currency=currency,
+                            total_debit=instance.paid_amount,
+                            total_credit=instance.paid_amount,
+                            is_posted=True
+                        )
                 
-                # Create lines
-                JournalEntryLine.objects.create(
-                    journal_entry=existing_payment_je,
-                    account=cash_account,
-                    debit_amount=instance.paid_amount,
-                    credit_amount=Decimal('0'),
-                    description=f"Payment received - Invoice #{instance.id}"
-                )
+                    # Create lines
+                    JournalEntryLine.objects.create(
+                        journal_entry=existing_payment_je,
+                        account=cash_account,
+                        debit_amount=instance.paid_amount,
+                        credit_amount=Decimal('0'),
+                        description=f"Payment received - Invoice #{instance.id}"
+                    )
                 
-                JournalEntryLine.objects.create(
-                    journal_entry=existing_payment_je,
-                    account=ar_account,
-                    debit_amount=Decimal('0'),
-                    credit_amount=instance.paid_amount,
-                    description=f"AR Payment - {instance.customer.name}"
-                )
+                    JournalEntryLine.objects.create(
+                        journal_entry=existing_payment_je,
+                        account=ar_account,
+                        debit_amount=Decimal('0'),
+                        credit_amount=instance.paid_amount,
+                        description=f"AR Payment - {instance.customer.name}"
+                    )
                 
-                print(f"✅ Payment Journal Entry {existing_payment_je.doc_num} created")
+                    print(f"✅ Payment Journal Entry {existing_payment_je.doc_num} created")
                 
             except Exception as e:
                 print(f"❌ Error creating payment journal entry: {e}")
@@ -290,71 +273,72 @@ def create_delivery_journal_entry(sender, instance, created, **kwargs):
     if instance.status in ['Delivered', 'Open', 'Partially Delivered']:
         def create_delivery_je():
             try:
-                models = get_models()
-                JournalEntry = models.get('JournalEntry')
-                JournalEntryLine = models.get('JournalEntryLine')
-                Currency = models.get('Currency')
+                with transaction.atomic():
+                    models = get_models()
+                    JournalEntry = models.get('JournalEntry')
+                    JournalEntryLine = models.get('JournalEntryLine')
+                    Currency = models.get('Currency')
                 
-                print(f"🚚 Delivery #{instance.id} saved → Creating COGS Journal Entry")
+                    print(f"🚚 Delivery #{instance.id} saved → Creating COGS Journal Entry")
                 
-                # Calculate total
-                lines = instance.lines.all()
-                if lines.exists():
-                    total_amount = sum(line.total_amount for line in lines)
-                else:
-                    total_amount = instance.total_amount or Decimal('0')
+                    # Calculate total
+                    lines = instance.lines.all()
+                    if lines.exists():
+                        total_amount = sum(line.total_amount for line in lines)
+                    else:
+                        total_amount = instance.total_amount or Decimal('0')
                 
-                if total_amount <= 0:
-                    print(f"⚠️ Delivery total is {total_amount}, skipping")
-                    return
+                    if total_amount <= 0:
+                        print(f"⚠️ Delivery total is {total_amount}, skipping")
+                        return
                 
-                # Delete old entries
-                JournalEntry.objects.filter(
-                    reference=f"DELIVERY-{instance.id}"
-                ).delete()
+                    # Delete old entries
+                    JournalEntry.objects.filter(
+                        reference=f"DELIVERY-{instance.id}"
+                    ).delete()
                 
-                # COGS calculation (70% of sales)
-                cogs_amount = total_amount * Decimal('0.70')
-                currency = instance.currency or Currency.objects.first()
+                    # COGS calculation (70% of sales)
+                    cogs_amount = total_amount * Decimal('0.70')
+                    currency = instance.currency or Currency.objects.first()
                 
-                # Get accounts
-                cogs_account = get_account_by_code("5000")  # COGS
-                inventory_account = get_account_by_code("1300")  # Inventory
+                    # Get accounts
+                    cogs_account = get_account_by_code("5000")  # COGS
+                    inventory_account = get_account_by_code("1300")  # Inventory
                 
-                if not all([cogs_account, inventory_account]):
-                    print("❌ Required delivery accounts not found!")
-                    return
+                    if not all([cogs_account, inventory_account]):
+                        print("❌ Required delivery accounts not found!")
+                        return
                 
-                # Create Journal Entry
-                je = JournalEntry.objects.create(
-                    doc_num=generate_doc_number("JE"),
-                    posting_date=instance.posting_date,
-                    reference=f"DELIVERY-{instance.id}",
-                    remarks=f"Goods delivered to {instance.customer.name}",
-                    currency=currency,
-                    total_debit=cogs_amount,
-                    total_credit=cogs_amount,
-                    is_posted=True
-                )
+                    # Create Journal Entry
+                    je = JournalEntry.objects.create(
+                        doc_num=generate_doc_number("JE"),
+                        posting_date=instance.posting_date,
+                        reference=f"DELIVERY-{instance.id}",
+                        remarks=f"Goods delivered to {instance.customer.name}",
+                        currency=currency,
+                        total_debit=cogs_amount,
+                        total_credit=cogs_amount,
+                        is_posted=True
+                    )
                 
-                # Create lines
-                JournalEntryLine.objects.create(
-                    journal_entry=je,
-                    account=cogs_account,
-                    debit_amount=cogs_amount,
-                    credit_amount=Decimal('0'),
-                    description=f"COGS - Delivery #{instance.id}"
-                )
+                    # Create lines
+                    JournalEntryLine.objects.create(
+                        journal_entry=je,
+                        account=cogs_account,
+                        debit_amount=cogs_amount,
+                        credit_amount=Decimal('0'),
+                        description=f"COGS - Delivery #{instance.id}"
+                    )
                 
-                JournalEntryLine.objects.create(
-                    journal_entry=je,
-                    account=inventory_account,
-                    debit_amount=Decimal('0'),
-                    credit_amount=cogs_amount,
-                    description=f"Inventory reduction - Delivery #{instance.id}"
-                )
+                    JournalEntryLine.objects.create(
+                        journal_entry=je,
+                        account=inventory_account,
+                        debit_amount=Decimal('0'),
+                        credit_amount=cogs_amount,
+                        description=f"Inventory reduction - Delivery #{instance.id}"
+                    )
                 
-                print(f"✅ Delivery Journal Entry {je.doc_num} created")
+                    print(f"✅ Delivery Journal Entry {je.doc_num} created")
                 
             except Exception as e:
                 print(f"❌ Error creating delivery journal entry: {e}")
@@ -30,6 +30,7 @@ from .views import (
     ProfitAndLossView,
     BalanceSheetView,
     AccountLedgerView,
+    AccountLedgerAPIView,
 
     # Demo Configuration
     DemoConfigView,
@@ -60,6 +61,7 @@ urlpatterns = [
     path('accounts/<int:pk>/print/', AccountPrintDetailView.as_view(), name='account_print_detail'),
     path('accounts/bulk-delete/', AccountBulkDeleteView.as_view(), name='account_bulk_delete'),
     path('accounts/<int:account_id>/ledger/', AccountLedgerView.as_view(), name='account_ledger'),
+    path('api/accounts/<int:account_id>/ledger/', AccountLedgerAPIView.as_view(), name='account_ledger_api'),
     
     # Journal Entry URLs
     path('journal-entries/', JournalEntryListView.as_view(), name='journal_entry_list'),
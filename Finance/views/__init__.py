@@ -47,6 +47,6 @@ from .balance_sheet_views import (
 )
 
 from .account_ledger_views import (
-    AccountLedgerView,
+    AccountLedgerView, AccountLedgerAPIView,
 ) 
 from .demo_views import (DemoConfigView)
@@ -1,54 +1,130 @@
+from django.views import View
 from django.views.generic import TemplateView
 from django.shortcuts import get_object_or_404
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import PermissionDenied
 from django.db.models import Sum
+from django.http import JsonResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from decimal import Decimal
+from ..balances import LEDGER_PAGE_SIZE, get_ledger_page, get_opening_balance, natural_balance
 from ..models import ChartOfAccounts, GeneralLedger
 
-class AccountLedgerView(TemplateView):
+MAX_LEDGER_PAGE_SIZE = 1000
+
+class AccountLedgerMixin:
+    """Shared filter parsing for the ledger page and its JSON API"""
+
+    def _get_date_param(self, name):
+        try:
+            return parse_date(self.request.GET.get(name) or '')
+        except ValueError:
+            return None
+
+    def _get_page_size(self):
+        try:
+            page_size = int(self.request.GET.get('page_size') or LEDGER_PAGE_SIZE)
+        except ValueError:
+            page_size = LEDGER_PAGE_SIZE
+        return min(max(page_size, 1), MAX_LEDGER_PAGE_SIZE)
+
+    def get_ledger(self, account_id):
+        account = get_object_or_404(ChartOfAccounts.objects.select_related('account_type'), id=account_id)
+        start_date = self._get_date_param('start_date')
+        end_date = self._get_date_param('end_date')
+        page = get_ledger_page(
+            account,
+            cursor=self.request.GET.get('cursor'),
+            start_date=start_date,
+            end_date=end_date,
+            page_size=self._get_page_size(),
+        )
+        return account, start_date, end_date, page
+
+class AccountLedgerView(AccountLedgerMixin, TemplateView):
     template_name = 'finance/account_ledger.html'
     permission_required = 'Finance.view_generalledger'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        account_id = kwargs.get('account_id')
-        account = get_object_or_404(ChartOfAccounts, id=account_id)
-        
-        # Get all GL entries for this account
-        gl_entries = GeneralLedger.objects.filter(
-            account=account
-        ).order_by('posting_date', 'id')
-        
-        # Calculate running balance
-        ledger_data = []
-        running_balance = Decimal('0')
-        
-        for entry in gl_entries:
-            if account.account_type.is_debit:
-                # Debit account: Dr increases, Cr decreases
-                running_balance += entry.debit_amount - entry.credit_amount
-            else:
-                # Credit account: Cr increases, Dr decreases
-                running_balance += entry.credit_amount - entry.debit_amount
-            
-            ledger_data.append({
-                'entry': entry,
-                'running_balance': running_balance,
-            })
-        
-        # Calculate totals
-        total_debits = gl_entries.aggregate(total=Sum('debit_amount'))['total'] or Decimal('0')
-        total_credits = gl_entries.aggregate(total=Sum('credit_amount'))['total'] or Decimal('0')
+        account, start_date, end_date, page = self.get_ledger(kwargs.get('account_id'))
+
+        # Range totals and final balance with one aggregate, independent of the page shown
+        gl_entries = GeneralLedger.objects.filter(account=account)
+        if start_date:
+            gl_entries = gl_entries.filter(posting_date__gte=start_date)
+        if end_date:
+            gl_entries = gl_entries.filter(posting_date__lte=end_date)
+        totals = gl_entries.aggregate(debit=Sum('debit_amount'), credit=Sum('credit_amount'))
+        total_debits = totals['debit'] or Decimal('0')
+        total_credits = totals['credit'] or Decimal('0')
+
+        is_first_page = not self.request.GET.get('cursor')
+        if is_first_page:
+            opening_balance = page['opening_balance']
+        else:
+            opening_balance = get_opening_balance(account, start_date) if start_date else Decimal('0')
+        final_balance = opening_balance + natural_balance(account, total_debits, total_credits)
+
+        query = self.request.GET.copy()
+        query.pop('cursor', None)
         
         context.update({
             'title': f'Account Ledger - {account.code}',
             'subtitle': account.name,
             'account': account,
-            'ledger_data': ledger_data,
+            'start_date': start_date,
+            'end_date': end_date,
+            'opening_balance': opening_balance,
+            'page_opening_balance': page['opening_balance'],
+            'is_first_page': is_first_page,
+            'ledger_data': page['entries'],
+            'next_cursor': page['next_cursor'],
+            'base_query': query.urlencode(),
             'total_debits': total_debits,
             'total_credits': total_credits,
-            'final_balance': running_balance,
+            'final_balance': final_balance,
             'generated_on': timezone.now(),
         })
         return context
+
+class AccountLedgerAPIView(LoginRequiredMixin, AccountLedgerMixin, View):
+    """
+    Keyset-paginated account ledger as JSON.
+
+    Query params: ``start_date``, ``end_date``, ``page_size`` and ``cursor``
+    (the ``next_cursor`` of the previous page).
+    """
+
+    def get(self, request, account_id):
+        try:
+            if not request.user.has_perm('Finance.view_generalledger'):
+                raise PermissionDenied("You don't have permission to view the general ledger")
+
+            account, start_date, end_date, page = self.get_ledger(account_id)
+            return JsonResponse({
+                'success': True,
+                'account': {'id': account.id, 'code': account.code, 'name': account.name},
+                'opening_balance': str(page['opening_balance']),
+                'closing_balance': str(page['closing_balance']),
+                'entries': [
+                    {
+                        'id': item['entry'].id,
+                        'posting_date': item['entry'].posting_date.isoformat(),
+                        'journal_entry_id': item['entry'].journal_entry_id,
+                        'doc_num': item['entry'].journal_entry.doc_num,
+                        'description': item['entry'].journal_entry.remarks,
+                        'debit': str(item['entry'].debit_amount),
+                        'credit': str(item['entry'].credit_amount),
+                        'running_balance': str(item['running_balance']),
+                    }
+                    for item in page['entries']
+                ],
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
+            })
+
+        except PermissionDenied as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=403)
@@ -1,9 +1,9 @@
 from django.views.generic import TemplateView
-from django.db.models import Sum
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from decimal import Decimal
-from ..models import ChartOfAccounts, GeneralLedger, AccountType
+from ..balances import get_account_balances
+from ..forms import FinancialStatementFilterForm
 
 class BalanceSheetView(TemplateView):
     template_name = 'finance/balance_sheet.html'
@@ -12,81 +12,22 @@ class BalanceSheetView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Get account types
-        asset_types = AccountType.objects.filter(code='100')  # Assets
-        liability_types = AccountType.objects.filter(code='200')  # Liabilities
-        equity_types = AccountType.objects.filter(code='300')  # Equity
-
-        # Initialize data structures
-        asset_data = []
-        liability_data = []
-        equity_data = []
-        
-        total_assets = Decimal('0')
-        total_liabilities = Decimal('0')
-        total_equity = Decimal('0')
+        form = FinancialStatementFilterForm(self.request.GET or None)
+        end_date = timezone.now().date()
+        cost_center = None
+        if form.is_valid():
+            end_date = form.cleaned_data['end_date'] or end_date
+            cost_center = form.cleaned_data['cost_center']
 
         print("📊 Generating Balance Sheet...")
 
-        # Process Assets (100 series)
-        asset_accounts = ChartOfAccounts.objects.filter(
-            account_type__in=asset_types
-        ).order_by('code')
-        
-        for account in asset_accounts:
-            gl_entries = GeneralLedger.objects.filter(account=account)
-            debit_sum = gl_entries.aggregate(total=Sum('debit_amount'))['total'] or Decimal('0')
-            credit_sum = gl_entries.aggregate(total=Sum('credit_amount'))['total'] or Decimal('0')
-            balance = debit_sum - credit_sum  # Assets have debit balances
-            
-            if balance != 0:
-                asset_data.append({
-                    'account': account,
-                    'account_code': account.code,
-                    'account_name': account.name,
-                    'balance': balance,
-                })
-                total_assets += balance
-
-        # Process Liabilities (200 series)
-        liability_accounts = ChartOfAccounts.objects.filter(
-            account_type__in=liability_types
-        ).order_by('code')
-        
-        for account in liability_accounts:
-            gl_entries = GeneralLedger.objects.filter(account=account)
-            debit_sum = gl_entries.aggregate(total=Sum('debit_amount'))['total'] or Decimal('0')
-            credit_sum = gl_entries.aggregate(total=Sum('credit_amount'))['total'] or Decimal('0')
-            balance = credit_sum - debit_sum  # Liabilities have credit balances
-            
-            if balance != 0:
-                liability_data.append({
-                    'account': account,
-                    'account_code': account.code,
-                    'account_name': account.name,
-                    'balance': balance,
-                })
-                total_liabilities += balance
+        # One grouped GL query, rolled up the account hierarchy in memory
+        balances = get_account_balances(as_of_date=end_date, cost_center=cost_center)
 
-        # Process Equity (300 series)
-        equity_accounts = ChartOfAccounts.objects.filter(
-            account_type__in=equity_types
-        ).order_by('code')
-        
-        for account in equity_accounts:
-            gl_entries = GeneralLedger.objects.filter(account=account)
-            debit_sum = gl_entries.aggregate(total=Sum('debit_amount'))['total'] or Decimal('0')
-            credit_sum = gl_entries.aggregate(total=Sum('credit_amount'))['total'] or Decimal('0')
-            balance = credit_sum - debit_sum  # Equity has credit balances
-            
-            if balance != 0:
-                equity_data.append({
-                    'account': account,
-                    'account_code': account.code,
-                    'account_name': account.name,
-                    'balance': balance,
-                })
-                total_equity += balance
+        # Assets (100 series) have debit balances; Liabilities (200) and Equity (300) credit balances
+        asset_data, total_assets = self._section(balances, '100', debit_normal=True)
+        liability_data, total_liabilities = self._section(balances, '200', debit_normal=False)
+        equity_data, total_equity = self._section(balances, '300', debit_normal=False)
 
         # Calculate totals
         total_liabilities_equity = total_liabilities + total_equity
@@ -101,7 +42,10 @@ class BalanceSheetView(TemplateView):
 
         context.update({
             'title': _('Balance Sheet'),
-            'subtitle': f'As of {timezone.now().date()}',
+            'subtitle': f'As of {end_date}' + (f' - {cost_center}' if cost_center else ''),
+            'form': form,
+            'end_date': end_date,
+            'cost_center': cost_center,
             'asset_data': asset_data,
             'liability_data': liability_data,
             'equity_data': equity_data,
@@ -114,3 +58,30 @@ class BalanceSheetView(TemplateView):
             'generated_on': timezone.now(),
         })
         return context
+
+    @staticmethod
+    def _section(balances, type_code, debit_normal):
+        """Rows and total for the accounts of one account type, in code order."""
+        rows = []
+        total = Decimal('0')
+        sign = 1 if debit_normal else -1
+        for node in balances.values():
+            account = node['account']
+            if account.account_type.code != type_code:
+                continue
+            balance = sign * (node['debit'] - node['credit'])
+            total_balance = sign * (node['total_debit'] - node['total_credit'])
+            if balance == 0 and total_balance == 0:
+                continue
+            rows.append({
+                'account': account,
+                'account_code': account.code,
+                'account_name': account.name,
+                'balance': balance,
+                'total_balance': total_balance,
+                'level': node['level'],
+                'has_children': node['has_children'],
+            })
+            # Parent subtotals are already counted through their children
+            total += balance
+        return rows, total
@@ -1,9 +1,9 @@
 from django.views.generic import TemplateView
-from django.db.models import Sum
 from django.utils import timezone
 from datetime import datetime
 from django.utils.translation import gettext_lazy as _
-from ..models import ChartOfAccounts, GeneralLedger, AccountType
+from ..balances import get_ledger_totals
+from ..models import ChartOfAccounts, AccountType
 from django import forms
 
 class ProfitLossFilterForm(forms.Form):
@@ -52,15 +52,13 @@ class ProfitAndLossView(TemplateView):
         revenue_types = AccountType.objects.filter(name__icontains='revenue')
         expense_types = AccountType.objects.filter(name__icontains='expense')
 
+        # Net movements for the range from one grouped GL query
+        totals = get_ledger_totals(as_of_date=end_date, start_date=start_date)
+
         # Process Revenue Accounts
         revenue_accounts = ChartOfAccounts.objects.filter(account_type__in=revenue_types)
         for account in revenue_accounts:
-            gl_entries = GeneralLedger.objects.filter(
-                account=account,
-                posting_date__range=[start_date, end_date]
-            )
-            credit_sum = gl_entries.aggregate(total=Sum('credit_amount'))['total'] or 0
-            debit_sum = gl_entries.aggregate(total=Sum('debit_amount'))['total'] or 0
+            debit_sum, credit_sum = totals.get(account.pk, (0, 0))
             amount = credit_sum - debit_sum  # Revenue: net credits
 
             if amount != 0:
@@ -73,12 +71,7 @@ class ProfitAndLossView(TemplateView):
         # Process Expense Accounts
         expense_accounts = ChartOfAccounts.objects.filter(account_type__in=expense_types)
         for account in expense_accounts:
-            gl_entries = GeneralLedger.objects.filter(
-                account=account,
-                posting_date__range=[start_date, end_date]  # Fixed date range
-            )
-            debit_sum = gl_entries.aggregate(total=Sum('debit_amount'))['total'] or 0
-            credit_sum = gl_entries.aggregate(total=Sum('credit_amount'))['total'] or 0
+            debit_sum, credit_sum = totals.get(account.pk, (0, 0))
             amount = debit_sum - credit_sum  # Expenses: net debits
 
             if amount != 0:
@@ -1,10 +1,22 @@
 from django.views.generic import TemplateView
-from django.db.models import Sum, Q
 from django.utils import timezone
 from django.urls import reverse_lazy
 from decimal import Decimal
 
-from ..models import ChartOfAccounts, GeneralLedger
+from ..balances import get_account_balances
+from ..forms import FinancialStatementFilterForm
+
+def split_trial_balance(debit, credit):
+    """
+    Present a net balance on the debit or credit side of the trial balance.
+
+    Debit excess goes on the debit side and credit excess on the credit side,
+    whatever the account's normal direction, so the two columns balance.
+    """
+    net_balance = debit - credit
+    if net_balance >= 0:
+        return net_balance, Decimal('0')
+    return Decimal('0'), abs(net_balance)
 
 class TrialBalanceView(TemplateView):
     template_name = 'finance/trial_balance.html'
@@ -13,78 +25,68 @@ class TrialBalanceView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
+        form = FinancialStatementFilterForm(self.request.GET or None)
+        end_date = timezone.now().date()
+        cost_center = None
+        if form.is_valid():
+            end_date = form.cleaned_data['end_date'] or end_date
+            cost_center = form.cleaned_data['cost_center']
+
+        print("🔍 Calculating Trial Balance...")
+
+        # One grouped GL query, rolled up the account hierarchy in memory
+        balances = get_account_balances(as_of_date=end_date, cost_center=cost_center)
+
         trial_data = []
         total_debit = Decimal('0')
         total_credit = Decimal('0')
 
-        # Get all accounts that have GL entries
-        accounts = ChartOfAccounts.objects.filter(
-            id__in=GeneralLedger.objects.values_list('account_id', flat=True).distinct()
-        ).order_by('code')
+        for node in balances.values():
+            account = node['account']
+            is_debit_account = account.account_type.is_debit
+            trial_debit, trial_credit = split_trial_balance(node['debit'], node['credit'])
+            rollup_debit, rollup_credit = split_trial_balance(node['total_debit'], node['total_credit'])
 
-        print("🔍 Calculating Trial Balance...")
+            # Only include accounts with non-zero balances (own or rolled up from children)
+            if not (trial_debit or trial_credit or rollup_debit or rollup_credit):
+                continue
+
+            trial_data.append({
+                'account': account,
+                'account_code': account.code,
+                'account_name': account.name,
+                'account_type': account.account_type.name,
+                'is_debit_account': is_debit_account,
+                'debit': trial_debit,
+                'credit': trial_credit,
+                'net_balance': node['debit'] - node['credit'],
+                'rollup_debit': rollup_debit,
+                'rollup_credit': rollup_credit,
+                'level': node['level'],
+                'has_children': node['has_children'],
+            })
 
-        for account in accounts:
-            # Get all GL entries for this account
-            gl_entries = GeneralLedger.objects.filter(account=account)
-            
-            # Calculate total debits and credits
-            debit_sum = gl_entries.aggregate(total=Sum('debit_amount'))['total'] or Decimal('0')
-            credit_sum = gl_entries.aggregate(total=Sum('credit_amount'))['total'] or Decimal('0')
-            
-            print(f"📊 Account {account.code}: Dr={debit_sum}, Cr={credit_sum}")
-            
-            # Calculate net balance
-            net_balance = debit_sum - credit_sum
-            
-            # Determine trial balance presentation
-            if account.account_type.is_debit:
-                # Debit accounts (Assets, Expenses): 
-                # Positive balance = Debit side, Negative balance = Credit side
-                if net_balance >= 0:
-                    trial_debit = net_balance
-                    trial_credit = Decimal('0')
-                else:
-                    trial_debit = Decimal('0')
-                    trial_credit = abs(net_balance)
-            else:
-                # Credit accounts (Liabilities, Equity, Revenue):
-                # Positive balance = Credit side, Negative balance = Debit side
-                if net_balance >= 0:
-                    trial_debit = Decimal('0')
-                    trial_credit = net_balance
-                else:
-                    trial_debit = abs(net_balance)
-                    trial_credit = Decimal('0')
-
-            # Only include accounts with non-zero balances
-            if trial_debit != 0 or trial_credit != 0:
-                trial_data.append({
-                    'account': account,
-                    'account_code': account.code,
-                    'account_name': account.name,
-                    'account_type': account.account_type.name,
-                    'is_debit_account': account.account_type.is_debit,
-                    'debit': trial_debit,
-                    'credit': trial_credit,
-                    'net_balance': net_balance,
-                })
-                
-                total_debit += trial_debit
-                total_credit += trial_credit
-                
-                print(f"✅ {account.code}: Trial Dr={trial_debit}, Trial Cr={trial_credit}")
+            # Parent subtotals are already counted through their children
+            total_debit += trial_debit
+            total_credit += trial_credit
 
         # Check if trial balance balances
         balance_difference = total_debit - total_credit
         is_balanced = abs(balance_difference) < Decimal('0.01')  # Allow for small rounding differences
-        
+
         print(f"📈 Trial Balance Totals: Dr={total_debit}, Cr={total_credit}")
         print(f"⚖️ Balanced: {is_balanced}, Difference: {balance_difference}")
 
+        subtitle = f'As of {end_date}'
+        if cost_center:
+            subtitle += f' - {cost_center}'
+
         context.update({
             'title': 'Trial Balance',
-            'subtitle': f'As of {timezone.now().date()}',
+            'subtitle': subtitle,
+            'form': form,
+            'end_date': end_date,
+            'cost_center': cost_center,
             'trial_data': trial_data,
             'total_debit': total_debit,
             'total_credit': total_credit,
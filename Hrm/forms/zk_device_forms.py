@@ -11,7 +11,7 @@ class ZKDeviceForm(forms.ModelForm):
         model = ZKDevice
         fields = [
             'name', 'ip_address', 'port', 'device_id', 'is_active',
-            'timeout', 'password', 'force_udp'
+            'timeout', 'password', 'force_udp', 'clear_buffer_after_sync'
         ]
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
@@ -21,6 +21,7 @@ class ZKDeviceForm(forms.ModelForm):
             'timeout': forms.NumberInput(attrs={'class': 'form-control'}),
             'password': forms.PasswordInput(attrs={'class': 'form-control'}),
             'force_udp': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'clear_buffer_after_sync': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
             'is_active': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
@@ -79,6 +80,12 @@ class ZKDeviceSyncForm(forms.Form):
         widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
         label=_("End Date (Optional)")
     )
+    only_new = forms.BooleanField(
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label=_("Only punches not yet synced")
+    )
 
     def clean(self):
         cleaned_data = super().clean()
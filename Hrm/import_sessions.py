@@ -0,0 +1,226 @@
+"""
+Server-side staged imports for generated attendance and overtime data.
+
+The import views keep the generated preview in an ``ImportSession`` and
+hand the browser only its id. Saving sends the id and a selection (all
+rows, the rows without an existing record, or row indexes), and
+``commit_import_records`` writes the chosen rows in chunks. Each chunk
+resolves employees and existing records with one query apiece, inserts
+new rows with ``bulk_create``, updates existing ones with ``bulk_update``
+and records its progress on the session in the same transaction, so
+``ImportSession.processed`` can be polled while the import runs.
+
+Rows posted directly by older clients go through the same path, looking
+employees up by code.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Attendance, Employee, ImportSession, OvertimeRecord
+
+OVERTIME_REASON = '🔥 COMPLETE Imported via overtime import with ALL unified processor features'
+# Error messages kept on a session (the counters still count them all)
+MAX_STORED_ERRORS = 200
+
+
+def purge_import_sessions():
+    """Delete sessions older than ``IMPORT_SESSION_TTL_HOURS`` (default 24)."""
+    hours = getattr(settings, 'IMPORT_SESSION_TTL_HOURS', 24)
+    return ImportSession.objects.filter(created_at__lt=timezone.now() - timedelta(hours=hours)).delete()[0]
+
+
+def create_import_session(kind, records, start_date, end_date, user=None):
+    """Store generated preview ``records`` and return the new session."""
+    purge_import_sessions()
+    return ImportSession.objects.create(
+        kind=kind,
+        records=records,
+        start_date=start_date,
+        end_date=end_date,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def select_records(session, import_type='all', indexes=None):
+    """The session rows chosen by the browser: ``all``, ``new`` (no existing record) or ``selected`` indexes."""
+    records = session.records
+    if import_type == 'new':
+        return [record for record in records if not record.get('is_duplicate')]
+    if import_type == 'selected':
+        chosen = sorted({int(index) for index in indexes or ()})
+        return [records[index] for index in chosen if 0 <= index < len(records)]
+    return list(records)
+
+
+# ------------------------------------------------------------------
+# Row parsing: (date, field values) or ValueError
+# ------------------------------------------------------------------
+def _parse_date(record):
+    try:
+        return datetime.strptime(record['date'], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid date format for employee {record['employee_id']}: {record['date']}")
+
+
+def _parse_timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+
+
+def _attendance_values(record):
+    if not all(field in record for field in ('employee_id', 'date', 'status')):
+        raise ValueError(f"Missing required fields in record: {record}")
+    return _parse_date(record), {
+        'status': record['status'],
+        'check_in': _parse_timestamp(record.get('check_in')),
+        'check_out': _parse_timestamp(record.get('check_out')),
+        'late_minutes': record.get('late_minutes', 0),
+        'early_out_minutes': record.get('early_out_minutes', 0),
+        'overtime_minutes': record.get('overtime_minutes', 0),
+        'remarks': record.get('remarks'),
+        'is_manual': True,
+    }
+
+
+def _overtime_values(record):
+    if not all(field in record for field in ('employee_id', 'date', 'start_time', 'end_time', 'hours')):
+        raise ValueError(f"Missing required fields in record: {record}")
+    date = _parse_date(record)
+    try:
+        start_time = datetime.strptime(record['start_time'], '%H:%M').time()
+        end_time = datetime.strptime(record['end_time'], '%H:%M').time()
+    except ValueError:
+        raise ValueError(f"Invalid time format for employee {record['employee_id']}")
+    try:
+        hours = Decimal(str(record['hours']))
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError(f"Invalid hours format for employee {record['employee_id']}: {record['hours']}")
+    if hours <= 0:
+        raise ValueError(f"Invalid hours for employee {record['employee_id']}: {hours}")
+    return date, {
+        'start_time': start_time,
+        'end_time': end_time,
+        'hours': hours,
+        'reason': record.get('reason', OVERTIME_REASON),
+        'status': record.get('status', 'APP'),
+        'remarks': record.get('remarks'),
+    }
+
+
+IMPORT_TARGETS = {
+    'ATT': (Attendance, _attendance_values),
+    'OT': (OvertimeRecord, _overtime_values),
+}
+
+
+def _existing_rows(model, keys):
+    """``{(employee pk, date): instance}`` for the chunk; the oldest row wins where dates repeat."""
+    employee_ids = {employee_id for employee_id, _ in keys}
+    dates = {day for _, day in keys}
+    existing = {}
+    rows = model.objects.filter(employee_id__in=employee_ids, date__in=dates).order_by('-pk')
+    for row in rows:
+        existing[row.employee_id, row.date] = row
+    return existing
+
+
+def _commit_chunk(kind, records):
+    model, parse = IMPORT_TARGETS[kind]
+    errors = []
+
+    # Session rows carry the employee pk; rows posted by older clients only the employee code
+    pks = {record['employee_pk'] for record in records if record.get('employee_pk')}
+    codes = {record.get('employee_id') for record in records if not record.get('employee_pk')}
+    employees = Employee.objects.filter(Q(pk__in=pks) | Q(employee_id__in=codes)).values_list('pk', 'employee_id')
+    known_pks = set()
+    employees_by_code = {}
+    for pk, code in employees:
+        known_pks.add(pk)
+        employees_by_code[code] = pk
+
+    rows = {}
+    accepted = []
+    for record in records:
+        try:
+            date, values = parse(record)
+            employee_pk = record.get('employee_pk') or employees_by_code.get(record['employee_id'])
+            if employee_pk not in known_pks:
+                raise ValueError(f"Employee with ID {record['employee_id']} not found")
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        rows[employee_pk, date] = values  # a repeated row overrides the earlier one, as saving twice did
+        accepted.append(record)
+
+    existing = _existing_rows(model, rows.keys())
+    to_create, to_update = [], []
+    now = timezone.now()
+    for (employee_pk, date), values in rows.items():
+        instance = existing.get((employee_pk, date))
+        if instance is None:
+            to_create.append(model(employee_id=employee_pk, date=date, **values))
+        else:
+            for field, value in values.items():
+                setattr(instance, field, value)
+            instance.updated_at = now
+            to_update.append(instance)
+
+    model.objects.bulk_create(to_create, batch_size=500)
+    if to_update:
+        fields = list(next(iter(rows.values()))) + ['updated_at']
+        model.objects.bulk_update(to_update, fields, batch_size=500)
+    return len(to_create), len(to_update), errors, accepted
+
+
+def commit_import_records(kind, records, session=None, chunk_size=500):
+    """
+    Write ``records`` (preview rows) into Attendance/OvertimeRecord chunk by chunk.
+
+    Returns ``{'created', 'updated', 'errors', 'saved'}`` (``saved``: the records
+    that passed validation and were written). With a ``session`` its status
+    and counters are kept current after every chunk, and a failing chunk marks
+    it failed (earlier chunks stay committed; re-running updates them in place).
+    """
+    created = updated = 0
+    errors = []
+    saved = []
+    if session is not None:
+        ImportSession.objects.filter(pk=session.pk).update(
+            status='RUN', total=len(records), processed=0,
+            created_count=0, updated_count=0, error_count=0, errors=[], updated_at=timezone.now())
+
+    try:
+        for offset in range(0, len(records), chunk_size):
+            chunk = records[offset:offset + chunk_size]
+            with transaction.atomic():
+                chunk_created, chunk_updated, chunk_errors, chunk_saved = _commit_chunk(kind, chunk)
+                if session is not None:
+                    ImportSession.objects.filter(pk=session.pk).update(
+                        processed=F('processed') + len(chunk),
+                        created_count=F('created_count') + chunk_created,
+                        updated_count=F('updated_count') + chunk_updated,
+                        error_count=F('error_count') + len(chunk_errors),
+                        updated_at=timezone.now())
+            created += chunk_created
+            updated += chunk_updated
+            errors.extend(chunk_errors)
+            saved.extend(chunk_saved)
+    except Exception as e:
+        if session is not None:
+            ImportSession.objects.filter(pk=session.pk).update(
+                status='FAI', errors=errors[:MAX_STORED_ERRORS - 1] + [str(e)])
+        raise
+
+    if session is not None:
+        ImportSession.objects.filter(pk=session.pk).update(status='DON', errors=errors[:MAX_STORED_ERRORS])
+    return {'created': created, 'updated': updated, 'errors': errors, 'saved': saved}
+
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Hrm.models import SalaryMonth
+from Hrm.payroll import generate_salary_month
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate EmployeeSalary/SalaryDetail rows for a salary month. Employees that already have a "
+        "payslip for the month are skipped, so an interrupted run can simply be repeated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('year', type=int)
+        parser.add_argument('month', type=int)
+        parser.add_argument('--employees', nargs='+', type=int, help="Only generate for these Employee ids.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Payslips written per transaction.")
+        parser.add_argument('--regenerate', action='store_true',
+                            help="Delete and rebuild existing payslips of the selected employees.")
+        parser.add_argument('--create-month', action='store_true',
+                            help="Create the SalaryMonth if it does not exist yet.")
+
+    def handle(self, *args, **options):
+        year, month = options['year'], options['month']
+        if not 1 <= month <= 12:
+            raise CommandError("Month must be between 1 and 12.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        if options['create_month']:
+            salary_month, _ = SalaryMonth.objects.get_or_create(year=year, month=month)
+        else:
+            salary_month = SalaryMonth.objects.filter(year=year, month=month).first()
+            if salary_month is None:
+                raise CommandError(f"Salary month {year}-{month:02d} does not exist (use --create-month).")
+
+        started = time.monotonic()
+        result = generate_salary_month(
+            salary_month,
+            employee_ids=options['employees'],
+            batch_size=options['batch_size'],
+            regenerate=options['regenerate'],
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{salary_month}: {result['created']} payslips generated, {result['skipped']} already present "
+            f"({result['employees']} payable employees) in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Hrm.models import Roster
+from Hrm.rosters import generate_roster_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Create/update RosterDay rows so each roster assignment has one day per date of its roster, "
+        "on the assignment's shift. Existing days are diffed, so re-running only writes what changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('rosters', nargs='*', type=int, help="Roster ids.")
+        parser.add_argument('--all', action='store_true', help="Process every roster.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per INSERT/UPDATE statement.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options['all']:
+            rosters = Roster.objects.all()
+        elif options['rosters']:
+            rosters = Roster.objects.filter(pk__in=options['rosters'])
+            missing = set(options['rosters']) - set(rosters.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"Roster(s) not found: {', '.join(map(str, sorted(missing)))}")
+        else:
+            raise CommandError("Give one or more roster ids or --all.")
+
+        for roster in rosters:
+            started = time.monotonic()
+            result = generate_roster_days(roster, batch_size=options['batch_size'])
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"{roster}: {result['created']} created, {result['updated']} updated, "
+                f"{result['deleted']} deleted, {result['unchanged']} unchanged in {elapsed:.1f}s"
+            ))
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from Hrm.models import ZKDevice, ZKSyncLog
+from Hrm.views.zktico.zk_device_sync import sync_device_attendance
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Pull new punches from all active ZK devices concurrently. Each attempt is recorded in "
+        "ZKSyncLog; devices that keep failing are retried with exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--devices', nargs='+', type=int, help="Only sync these ZKDevice ids.")
+        parser.add_argument('--workers', type=int, default=4, help="Maximum devices synced at the same time.")
+        parser.add_argument('--device-timeout', type=int, default=300,
+                            help="Seconds a single device sync may run before it is logged as timed out.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of running a single pass.")
+        parser.add_argument('--interval', type=int, default=300, help="Seconds between passes with --loop.")
+        parser.add_argument('--backoff-base', type=int, default=60,
+                            help="Wait after the first consecutive failure; doubles with each further failure.")
+        parser.add_argument('--backoff-max', type=int, default=3600, help="Upper bound for the backoff wait.")
+        parser.add_argument('--force', action='store_true', help="Ignore backoff and sync every device now.")
+        parser.add_argument('--zk-class', default='zk.ZK',
+                            help="Dotted path of the pyzk-compatible ZK class (tests pass a fake).")
+
+    def handle(self, *args, **options):
+        zk_class = options['zk_class']
+        if isinstance(zk_class, str):
+            try:
+                zk_class = import_string(zk_class)
+            except ImportError as e:
+                raise CommandError(f"Cannot import ZK class {options['zk_class']}: {e}")
+
+        self.options = options
+        self.zk_class = zk_class
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max(options['workers'], 1))
+
+        try:
+            while True:
+                self.run_pass()
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Interrupted, stopping.")
+
+    def get_due_devices(self):
+        """Active devices that are not mid-sync and whose backoff window has passed."""
+        devices = ZKDevice.objects.filter(is_active=True)
+        if self.options['devices']:
+            devices = devices.filter(pk__in=self.options['devices'])
+
+        now = timezone.now()
+        due = []
+        for device in devices:
+            if device.pk in self.in_flight:
+                continue
+            wait = self.get_backoff_seconds(device)
+            if wait and not self.options['force']:
+                last_attempt = device.sync_logs.values_list('started_at', flat=True).first()
+                if last_attempt and (now - last_attempt).total_seconds() < wait:
+                    self.stdout.write(f"{device.name}: backing off for {wait}s after repeated failures")
+                    continue
+            due.append(device)
+        return due
+
+    def get_backoff_seconds(self, device):
+        """``backoff_base * 2**(failures - 1)``, capped, for the current run of failed attempts."""
+        statuses = device.sync_logs.values_list('status', flat=True)[:16]
+        failures = 0
+        for status in statuses:
+            if status == 'SUC':
+                break
+            failures += 1
+        if not failures:
+            return 0
+        return min(self.options['backoff_base'] * 2 ** (failures - 1), self.options['backoff_max'])
+
+    def sync_one(self, device, started, future):
+        """Worker thread body: sync a device once a worker slot is free, then release its DB connection."""
+        with self.slots:
+            started['at'] = timezone.now()
+            try:
+                future.set_result(sync_device_attendance(device, zk_class=self.zk_class))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                connections.close_all()
+
+    def submit(self, device, started):
+        """
+        Sync ``device`` on a daemon thread. A sync that hangs past the timeout
+        cannot be killed, but as a daemon it no longer keeps the process alive.
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        threading.Thread(target=self.sync_one, args=(device, started, future),
+                         name=f'zk-sync-{device.pk}', daemon=True).start()
+        return future
+
+    def run_pass(self):
+        devices = self.get_due_devices()
+        if not devices:
+            return
+
+        running = {}
+        for device in devices:
+            started = {}
+            with self.lock:
+                self.in_flight.add(device.pk)
+            future = self.submit(device, started)
+            future.add_done_callback(lambda f, pk=device.pk: self._release(pk))
+            running[future] = (device, started)
+
+        timeout = self.options['device_timeout']
+        while running:
+            time.sleep(0.2)
+            now = timezone.now()
+            for future, (device, started) in list(running.items()):
+                if future.done():
+                    del running[future]
+                    self.record(device, started.get('at') or now, future)
+                elif started.get('at') and (now - started['at']).total_seconds() > timeout:
+                    # The thread cannot be killed; the device stays in flight until it returns.
+                    del running[future]
+                    self.record(device, started['at'], None, timed_out=True)
+
+    def _release(self, device_pk):
+        with self.lock:
+            self.in_flight.discard(device_pk)
+
+    def record(self, device, started_at, future, timed_out=False):
+        log = ZKSyncLog(device=device, started_at=started_at, finished_at=timezone.now())
+        if timed_out:
+            log.status = 'TMO'
+            log.error_message = f"Sync exceeded {self.options['device_timeout']}s"
+        else:
+            try:
+                result = future.result()
+            except Exception as e:
+                log.status = 'FAI'
+                log.error_message = str(e)
+            else:
+                log.status = 'SUC' if result['verified'] else 'FAI'
+                log.error_message = '\n'.join(result['errors']) or (
+                    '' if result['verified'] else "Saved punches could not be verified"
+                )
+                log.fetched_count = result['fetched']
+                log.new_count = result['new']
+                log.inserted_count = result['inserted']
+                log.skipped_count = result['skipped']
+                log.buffer_cleared = result['cleared']
+        log.save()
+
+        message = (f"{device.name}: {log.get_status_display()} - {log.inserted_count} saved, "
+                   f"{log.skipped_count} skipped of {log.new_count} new")
+        if log.error_message:
+            message += f" ({log.error_message})"
+        if log.status == 'SUC':
+            self.stdout.write(self.style.SUCCESS(message))
+        else:
+            logger.warning(message)
+            self.stdout.write(self.style.WARNING(message))
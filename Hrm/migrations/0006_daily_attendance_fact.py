@@ -0,0 +1,43 @@
+# Generated by Django 4.2.20 on 2026-10-18 09:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hrm', '0005_document_remove_employee_confirmation_date_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('first_in', models.DateTimeField(blank=True, null=True, verbose_name='First In')),
+                ('last_out', models.DateTimeField(blank=True, null=True, verbose_name='Last Out')),
+                ('total_punches', models.PositiveIntegerField(default=0, verbose_name='Total Punches')),
+                ('working_hours', models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='Working Hours')),
+                ('late_minutes', models.PositiveIntegerField(default=0, verbose_name='Late Minutes')),
+                ('early_out_minutes', models.PositiveIntegerField(default=0, verbose_name='Early Out Minutes')),
+                ('overtime_hours', models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='Overtime Hours')),
+                ('status', models.CharField(choices=[('PRE', 'Present'), ('ABS', 'Absent'), ('LAT', 'Late'), ('LEA', 'Leave'), ('HOL', 'Holiday'), ('WEE', 'Weekend'), ('HAL', 'Half Day')], max_length=3, verbose_name='Status')),
+                ('shift_source', models.CharField(default='None', max_length=30, verbose_name='Shift Source')),
+                ('config_key', models.CharField(help_text='Hash of the processor rule configuration used to compute this row.', max_length=64, verbose_name='Rule Configuration Key')),
+                ('details', models.JSONField(blank=True, default=dict, verbose_name='Details')),
+                ('is_dirty', models.BooleanField(default=False, verbose_name='Needs Recompute')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Computed At')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_facts', to='Hrm.employee', verbose_name='Employee')),
+                ('shift', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_facts', to='Hrm.shift', verbose_name='Shift')),
+            ],
+            options={
+                'verbose_name': 'Daily Attendance Fact',
+                'verbose_name_plural': 'Daily Attendance Facts',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='Hrm_dailyat_date_ba4549_idx'), models.Index(fields=['is_dirty'], name='Hrm_dailyat_is_dirt_2eada8_idx')],
+                'unique_together': {('employee', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.20 on 2026-10-18 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hrm', '0006_daily_attendance_fact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zkdevice',
+            name='clear_buffer_after_sync',
+            field=models.BooleanField(default=False, help_text="Clear the device's attendance buffer once a sync is verified as saved.", verbose_name='Clear Device Buffer After Sync'),
+        ),
+        migrations.AddField(
+            model_name='zkdevice',
+            name='last_punch_at',
+            field=models.DateTimeField(blank=True, help_text='Timestamp of the newest punch already stored.', null=True, verbose_name='Last Synced Punch Time'),
+        ),
+        migrations.AddField(
+            model_name='zkdevice',
+            name='last_record_id',
+            field=models.PositiveIntegerField(blank=True, help_text='Highest device record number already stored.', null=True, verbose_name='Last Synced Record ID'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.20 on 2026-10-18 09:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hrm', '0007_zkdevice_sync_marks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZKSyncLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('status', models.CharField(choices=[('SUC', 'Success'), ('FAI', 'Failed'), ('TMO', 'Timed Out')], max_length=3, verbose_name='Status')),
+                ('fetched_count', models.PositiveIntegerField(default=0, verbose_name='Punches Fetched')),
+                ('new_count', models.PositiveIntegerField(default=0, verbose_name='New Punches')),
+                ('inserted_count', models.PositiveIntegerField(default=0, verbose_name='Punches Saved')),
+                ('skipped_count', models.PositiveIntegerField(default=0, verbose_name='Duplicates Skipped')),
+                ('buffer_cleared', models.BooleanField(default=False, verbose_name='Device Buffer Cleared')),
+                ('error_message', models.TextField(blank=True, verbose_name='Error')),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_logs', to='Hrm.zkdevice', verbose_name='Device')),
+            ],
+            options={
+                'verbose_name': 'ZK Sync Log',
+                'verbose_name_plural': 'ZK Sync Logs',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['device', '-started_at'], name='Hrm_zksyncl_device__028f38_idx')],
+            },
+        ),
+    ]
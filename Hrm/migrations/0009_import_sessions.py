@@ -0,0 +1,43 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:36
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('Hrm', '0008_zk_sync_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('ATT', 'Attendance'), ('OT', 'Overtime')], max_length=3, verbose_name='Kind')),
+                ('start_date', models.DateField(verbose_name='Start Date')),
+                ('end_date', models.DateField(verbose_name='End Date')),
+                ('records', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Records')),
+                ('status', models.CharField(choices=[('PEN', 'Pending'), ('RUN', 'Running'), ('DON', 'Done'), ('FAI', 'Failed')], default='PEN', max_length=3, verbose_name='Status')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Records To Import')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Processed')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Created')),
+                ('updated_count', models.PositiveIntegerField(default=0, verbose_name='Updated')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='Errors')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Error Messages')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hrm_import_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+            ],
+            options={
+                'verbose_name': 'Import Session',
+                'verbose_name_plural': 'Import Sessions',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
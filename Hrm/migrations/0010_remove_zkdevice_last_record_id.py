@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 11:13
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Hrm', '0009_import_sessions'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='zkdevice',
+            name='last_record_id',
+        ),
+    ]
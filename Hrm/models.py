@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -5,6 +7,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django_ckeditor_5.fields import CKEditor5Field
 from django.contrib.auth import get_user_model
 
@@ -1619,6 +1622,10 @@ class ZKDevice(models.Model):
     timeout = models.IntegerField(_("Timeout"), default=5)
     password = models.CharField(_("Device Password"), max_length=100, blank=True, null=True)
     force_udp = models.BooleanField(_("Force UDP"), default=False)
+    last_punch_at = models.DateTimeField(_("Last Synced Punch Time"), blank=True, null=True,
+                                         help_text=_("Timestamp of the newest punch already stored."))
+    clear_buffer_after_sync = models.BooleanField(_("Clear Device Buffer After Sync"), default=False,
+                                                  help_text=_("Clear the device's attendance buffer once a sync is verified as saved."))
     created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
     
@@ -1764,4 +1771,141 @@ class ZKAttendanceLog(models.Model):
             '4': _("Overtime In"),
             '5': _("Overtime Out"),
         }
-        return punch_types.get(self.punch_type, self.punch_type or _("Unknown"))
\ No newline at end of file
+        return punch_types.get(self.punch_type, self.punch_type or _("Unknown"))
+
+
+class ZKSyncLog(models.Model):
+    """One background sync attempt against a ZK device (see the ``zk_sync`` command)."""
+    STATUS_CHOICES = (
+        ('SUC', 'Success'),
+        ('FAI', 'Failed'),
+        ('TMO', 'Timed Out'),
+    )
+
+    device = models.ForeignKey(ZKDevice, on_delete=models.CASCADE,
+                               related_name='sync_logs', verbose_name=_("Device"))
+    started_at = models.DateTimeField(_("Started At"))
+    finished_at = models.DateTimeField(_("Finished At"), null=True, blank=True)
+    status = models.CharField(_("Status"), max_length=3, choices=STATUS_CHOICES)
+    fetched_count = models.PositiveIntegerField(_("Punches Fetched"), default=0)
+    new_count = models.PositiveIntegerField(_("New Punches"), default=0)
+    inserted_count = models.PositiveIntegerField(_("Punches Saved"), default=0)
+    skipped_count = models.PositiveIntegerField(_("Duplicates Skipped"), default=0)
+    buffer_cleared = models.BooleanField(_("Device Buffer Cleared"), default=False)
+    error_message = models.TextField(_("Error"), blank=True)
+
+    def __str__(self):
+        return f"{self.device.name} - {self.started_at} - {self.get_status_display()}"
+
+    @property
+    def duration_seconds(self):
+        if not self.finished_at:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    class Meta:
+        verbose_name = _("ZK Sync Log")
+        verbose_name_plural = _("ZK Sync Logs")
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['device', '-started_at']),
+        ]
+
+
+class DailyAttendanceFact(models.Model):
+    """
+    Materialized per-employee, per-day attendance produced by UnifiedAttendanceProcessor.
+    Rows are marked dirty when punches, leaves, holidays or rosters touching the day change,
+    and are recomputed lazily the next time a report reads them.
+    """
+    STATUS_CHOICES = Attendance.STATUS_CHOICES
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE,
+                                related_name='attendance_facts', verbose_name=_("Employee"))
+    date = models.DateField(_("Date"))
+    first_in = models.DateTimeField(_("First In"), null=True, blank=True)
+    last_out = models.DateTimeField(_("Last Out"), null=True, blank=True)
+    total_punches = models.PositiveIntegerField(_("Total Punches"), default=0)
+    working_hours = models.DecimalField(_("Working Hours"), max_digits=5, decimal_places=2, default=0)
+    late_minutes = models.PositiveIntegerField(_("Late Minutes"), default=0)
+    early_out_minutes = models.PositiveIntegerField(_("Early Out Minutes"), default=0)
+    overtime_hours = models.DecimalField(_("Overtime Hours"), max_digits=5, decimal_places=2, default=0)
+    status = models.CharField(_("Status"), max_length=3, choices=STATUS_CHOICES)
+    shift = models.ForeignKey(Shift, on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='attendance_facts', verbose_name=_("Shift"))
+    shift_source = models.CharField(_("Shift Source"), max_length=30, default='None')
+    config_key = models.CharField(_("Rule Configuration Key"), max_length=64,
+                                 help_text=_("Hash of the processor rule configuration used to compute this row."))
+    details = models.JSONField(_("Details"), default=dict, blank=True)
+    is_dirty = models.BooleanField(_("Needs Recompute"), default=False)
+    computed_at = models.DateTimeField(_("Computed At"), auto_now=True)
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.date} - {self.status}"
+
+    @property
+    def worked_minutes(self):
+        return int(round(self.working_hours * 60))
+
+    @property
+    def overtime_minutes(self):
+        return int(round(self.overtime_hours * 60))
+
+    class Meta:
+        verbose_name = _("Daily Attendance Fact")
+        verbose_name_plural = _("Daily Attendance Facts")
+        unique_together = ('employee', 'date')
+        indexes = [
+            models.Index(fields=['date']),
+            models.Index(fields=['is_dirty']),
+        ]
+        ordering = ['-date']
+
+
+class ImportSession(models.Model):
+    """
+    A generated attendance/overtime import preview kept on the server.
+
+    The import views store the preview rows here and the browser only sends
+    back the session id plus which rows to import; the save views then write
+    the rows in chunks and record their progress on this row.
+    """
+    KIND_CHOICES = (
+        ('ATT', 'Attendance'),
+        ('OT', 'Overtime'),
+    )
+    STATUS_CHOICES = (
+        ('PEN', 'Pending'),
+        ('RUN', 'Running'),
+        ('DON', 'Done'),
+        ('FAI', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(_("Kind"), max_length=3, choices=KIND_CHOICES)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True,
+                                  related_name='hrm_import_sessions', verbose_name=_("Created By"))
+    start_date = models.DateField(_("Start Date"))
+    end_date = models.DateField(_("End Date"))
+    records = models.JSONField(_("Records"), default=list, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(_("Status"), max_length=3, choices=STATUS_CHOICES, default='PEN')
+    total = models.PositiveIntegerField(_("Records To Import"), default=0)
+    processed = models.PositiveIntegerField(_("Processed"), default=0)
+    created_count = models.PositiveIntegerField(_("Created"), default=0)
+    updated_count = models.PositiveIntegerField(_("Updated"), default=0)
+    error_count = models.PositiveIntegerField(_("Errors"), default=0)
+    errors = models.JSONField(_("Error Messages"), default=list, blank=True)
+    created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} import {self.start_date} - {self.end_date} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        return round(self.processed * 100 / self.total) if self.total else 0
+
+    class Meta:
+        verbose_name = _("Import Session")
+        verbose_name_plural = _("Import Sessions")
+        ordering = ['-created_at']
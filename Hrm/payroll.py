@@ -0,0 +1,303 @@
+"""
+Payroll generation for a SalaryMonth.
+
+``generate_salary_month`` builds the EmployeeSalary and SalaryDetail rows of
+every payable employee. All inputs (salary structures and their components,
+deductions, advance installments, bonuses, approved overtime and attendance)
+are loaded for the whole month in a handful of grouped queries, salaries are
+computed in memory and written with ``bulk_create`` batch by batch.
+
+Generation is idempotent per employee: anyone who already has a salary for
+the month is skipped, so an interrupted run is simply started again. Each
+batch commits on its own while holding a lock on the SalaryMonth row, which
+keeps two concurrent runs from writing the same payslip twice.
+"""
+import calendar
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    AdvanceInstallment, Attendance, Deduction, Employee, EmployeeBonus, EmployeeSalary,
+    OvertimeRecord, SalaryComponent, SalaryDetail, SalaryMonth, SalaryStructureComponent,
+)
+from .working_calendar import WorkingCalendar
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+
+# Components the engine books amounts against that do not come from a structure
+SYSTEM_COMPONENTS = {
+    'BASIC': ('Basic Salary', 'EARN'),
+    'OT': ('Overtime', 'EARN'),
+    'BONUS': ('Bonus', 'EARN'),
+    'ADV': ('Advance Installment', 'DED'),
+    'DED': ('Salary Deduction', 'DED'),
+}
+
+
+def _money(value):
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+@dataclass
+class PayrollInputs:
+    """Everything needed to compute one month, keyed by employee id."""
+    salary_month: SalaryMonth
+    start: date
+    end: date
+    working_days: int
+    components: dict = field(default_factory=lambda: defaultdict(list))
+    deductions: dict = field(default_factory=lambda: defaultdict(Decimal))
+    installments: dict = field(default_factory=lambda: defaultdict(Decimal))
+    bonuses: dict = field(default_factory=lambda: defaultdict(Decimal))
+    overtime_hours: dict = field(default_factory=lambda: defaultdict(Decimal))
+    attendance: dict = field(default_factory=dict)
+
+
+def month_bounds(salary_month):
+    last_day = calendar.monthrange(salary_month.year, salary_month.month)[1]
+    return date(salary_month.year, salary_month.month, 1), date(salary_month.year, salary_month.month, last_day)
+
+
+def count_working_days(start, end):
+    """Days in the range that are neither weekend (``PAYROLL_WEEKEND_DAYS``) nor a holiday."""
+    return WorkingCalendar(getattr(settings, 'PAYROLL_WEEKEND_DAYS', (4, 5))).count_working_days(start, end)
+
+
+def payable_employees(salary_month, employee_ids=None):
+    """
+    Employees paid for the month: everyone who joined by its last day and
+    has not separated before its first day. ``is_active`` is not used, since
+    saving a separation clears it even when the separation date is still
+    ahead; staff separated during the month get a separation salary.
+    """
+    start, end = month_bounds(salary_month)
+    employees = (Employee.objects
+                 .filter(joining_date__lte=end)
+                 .filter(Q(separation__isnull=True) | Q(separation__separation_date__gte=start))
+                 .select_related('salary_structure', 'separation')
+                 .order_by('pk'))
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+    return employees
+
+
+def load_payroll_inputs(salary_month, employee_ids):
+    """Load the month's inputs for ``employee_ids`` with one grouped query per source."""
+    start, end = month_bounds(salary_month)
+    inputs = PayrollInputs(salary_month, start, end, count_working_days(start, end))
+
+    structure_components = (SalaryStructureComponent.objects
+                            .filter(salary_structure__employee_id__in=employee_ids, is_active=True)
+                            .select_related('component')
+                            .values_list('salary_structure__employee_id', 'component_id',
+                                         'component__component_type', 'amount', 'percentage'))
+    for employee_id, component_id, component_type, amount, percentage in structure_components:
+        inputs.components[employee_id].append((component_id, component_type, amount, percentage))
+
+    for employee_id, total in (Deduction.objects
+                               .filter(salary_month=salary_month, employee_id__in=employee_ids)
+                               .values_list('employee_id').annotate(total=Sum('amount'))):
+        inputs.deductions[employee_id] = total
+
+    for employee_id, total in (AdvanceInstallment.objects
+                               .filter(advance__employee_id__in=employee_ids, advance__status__in=['APP', 'PAI'],
+                                       due_date__range=[start, end], is_paid=False)
+                               .values_list('advance__employee_id').annotate(total=Sum('amount'))):
+        inputs.installments[employee_id] = total
+
+    for employee_id, total in (EmployeeBonus.objects
+                               .filter(employee_id__in=employee_ids, bonus_month__year=salary_month.year,
+                                       bonus_month__month=salary_month.month)
+                               .values_list('employee_id').annotate(total=Sum('amount'))):
+        inputs.bonuses[employee_id] = total
+
+    for employee_id, total in (OvertimeRecord.objects
+                               .filter(employee_id__in=employee_ids, status='APP', date__range=[start, end])
+                               .values_list('employee_id').annotate(total=Sum('hours'))):
+        inputs.overtime_hours[employee_id] = total
+
+    attendance = (Attendance.objects
+                  .filter(employee_id__in=employee_ids, date__range=[start, end])
+                  .values('employee_id')
+                  .annotate(present=Count('id', filter=Q(status__in=['PRE', 'LAT', 'HAL'])),
+                            absent=Count('id', filter=Q(status='ABS')),
+                            leave=Count('id', filter=Q(status='LEA'))))
+    for row in attendance:
+        inputs.attendance[row['employee_id']] = row
+    return inputs
+
+
+def _separation_date_in_month(employee, inputs):
+    """The employee's separation date when it falls inside the month, else None."""
+    separation = getattr(employee, 'separation', None)
+    if separation is not None and inputs.start <= separation.separation_date <= inputs.end:
+        return separation.separation_date
+    return None
+
+
+def _employed_fraction(employee, inputs):
+    """Share of the month the employee was on the payroll (joiners and leavers are prorated)."""
+    first = max(employee.joining_date, inputs.start)
+    last = _separation_date_in_month(employee, inputs) or inputs.end
+    days_in_month = (inputs.end - inputs.start).days + 1
+    return Decimal(max((last - first).days + 1, 0)) / Decimal(days_in_month)
+
+
+def compute_salary(employee, inputs, system_components):
+    """
+    Compute one payslip in memory.
+
+    Returns ``(EmployeeSalary, [(component_id, amount), ...])``; the salary is
+    not saved. Structure earnings given as a percentage are taken of basic,
+    deductions of total earnings, as ``EmployeeSalaryStructure.calculate_totals`` does.
+    """
+    structure = getattr(employee, 'salary_structure', None)
+    fraction = _employed_fraction(employee, inputs)
+    basic_full = structure.basic_salary if structure is not None else (employee.basic_salary or ZERO)
+    basic = _money(basic_full * fraction)
+
+    details = [(system_components['BASIC'], basic)]
+    earnings = basic
+    components = inputs.components.get(employee.pk, [])
+    for component_id, component_type, amount, percentage in components:
+        if component_type != 'EARN':
+            continue
+        value = basic_full * percentage / 100 if percentage else (amount or ZERO)
+        value = _money(value * fraction)
+        details.append((component_id, value))
+        earnings += value
+    gross = earnings
+
+    overtime_hours = inputs.overtime_hours.get(employee.pk, ZERO)
+    overtime_amount = ZERO
+    if overtime_hours and inputs.working_days:
+        hourly_rate = basic_full / (inputs.working_days * (employee.expected_work_hours or 8))
+        multiplier = Decimal(str(getattr(settings, 'PAYROLL_OVERTIME_MULTIPLIER', 2)))
+        overtime_amount = _money(hourly_rate * multiplier * overtime_hours)
+        details.append((system_components['OT'], overtime_amount))
+        earnings += overtime_amount
+
+    bonus = inputs.bonuses.get(employee.pk, ZERO)
+    if bonus:
+        details.append((system_components['BONUS'], _money(bonus)))
+        earnings += _money(bonus)
+
+    deductions = ZERO
+    for component_id, component_type, amount, percentage in components:
+        if component_type != 'DED':
+            continue
+        value = gross * percentage / 100 if percentage else _money((amount or ZERO) * fraction)
+        value = _money(value)
+        details.append((component_id, value))
+        deductions += value
+    for code, amount in (('ADV', inputs.installments.get(employee.pk)), ('DED', inputs.deductions.get(employee.pk))):
+        if amount:
+            details.append((system_components[code], _money(amount)))
+            deductions += _money(amount)
+
+    attendance = inputs.attendance.get(employee.pk)
+    if attendance is None:
+        # No attendance recorded for the month: paid as fully present
+        present, absent, leave = inputs.working_days, 0, 0
+    else:
+        present, absent, leave = attendance['present'], attendance['absent'], attendance['leave']
+
+    salary = EmployeeSalary(
+        salary_month=inputs.salary_month,
+        employee=employee,
+        basic_salary=basic,
+        gross_salary=gross,
+        total_earnings=earnings,
+        total_deductions=deductions,
+        net_salary=earnings - deductions,
+        working_days=inputs.working_days,
+        present_days=present,
+        absent_days=absent,
+        leave_days=leave,
+        overtime_hours=overtime_hours,
+        overtime_amount=overtime_amount,
+        is_separation_salary=_separation_date_in_month(employee, inputs) is not None,
+    )
+    return salary, [(component_id, amount) for component_id, amount in details if amount]
+
+
+def get_system_components():
+    """Ids of the engine's own salary components, created on first use."""
+    existing = dict(SalaryComponent.objects.filter(code__in=SYSTEM_COMPONENTS).values_list('code', 'pk'))
+    for code, (name, component_type) in SYSTEM_COMPONENTS.items():
+        if code not in existing:
+            component, _ = SalaryComponent.objects.get_or_create(
+                code=code, defaults={'name': name, 'component_type': component_type, 'is_fixed': False},
+            )
+            existing[code] = component.pk
+    return existing
+
+
+def _write_batch(salary_month, employees, inputs, system_components):
+    """Compute and insert one batch; employees paid meanwhile by another run are skipped."""
+    with transaction.atomic():
+        SalaryMonth.objects.select_for_update().filter(pk=salary_month.pk).first()
+        employee_ids = [employee.pk for employee in employees]
+        paid = set(EmployeeSalary.objects.filter(salary_month=salary_month, employee_id__in=employee_ids)
+                   .values_list('employee_id', flat=True))
+
+        payslips = [compute_salary(employee, inputs, system_components)
+                    for employee in employees if employee.pk not in paid]
+        if not payslips:
+            return 0
+        EmployeeSalary.objects.bulk_create([salary for salary, _ in payslips])
+
+        # Not every backend returns primary keys from bulk_create
+        salary_ids = dict(EmployeeSalary.objects
+                          .filter(salary_month=salary_month, employee_id__in=[s.employee_id for s, _ in payslips])
+                          .values_list('employee_id', 'pk'))
+        SalaryDetail.objects.bulk_create([
+            SalaryDetail(salary_id=salary_ids[salary.employee_id], component_id=component_id, amount=amount)
+            for salary, details in payslips
+            for component_id, amount in details
+        ], batch_size=1000)
+    return len(payslips)
+
+
+def generate_salary_month(salary_month, employee_ids=None, batch_size=500, regenerate=False, generated_by=None):
+    """
+    Generate the payslips of ``salary_month``.
+
+    ``employee_ids`` limits the run to some employees; ``regenerate`` deletes
+    their existing payslips first instead of skipping them. The month is
+    flagged ``is_generated`` once every payable employee has a payslip.
+    Returns ``{'created', 'skipped', 'employees'}``.
+    """
+    employees = list(payable_employees(salary_month, employee_ids))
+    all_ids = [employee.pk for employee in employees]
+
+    if regenerate and all_ids:
+        EmployeeSalary.objects.filter(salary_month=salary_month, employee_id__in=all_ids).delete()
+    paid = set(EmployeeSalary.objects.filter(salary_month=salary_month, employee_id__in=all_ids)
+               .values_list('employee_id', flat=True))
+    pending = [employee for employee in employees if employee.pk not in paid]
+
+    created = 0
+    if pending:
+        system_components = get_system_components()
+        inputs = load_payroll_inputs(salary_month, [employee.pk for employee in pending])
+        for offset in range(0, len(pending), batch_size):
+            created += _write_batch(salary_month, pending[offset:offset + batch_size], inputs, system_components)
+
+    if not salary_month.is_generated:
+        remaining = payable_employees(salary_month).exclude(salaries__salary_month=salary_month).exists()
+        if not remaining:
+            salary_month.is_generated = True
+            salary_month.generated_date = timezone.now()
+            salary_month.generated_by = generated_by
+            salary_month.save(update_fields=['is_generated', 'generated_date', 'generated_by', 'updated_at'])
+
+    return {'created': created, 'skipped': len(employees) - len(pending), 'employees': len(employees)}
@@ -0,0 +1,175 @@
+"""
+Bulk roster resolution for attendance processing.
+
+``RosterResolver`` loads the RosterDay and RosterAssignment rows of a set of
+employees over a date range in two queries and indexes them by employee and
+date. ``shift_for`` then answers "which shift applies to this employee on
+this day" with dictionary lookups, in the order
+``UnifiedAttendanceProcessor._get_shift_for_date`` applies: the employee's
+RosterDay, then the roster assignment covering the day, then the employee's
+default shift.
+
+``roster_data``/``as_index`` return the ``{'days': {...}, 'assignments': {...}}``
+shape the processor and the attendance reports consume. A date with a
+RosterDay is left out of ``assignments`` so the day always wins.
+
+``generate_roster_days`` brings a roster's RosterDay rows in line with its
+assignments and period with batched inserts/updates, touching only the
+dates that actually differ.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RosterAssignment, RosterDay
+
+ResolvedShift = namedtuple('ResolvedShift', 'shift source roster_day assignment')
+
+
+class RosterResolver:
+    """Roster days and assignments of ``employees`` between ``start_date`` and ``end_date``."""
+
+    def __init__(self, employees, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self._index = {}
+        self._load(employees)
+
+    def _employee_data(self, employee_id):
+        if employee_id not in self._index:
+            self._index[employee_id] = {'days': {}, 'assignments': {}}
+        return self._index[employee_id]
+
+    def _load(self, employees):
+        roster_days = RosterDay.objects.filter(
+            roster_assignment__employee__in=employees,
+            date__range=[self.start_date, self.end_date]
+        ).select_related('shift', 'roster_assignment__roster')
+        for roster_day in roster_days:
+            self._employee_data(roster_day.roster_assignment.employee_id)['days'][roster_day.date] = roster_day
+
+        # Default ordering (roster name) is kept: on overlapping rosters the last one wins, as before
+        roster_assignments = RosterAssignment.objects.filter(
+            employee__in=employees,
+            roster__start_date__lte=self.end_date,
+            roster__end_date__gte=self.start_date
+        ).select_related('roster', 'shift')
+        for assignment in roster_assignments:
+            roster_data = self._employee_data(assignment.employee_id)
+            current_date = max(assignment.roster.start_date, self.start_date)
+            end_assignment_date = min(assignment.roster.end_date, self.end_date)
+            while current_date <= end_assignment_date:
+                if current_date not in roster_data['days']:
+                    roster_data['assignments'][current_date] = assignment
+                current_date += timedelta(days=1)
+
+    def roster_data(self, employee):
+        """The ``{'days', 'assignments'}`` dict of one employee (empty when unrostered)."""
+        employee_id = getattr(employee, 'pk', employee)
+        return self._index.get(employee_id) or {'days': {}, 'assignments': {}}
+
+    def as_index(self, employees=None):
+        """``{employee pk: roster_data}``, with an empty entry for every employee given."""
+        index = dict(self._index)
+        for employee in employees or ():
+            index.setdefault(employee.pk, {'days': {}, 'assignments': {}})
+        return index
+
+    def shift_for(self, employee, date):
+        """
+        The ``ResolvedShift`` for ``employee`` on ``date``; ``shift`` is None when the
+        employee has neither a roster nor a default shift. ``source`` is ``'RosterDay'``,
+        ``'RosterAssignment'``, ``'Default'`` or ``'None'``.
+        """
+        roster_data = self._index.get(employee.pk)
+        if roster_data:
+            roster_day = roster_data['days'].get(date)
+            if roster_day and roster_day.shift:
+                return ResolvedShift(roster_day.shift, 'RosterDay', roster_day, roster_day.roster_assignment)
+            assignment = roster_data['assignments'].get(date)
+            if assignment and (assignment.shift or employee.default_shift):
+                return ResolvedShift(assignment.shift or employee.default_shift, 'RosterAssignment', None, assignment)
+        if employee.default_shift:
+            return ResolvedShift(employee.default_shift, 'Default', None, None)
+        return ResolvedShift(None, 'None', None, None)
+
+
+def _date_range(start_date, end_date):
+    current_date = start_date
+    while current_date <= end_date:
+        yield current_date
+        current_date += timedelta(days=1)
+
+
+def generate_roster_days(roster, batch_size=1000):
+    """
+    Make every assignment of ``roster`` have one RosterDay per date of the roster
+    period, on the assignment's shift.
+
+    Existing days are diffed instead of deleted and recreated: missing dates are
+    inserted with ``bulk_create``, days on another shift are switched with
+    ``bulk_update`` and days outside the period are removed. The result is the
+    same as regenerating from scratch, but an unchanged roster costs two queries
+    (the assignments and the existing days) and opens no transaction.
+    Bulk writes skip the RosterDay signals, so the affected attendance facts are
+    marked dirty here. Returns ``{'created', 'updated', 'deleted', 'unchanged'}``.
+    """
+    from .signals.attendance_fact_signals import mark_attendance_dirty
+
+    assignments = {
+        assignment_id: (employee_id, shift_id)
+        for assignment_id, employee_id, shift_id in roster.roster_assignments.order_by().values_list(
+            'id', 'employee_id', 'shift_id')
+    }
+    dates = list(_date_range(roster.start_date, roster.end_date))
+
+    existing = {}
+    stale_ids = []
+    rows = (RosterDay.objects.filter(roster_assignment__roster=roster).order_by()
+            .values_list('id', 'roster_assignment_id', 'date', 'shift_id'))
+    for day_id, assignment_id, day, shift_id in rows.iterator(chunk_size=batch_size):
+        if roster.start_date <= day <= roster.end_date:
+            existing[assignment_id, day] = (day_id, shift_id)
+        else:
+            stale_ids.append(day_id)
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    changed = {}
+    for assignment_id, (employee_id, shift_id) in assignments.items():
+        for day in dates:
+            current = existing.get((assignment_id, day))
+            if current is None:
+                to_create.append(RosterDay(roster_assignment_id=assignment_id, date=day, shift_id=shift_id))
+            elif current[1] != shift_id:
+                to_update.append(RosterDay(id=current[0], shift_id=shift_id, updated_at=now))
+            else:
+                continue
+            low, high = changed.get(employee_id, (day, day))
+            changed[employee_id] = (min(low, day), max(high, day))
+
+    result = {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'deleted': 0,
+        'unchanged': len(assignments) * len(dates) - len(to_create) - len(to_update),
+    }
+    if not (to_create or to_update or stale_ids):
+        return result
+
+    with transaction.atomic():
+        deleted = 0
+        for offset in range(0, len(stale_ids), batch_size):
+            # Regular delete: the RosterDay signals mark those days dirty themselves
+            deleted += RosterDay.objects.filter(id__in=stale_ids[offset:offset + batch_size]).delete()[0]
+        RosterDay.objects.bulk_create(to_create, batch_size=batch_size)
+        RosterDay.objects.bulk_update(to_update, ['shift', 'updated_at'], batch_size=batch_size)
+        if changed:
+            mark_attendance_dirty(employee_ids=list(changed),
+                                  start_date=min(low for low, _ in changed.values()),
+                                  end_date=max(high for _, high in changed.values()))
+
+    result['deleted'] = deleted
+    return result
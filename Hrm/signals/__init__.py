@@ -1 +1,2 @@
-from .leave_signals import *
\ No newline at end of file
+from .leave_signals import *
+from .attendance_fact_signals import *
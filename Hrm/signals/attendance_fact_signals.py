@@ -0,0 +1,112 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from ..models import (
+    DailyAttendanceFact, Employee, Holiday, LeaveApplication, Roster,
+    RosterAssignment, RosterDay, Shift, ZKAttendanceLog
+)
+from ..working_calendar import invalidate_calendar
+
+
+def mark_attendance_dirty(employee_ids=None, user_ids=None, start_date=None, end_date=None):
+    """
+    Flag DailyAttendanceFact rows for recompute with a single UPDATE.
+
+    ``employee_ids`` are Employee pks, ``user_ids`` are device user ids
+    (Employee.employee_id). Leaving both empty marks every employee.
+    """
+    facts = DailyAttendanceFact.objects.filter(is_dirty=False)
+    if employee_ids is not None:
+        facts = facts.filter(employee_id__in=employee_ids)
+    if user_ids is not None:
+        facts = facts.filter(employee__employee_id__in=user_ids)
+    if start_date:
+        facts = facts.filter(date__gte=start_date)
+    if end_date:
+        facts = facts.filter(date__lte=end_date)
+    return facts.update(is_dirty=True)
+
+
+def _local_date(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+@receiver(post_save, sender=ZKAttendanceLog)
+@receiver(post_delete, sender=ZKAttendanceLog)
+def invalidate_facts_on_punch_change(sender, instance, **kwargs):
+    """A new, edited or deleted punch only affects its own employee-day."""
+    punch_date = _local_date(instance.timestamp)
+    mark_attendance_dirty(user_ids=[instance.user_id], start_date=punch_date, end_date=punch_date)
+
+
+@receiver(post_save, sender=LeaveApplication)
+@receiver(post_delete, sender=LeaveApplication)
+def invalidate_facts_on_leave_change(sender, instance, **kwargs):
+    mark_attendance_dirty(employee_ids=[instance.employee_id],
+                          start_date=instance.start_date, end_date=instance.end_date)
+
+
+@receiver(pre_save, sender=Holiday)
+def invalidate_facts_on_holiday_move(sender, instance, **kwargs):
+    """When a holiday is moved, the day it used to cover must be recomputed too."""
+    if instance.pk:
+        old_date = Holiday.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+        if old_date and old_date != instance.date:
+            mark_attendance_dirty(start_date=old_date, end_date=old_date)
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_facts_on_holiday_change(sender, instance, **kwargs):
+    invalidate_calendar()
+    mark_attendance_dirty(start_date=instance.date, end_date=instance.date)
+
+
+@receiver(post_save, sender=RosterDay)
+@receiver(post_delete, sender=RosterDay)
+def invalidate_facts_on_roster_day_change(sender, instance, **kwargs):
+    employee_id = RosterAssignment.objects.filter(
+        pk=instance.roster_assignment_id
+    ).values_list('employee_id', flat=True).first()
+    if employee_id:
+        mark_attendance_dirty(employee_ids=[employee_id], start_date=instance.date, end_date=instance.date)
+
+
+@receiver(post_save, sender=RosterAssignment)
+@receiver(post_delete, sender=RosterAssignment)
+def invalidate_facts_on_roster_assignment_change(sender, instance, **kwargs):
+    roster = Roster.objects.filter(pk=instance.roster_id).values('start_date', 'end_date').first()
+    if roster:
+        mark_attendance_dirty(employee_ids=[instance.employee_id],
+                              start_date=roster['start_date'], end_date=roster['end_date'])
+    else:
+        mark_attendance_dirty(employee_ids=[instance.employee_id])
+
+
+@receiver(pre_save, sender=Roster)
+def invalidate_facts_on_roster_change(sender, instance, **kwargs):
+    """Cover both the old and the new roster period of every assigned employee."""
+    if not instance.pk:
+        return
+    old = Roster.objects.filter(pk=instance.pk).values('start_date', 'end_date').first()
+    if not old:
+        return
+    employee_ids = list(instance.roster_assignments.values_list('employee_id', flat=True))
+    if employee_ids:
+        mark_attendance_dirty(employee_ids=employee_ids,
+                              start_date=min(old['start_date'], instance.start_date),
+                              end_date=max(old['end_date'], instance.end_date))
+
+
+@receiver(post_save, sender=Shift)
+@receiver(post_delete, sender=Shift)
+def invalidate_facts_on_shift_change(sender, instance, **kwargs):
+    """Dynamic shift detection scores every shift, so any shift edit affects all rows."""
+    mark_attendance_dirty()
+
+
+@receiver(post_save, sender=Employee)
+def invalidate_facts_on_employee_change(sender, instance, created, **kwargs):
+    """Default shift, expected hours and grace minutes feed the per-day rules."""
+    if not created:
+        mark_attendance_dirty(employee_ids=[instance.pk])
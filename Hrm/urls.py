@@ -54,7 +54,7 @@ from .views.zktico.late_coming_report import LateComingReportView
 from .views.zktico.daily_attendance_report import DailyAttendanceReportView
 from .views.zktico.early_leaving_report import EarlyLeavingReportView
 from .views.zktico.overtime_import_view import OvertimeImportView, OvertimeImportSaveView
-from .views.zktico.attendance_import_view import AttendanceImportView, AttendanceImportSaveView
+from .views.zktico.attendance_import_view import AttendanceImportView, AttendanceImportSaveView, ImportSessionProgressView
 
 from .views.zktico.payslip_report import PayslipReportView
 from .views.zktico.payroll_summary_report import PayrollSummaryReportView
@@ -410,7 +410,8 @@ urlpatterns = [
     
     # Attendance Import
     path('attendance/import/', AttendanceImportView.as_view(), name='zk-attendance-import'),
-    path('attendance/import/save/', AttendanceImportSaveView.as_view(), name='attendance-import-save'),   
+    path('attendance/import/save/', AttendanceImportSaveView.as_view(), name='attendance-import-save'),
+    path('import-session/<uuid:pk>/progress/', ImportSessionProgressView.as_view(), name='import-session-progress'),   
 
         # Overtime Import (new)
     path('overtime/import/', OvertimeImportView.as_view(), name='zk-overtime-import'),
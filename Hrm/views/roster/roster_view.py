@@ -6,6 +6,7 @@ from django.db import transaction
 from datetime import timedelta
 
 from Hrm.models import Roster, RosterAssignment, RosterDay
+from Hrm.rosters import generate_roster_days
 from Hrm.forms import RosterForm, RosterAssignmentFormSet, RosterFilterForm
 from config.views import GenericFilterView, GenericDeleteView, BaseExportView, BaseBulkDeleteConfirmView
 
@@ -102,17 +103,9 @@ class RosterCreateView(CreateView):
         else:
             return self.form_invalid(form)
     
-    def generate_roster_days(self, roster, assignments):
-        """Auto-generate RosterDay entries for all assignments"""
-        current_date = roster.start_date
-        while current_date <= roster.end_date:
-            for assignment in assignments:
-                RosterDay.objects.create(
-                    roster_assignment=assignment,
-                    date=current_date,
-                    shift=assignment.shift
-                )
-            current_date += timedelta(days=1)
+    def generate_roster_days(self, roster, assignments=None):
+        """Auto-generate RosterDay entries for all assignments of the roster (batched, see Hrm.rosters)"""
+        return generate_roster_days(roster)
     
     def get_success_url(self):
         return reverse_lazy('hrm:roster_detail', kwargs={'pk': self.object.pk})
@@ -144,32 +137,21 @@ class RosterUpdateView(UpdateView):
                 # Save the main form
                 self.object = form.save()
                 
-                # Delete existing RosterDay entries
-                RosterDay.objects.filter(roster_assignment__roster=self.object).delete()
-                
                 # Save the formset
                 formset.instance = self.object
-                assignments = formset.save()
+                formset.save()
                 
-                # Regenerate RosterDay entries
-                self.generate_roster_days(self.object, assignments)
+                # Sync RosterDay entries with the assignments and period: only changed dates are written
+                self.generate_roster_days(self.object)
             
             messages.success(self.request, f'Roster "{self.object.name}" updated successfully.')
             return HttpResponseRedirect(self.get_success_url())
         else:
             return self.form_invalid(form)
     
-    def generate_roster_days(self, roster, assignments):
-        """Auto-generate RosterDay entries for all assignments"""
-        current_date = roster.start_date
-        while current_date <= roster.end_date:
-            for assignment in assignments:
-                RosterDay.objects.create(
-                    roster_assignment=assignment,
-                    date=current_date,
-                    shift=assignment.shift
-                )
-            current_date += timedelta(days=1)
+    def generate_roster_days(self, roster, assignments=None):
+        """Auto-generate RosterDay entries for all assignments of the roster (batched, see Hrm.rosters)"""
+        return generate_roster_days(roster)
     
     def get_success_url(self):
         return reverse_lazy('hrm:roster_detail', kwargs={'pk': self.object.pk})
@@ -13,6 +13,7 @@ from django.db import transaction
 import json
 
 from Hrm.models import *
+from Hrm.rosters import RosterResolver
 
 logger = logging.getLogger(__name__)
 
@@ -532,51 +533,11 @@ class AttendanceDetailsReportView(LoginRequiredMixin, View):
     
     def _get_roster_data(self, employees, start_date, end_date):
         """Get roster assignments and roster days for employees."""
-        roster_data = {}
-        
         try:
-            # Get roster assignments
-            roster_assignments = RosterAssignment.objects.filter(
-                employee__in=employees,
-                roster__start_date__lte=end_date,
-                roster__end_date__gte=start_date
-            ).select_related('roster', 'shift', 'employee')
-            
-            # Get roster days
-            roster_days = RosterDay.objects.filter(
-                roster_assignment__employee__in=employees,
-                date__gte=start_date,
-                date__lte=end_date
-            ).select_related('shift', 'roster_assignment__roster', 'roster_assignment__shift')
-            
+            return RosterResolver(employees, start_date, end_date).as_index(employees)
         except Exception as e:
             logger.warning(f"Could not fetch roster data: {str(e)}")
-            roster_assignments = []
-            roster_days = []
-        
-        # Organize data by employee
-        for employee in employees:
-            roster_data[employee.id] = {
-                'assignments': {},
-                'days': {}
-            }
-        
-        # Organize roster assignments by date range
-        for assignment in roster_assignments:
-            employee_id = assignment.employee.id
-            current_date = max(assignment.roster.start_date, start_date)
-            end_assignment_date = min(assignment.roster.end_date, end_date)
-            
-            while current_date <= end_assignment_date:
-                roster_data[employee_id]['assignments'][current_date] = assignment
-                current_date += timedelta(days=1)
-        
-        # Organize roster days
-        for roster_day in roster_days:
-            employee_id = roster_day.roster_assignment.employee.id
-            roster_data[employee_id]['days'][roster_day.date] = roster_day
-        
-        return roster_data
+            return {}
     
     def _process_daily_attendance(self, employee, date, employee_logs, roster_data, form_data):
         """Process attendance for a single day with employee-specific settings."""
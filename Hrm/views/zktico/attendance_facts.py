@@ -0,0 +1,146 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta, datetime, time
+from decimal import Decimal
+
+from Hrm.models import DailyAttendanceFact
+
+logger = logging.getLogger(__name__)
+
+FACT_DATETIME_KEYS = ('in_time', 'out_time', 'expected_start', 'expected_end')
+FACT_TIME_KEYS = ('shift_start_time', 'shift_end_time')
+SHIFT_ANALYSIS_KEYS = (
+    'roster_day_usage', 'roster_assignment_usage', 'default_shift_usage',
+    'dynamic_detection_usage', 'no_shift_days', 'multiple_shift_matches', 'fallback_usage',
+)
+
+
+class AttendanceFactBuilder:
+    """
+    Read-through store of DailyAttendanceFact rows for one processor configuration.
+
+    Clean rows computed with the same rule configuration are returned as-is;
+    missing, dirty or differently-configured (employee, date) pairs are replayed
+    through the processor and upserted, so each report only pays for the days
+    that actually changed since the last run.
+    """
+    batch_size = 500
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.config_key = processor.get_config_key()
+        self.stats = {'fact_hits': 0, 'recomputed': 0}
+
+    def get_daily_records(self, employees, start_date, end_date, holidays, roster_data, leave_index=None):
+        """
+        Return ``{employee_pk: {date: record}}`` for every employee and date in the range,
+        ready to be passed to ``process_employee_attendance(precomputed_days=...)``.
+        """
+        employees = list(employees)
+        records = defaultdict(dict)
+
+        facts = DailyAttendanceFact.objects.filter(
+            employee__in=employees,
+            date__range=[start_date, end_date],
+            config_key=self.config_key,
+            is_dirty=False
+        ).select_related('shift')
+        for fact in facts:
+            records[fact.employee_id][fact.date] = self._fact_to_record(fact)
+            self.stats['fact_hits'] += 1
+
+        all_dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        missing = {}
+        for employee in employees:
+            missing_dates = [d for d in all_dates if d not in records[employee.id]]
+            if missing_dates:
+                missing[employee] = missing_dates
+
+        if missing:
+            self._recompute(missing, start_date, end_date, holidays, roster_data, leave_index, records)
+
+        return records
+
+    def _recompute(self, missing, start_date, end_date, holidays, roster_data, leave_index, records):
+        """Replay the per-day pipeline for missing pairs and upsert the resulting facts."""
+        processor = self.processor
+        employees = list(missing.keys())
+        punch_index = processor.load_punch_index(employees, start_date, end_date)
+        if leave_index is None:
+            leave_index = processor.load_leave_index(employees, start_date, end_date)
+
+        facts = []
+        for employee, dates in missing.items():
+            zk_logs = punch_index.get(employee.employee_id, {})
+            leave_dates = processor._organize_leave_dates(
+                leave_index.get(employee.id, []), start_date, end_date
+            )
+            employee_roster_data = roster_data.get(employee.id, {})
+
+            for current_date in dates:
+                shift_analysis = dict.fromkeys(SHIFT_ANALYSIS_KEYS, 0)
+                record = processor._process_single_day_attendance(
+                    current_date, employee, zk_logs, holidays, leave_dates,
+                    employee_roster_data, shift_analysis
+                )
+                analysis = {key: count for key, count in shift_analysis.items() if count}
+                facts.append(self._record_to_fact(employee, record, analysis))
+
+                record['_shift_analysis'] = analysis
+                records[employee.id][current_date] = record
+
+        DailyAttendanceFact.objects.bulk_create(
+            facts,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=['employee', 'date'],
+            update_fields=[
+                'first_in', 'last_out', 'total_punches', 'working_hours', 'late_minutes',
+                'early_out_minutes', 'overtime_hours', 'status', 'shift', 'shift_source',
+                'config_key', 'details', 'is_dirty', 'computed_at',
+            ],
+        )
+        self.stats['recomputed'] += len(facts)
+        logger.info(f"Recomputed {len(facts)} attendance facts ({self.stats['fact_hits']} reused)")
+
+    def _record_to_fact(self, employee, record, analysis):
+        details = {}
+        for key, value in record.items():
+            if key in ('shift', 'date'):
+                continue
+            if isinstance(value, (datetime, time)):
+                value = value.isoformat()
+            details[key] = value
+        details['shift_analysis'] = analysis
+
+        return DailyAttendanceFact(
+            employee=employee,
+            date=record['date'],
+            first_in=record['in_time'],
+            last_out=record['out_time'],
+            total_punches=record.get('total_logs', 0),
+            working_hours=Decimal(str(record['working_hours'])),
+            late_minutes=record['late_minutes'],
+            early_out_minutes=record['early_out_minutes'],
+            overtime_hours=Decimal(str(record['overtime_hours'])),
+            status=record['status'],
+            shift=record['shift'],
+            shift_source=record['shift_source'],
+            config_key=self.config_key,
+            details=details,
+            is_dirty=False,
+        )
+
+    def _fact_to_record(self, fact):
+        record = dict(fact.details)
+        analysis = record.pop('shift_analysis', {})
+        for key in FACT_DATETIME_KEYS:
+            if record.get(key):
+                record[key] = datetime.fromisoformat(record[key])
+        for key in FACT_TIME_KEYS:
+            if record.get(key):
+                record[key] = time.fromisoformat(record[key])
+        record['date'] = fact.date
+        record['shift'] = fact.shift
+        record['_shift_analysis'] = analysis
+        return record
@@ -7,6 +7,7 @@ from django.shortcuts import render, redirect
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.views import View
+from django.core.exceptions import ValidationError
 from django.db.models import Q
 from django.http import JsonResponse, HttpResponse
 import json
@@ -14,10 +15,12 @@ from decimal import Decimal, ROUND_HALF_UP
 from django.db import transaction
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from Hrm.models import *
+from Hrm.import_sessions import commit_import_records, create_import_session, select_records
+from Hrm.rosters import RosterResolver
 from .unified_attendance_processor import UnifiedAttendanceProcessor
+from .parallel_attendance import iter_attendance_results
 
 logger = logging.getLogger(__name__)
 
@@ -411,8 +414,15 @@ class AttendanceImportView(LoginRequiredMixin, View):
             try:
                 report_data = self.generate_attendance_data_for_import(form.cleaned_data)
                 
+                # Keep the preview server-side; the save view only receives the session id
+                import_session = create_import_session(
+                    'ATT', report_data['attendance_records'],
+                    form.cleaned_data['start_date'], form.cleaned_data['end_date'], request.user
+                )
+                
                 context_data.update({
                     'data_generated': True,
+                    'import_session_id': str(import_session.pk),
                     'attendance_records': report_data['attendance_records'],
                     'summary_stats': report_data['summary_stats'],
                     'form_data': form.cleaned_data,
@@ -468,37 +478,7 @@ class AttendanceImportView(LoginRequiredMixin, View):
     
     def get_roster_data_for_employee(self, employee, start_date, end_date):
         """Get roster data for an employee within date range."""
-        roster_data = {
-            'days': {},
-            'assignments': {}
-        }
-        
-        # Get roster days
-        roster_days = RosterDay.objects.filter(
-            roster_assignment__employee=employee,
-            date__range=[start_date, end_date]
-        ).select_related('shift', 'roster_assignment__roster')
-        
-        for roster_day in roster_days:
-            roster_data['days'][roster_day.date] = roster_day
-        
-        # Get roster assignments
-        roster_assignments = RosterAssignment.objects.filter(
-            employee=employee,
-            roster__start_date__lte=end_date,
-            roster__end_date__gte=start_date
-        ).select_related('roster', 'shift')
-        
-        for assignment in roster_assignments:
-            current_date = max(assignment.roster.start_date, start_date)
-            end_assignment_date = min(assignment.roster.end_date, end_date)
-            
-            while current_date <= end_assignment_date:
-                if current_date not in roster_data['days']:
-                    roster_data['assignments'][current_date] = assignment
-                current_date += timedelta(days=1)
-        
-        return roster_data
+        return RosterResolver([employee], start_date, end_date).roster_data(employee)
     
     def process_employee_attendance(self, employee, start_date, end_date, form_data):
         """Process attendance for a single employee using UnifiedAttendanceProcessor."""
@@ -564,29 +544,21 @@ class AttendanceImportView(LoginRequiredMixin, View):
             'new_records': 0,
         }
         
-        # Process employees in parallel for better performance
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_employee = {
-                executor.submit(self.process_employee_attendance, employee, start_date, end_date, form_data): employee 
-                for employee in employees
-            }
-            
-            for future in as_completed(future_to_employee):
-                employee = future_to_employee[future]
-                try:
-                    daily_records = future.result()
-                    
-                    # Convert daily records to attendance records
-                    for daily_record in daily_records:
-                        attendance_record = self.convert_daily_record_to_attendance(
-                            employee, daily_record, summary_stats
-                        )
-                        if attendance_record:
-                            attendance_records.append(attendance_record)
-                            
-                except Exception as e:
-                    logger.error(f"Error processing employee {employee.employee_id}: {str(e)}")
-                    continue
+        existing_dates = set(Attendance.objects.filter(
+            employee__in=employees,
+            date__range=[start_date, end_date]
+        ).values_list('employee_id', 'date'))
+        
+        # Process employees in worker processes from data prefetched in bulk
+        processor = UnifiedAttendanceProcessor(form_data)
+        for employee, result in iter_attendance_results(processor, employees, start_date, end_date):
+            # Convert daily records to attendance records
+            for daily_record in result['daily_records']:
+                attendance_record = self.convert_daily_record_to_attendance(
+                    employee, daily_record, summary_stats, existing_dates
+                )
+                if attendance_record:
+                    attendance_records.append(attendance_record)
         
         summary_stats['total_records'] = len(attendance_records)
         summary_stats['new_records'] = summary_stats['total_records'] - summary_stats['existing_records']
@@ -596,17 +568,17 @@ class AttendanceImportView(LoginRequiredMixin, View):
             'summary_stats': summary_stats,
         }
     
-    def convert_daily_record_to_attendance(self, employee, daily_record, summary_stats):
+    def convert_daily_record_to_attendance(self, employee, daily_record, summary_stats, existing_dates=None):
         """Convert daily record to attendance record format."""
         date = daily_record['date']
         
         # Check if record already exists
-        existing_record = Attendance.objects.filter(
-            employee=employee,
-            date=date
-        ).first()
+        if existing_dates is not None:
+            record_exists = (employee.id, date) in existing_dates
+        else:
+            record_exists = Attendance.objects.filter(employee=employee, date=date).exists()
         
-        if existing_record:
+        if record_exists:
             summary_stats['existing_records'] += 1
             is_duplicate = True
         else:
@@ -629,6 +601,7 @@ class AttendanceImportView(LoginRequiredMixin, View):
         
         # Create attendance record data
         attendance_record = {
+            'employee_pk': employee.pk,
             'employee_id': employee.employee_id,
             'employee_name': employee.get_full_name(),
             'date': date.strftime('%Y-%m-%d'),
@@ -648,15 +621,65 @@ class AttendanceImportView(LoginRequiredMixin, View):
         return attendance_record
 
 
+def get_import_session(request, session_id, kind):
+    """The caller's ImportSession of ``kind``, or None."""
+    try:
+        sessions = ImportSession.objects.filter(pk=session_id, kind=kind)
+    except ValidationError:
+        return None  # not a UUID
+    if request.user.is_authenticated:
+        sessions = sessions.filter(Q(created_by=request.user) | Q(created_by__isnull=True))
+    else:
+        sessions = sessions.filter(created_by__isnull=True)
+    return sessions.first()
+
+
+class ImportSessionProgressView(LoginRequiredMixin, View):
+    """Progress of a running attendance/overtime import, polled by the import pages."""
+    
+    def get(self, request, pk, *args, **kwargs):
+        session = ImportSession.objects.filter(pk=pk).first()
+        if session is None or (session.created_by_id and session.created_by_id != request.user.pk):
+            return JsonResponse({'success': False, 'error': _('Import session not found')}, status=404)
+        return JsonResponse({
+            'success': True,
+            'status': session.status,
+            'total': session.total,
+            'processed': session.processed,
+            'progress': session.progress,
+            'created_count': session.created_count,
+            'updated_count': session.updated_count,
+            'error_count': session.error_count,
+        })
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class AttendanceImportSaveView(View):
     """Fast save view for attendance import data."""
     
     def post(self, request, *args, **kwargs):
-        """Handle POST request to save selected attendance data."""
+        """
+        Save the selected attendance rows.
+
+        The body names the import session and the selection (``import_type`` of
+        ``all``/``new``/``selected`` plus ``record_indexes``); rows are written in
+        chunks with bulk inserts/updates. Bodies carrying ``attendance_data``
+        rows directly are still accepted.
+        """
         try:
             data = json.loads(request.body)
-            attendance_data = data.get('attendance_data', [])
+            session = None
+            
+            if data.get('session_id'):
+                session = get_import_session(request, data['session_id'], 'ATT')
+                if session is None:
+                    return JsonResponse({
+                        'success': False,
+                        'error': _('Import session not found or expired, please generate the data again')
+                    }, status=404)
+                attendance_data = select_records(session, data.get('import_type', 'all'), data.get('record_indexes'))
+            else:
+                attendance_data = data.get('attendance_data', [])
             
             if not attendance_data:
                 return JsonResponse({
@@ -664,104 +687,18 @@ class AttendanceImportSaveView(View):
                     'error': _('No attendance data provided')
                 }, status=400)
             
-            saved_count = 0
-            updated_count = 0
-            skipped_count = 0
-            errors = []
-            saved_records = []
-            
-            with transaction.atomic():
-                for record in attendance_data:
-                    try:
-                        # Validate required fields
-                        required_fields = ['employee_id', 'date', 'status']
-                        if not all(field in record for field in required_fields):
-                            errors.append(f"Missing required fields in record: {record}")
-                            continue
-                        
-                        # Get employee
-                        try:
-                            employee = Employee.objects.get(employee_id=record['employee_id'])
-                        except Employee.DoesNotExist:
-                            errors.append(f"Employee with ID {record['employee_id']} not found")
-                            continue
-                        
-                        # Parse date
-                        try:
-                            date = datetime.strptime(record['date'], '%Y-%m-%d').date()
-                        except ValueError:
-                            errors.append(f"Invalid date format for employee {record['employee_id']}: {record['date']}")
-                            continue
-                        
-                        # Parse timestamps
-                        check_in = None
-                        check_out = None
-                        
-                        if record.get('check_in'):
-                            try:
-                                check_in = datetime.strptime(record['check_in'], '%Y-%m-%d %H:%M:%S')
-                            except ValueError:
-                                pass
-                        
-                        if record.get('check_out'):
-                            try:
-                                check_out = datetime.strptime(record['check_out'], '%Y-%m-%d %H:%M:%S')
-                            except ValueError:
-                                pass
-                        
-                        # Check for existing record
-                        existing_record = Attendance.objects.filter(
-                            employee=employee,
-                            date=date
-                        ).first()
-                        
-                        attendance_data_dict = {
-                            'status': record['status'],
-                            'check_in': check_in,
-                            'check_out': check_out,
-                            'late_minutes': record.get('late_minutes', 0),
-                            'early_out_minutes': record.get('early_out_minutes', 0),
-                            'overtime_minutes': record.get('overtime_minutes', 0),
-                            'remarks': record.get('remarks'),
-                            'is_manual': True,
-                        }
-                        
-                        if existing_record:
-                            # Update existing record
-                            for field, value in attendance_data_dict.items():
-                                setattr(existing_record, field, value)
-                            existing_record.save()
-                            updated_count += 1
-                        else:
-                            # Create new record
-                            attendance_data_dict.update({
-                                'employee': employee,
-                                'date': date,
-                            })
-                            Attendance.objects.create(**attendance_data_dict)
-                            saved_count += 1
-                        
-                        saved_records.append({
-                            'employee_id': record['employee_id'],
-                            'employee_name': employee.get_full_name(),
-                            'date': record['date'],
-                            'status': record['status'],
-                        })
-                        
-                    except Exception as e:
-                        error_msg = f"Error saving record for employee {record.get('employee_id', 'unknown')}: {str(e)}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
-                        continue
+            result = commit_import_records('ATT', attendance_data, session=session)
+            saved_count = result['created']
+            updated_count = result['updated']
+            errors = result['errors']
             
             response = {
                 'success': saved_count > 0 or updated_count > 0,
                 'saved_count': saved_count,
                 'updated_count': updated_count,
-                'skipped_count': skipped_count,
+                'skipped_count': 0,
                 'error_count': len(errors),
-                'errors': errors,
-                'saved_records': saved_records,
+                'errors': errors[:200],
                 'message': _("%d records saved, %d updated, %d errors occurred") % (saved_count, updated_count, len(errors))
             }
             
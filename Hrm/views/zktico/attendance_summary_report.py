@@ -10,11 +10,15 @@ from django.views import View
 from django.db.models import Q
 from django.http import JsonResponse, HttpResponse
 import json
-import csv
 from decimal import Decimal, ROUND_HALF_UP
+from itertools import islice
 
 from Hrm.models import *
+from Hrm.rosters import RosterResolver
+from Hrm.working_calendar import WorkingCalendar
+from config.exports import streaming_export_response
 from .unified_attendance_processor import UnifiedAttendanceProcessor
+from .attendance_facts import AttendanceFactBuilder
 
 logger = logging.getLogger(__name__)
 
@@ -455,6 +459,7 @@ class AttendanceSummaryReportForm(forms.Form):
 class AttendanceSummaryReportView(LoginRequiredMixin, View):
     """Enhanced view for generating attendance summary reports with dynamic shift options and 🔥 NEW RULES."""
     template_name = 'report/hrm/attendance_summary_report.html'
+    chunk_size = 200  # Employees loaded and processed per batch
     
     def get(self, request, *args, **kwargs):
         form = AttendanceSummaryReportForm()
@@ -527,9 +532,6 @@ class AttendanceSummaryReportView(LoginRequiredMixin, View):
         holidays = Holiday.objects.filter(date__range=[start_date, end_date])
         holiday_dates = set(holidays.values_list('date', flat=True))
         
-        # Get roster data for the entire period
-        roster_data = self._get_roster_data(employees, start_date, end_date)
-        
         # 🔥 Initialize enhanced processor with all form options including NEW RULES
         processor = UnifiedAttendanceProcessor(form_data)
         
@@ -585,30 +587,8 @@ class AttendanceSummaryReportView(LoginRequiredMixin, View):
         
         all_flagged_records = []
         
-        for employee in employees:
+        for employee, attendance_result in self._iter_attendance_results(form_data, employees, processor, holidays):
             try:
-                # Get ZK attendance logs for the employee in the date range
-                zk_logs = ZKAttendanceLog.objects.filter(
-                    user_id=employee.employee_id,
-                    timestamp__date__range=[start_date, end_date]
-                ).order_by('timestamp')
-                
-                employee_roster_data = roster_data.get(employee.id, {})
-                
-                # Get leave applications for this employee in the date range
-                leave_applications = LeaveApplication.objects.filter(
-                    employee=employee,
-                    status='APP',
-                    start_date__lte=end_date,
-                    end_date__gte=start_date
-                )
-                
-                # 🔥 Process attendance with enhanced processor including NEW RULES
-                attendance_result = processor.process_employee_attendance(
-                    employee, start_date, end_date, zk_logs,
-                    holidays, leave_applications, employee_roster_data
-                )
-                
                 # Calculate summary data for this employee
                 employee_summary = self._calculate_employee_summary(
                     employee, attendance_result, start_date, end_date, holiday_dates, form_data
@@ -644,9 +624,9 @@ class AttendanceSummaryReportView(LoginRequiredMixin, View):
             'start_date': start_date,
             'end_date': end_date,
             'total_days': (end_date - start_date).days + 1,
-            'working_days': self._count_working_days(start_date, end_date, holiday_dates, form_data['weekend_days']),
+            'working_days': self._count_working_days(start_date, end_date, form_data['weekend_days']),
             'weekend_days': self._count_weekend_days(start_date, end_date, form_data['weekend_days']),
-            'holiday_days': len(holiday_dates),
+            'holiday_days': WorkingCalendar(form_data['weekend_days']).count_holidays(start_date, end_date),
         }
         
         return {
@@ -658,6 +638,44 @@ class AttendanceSummaryReportView(LoginRequiredMixin, View):
             'flagged_records': all_flagged_records,
         }
     
+    def _iter_attendance_results(self, form_data, employees, processor, holidays):
+        """
+        Yield ``(employee, attendance_result)`` for every employee, one chunk at a time.
+
+        Rosters, leaves and per-day records are loaded per chunk of ``chunk_size``
+        employees (per-day records come from the materialized fact table, so only
+        dirty or missing days are replayed from raw punches). Memory therefore stays
+        bounded and exports can stream rows while later chunks are still processed.
+        """
+        start_date = form_data['start_date']
+        end_date = form_data['end_date']
+        employees = iter(employees)
+        
+        while True:
+            chunk = list(islice(employees, self.chunk_size))
+            if not chunk:
+                return
+            
+            roster_data = self._get_roster_data(chunk, start_date, end_date)
+            leave_index = processor.load_leave_index(chunk, start_date, end_date)
+            fact_days = AttendanceFactBuilder(processor).get_daily_records(
+                chunk, start_date, end_date, holidays, roster_data, leave_index
+            )
+            
+            for employee in chunk:
+                try:
+                    # 🔥 Process attendance with enhanced processor including NEW RULES
+                    # Every day is precomputed, so no raw punches are needed here
+                    attendance_result = processor.process_employee_attendance(
+                        employee, start_date, end_date, {},
+                        holidays, leave_index.get(employee.id, []), roster_data.get(employee.id, {}),
+                        precomputed_days=fact_days.get(employee.id)
+                    )
+                except Exception as e:
+                    logger.error(f"Error processing employee {employee.employee_id}: {str(e)}")
+                    continue
+                yield employee, attendance_result
+    
     def _calculate_employee_summary(self, employee, attendance_result, start_date, end_date, holiday_dates, form_data):
         """Calculate summary statistics for a single employee."""
         daily_records = attendance_result.get('daily_records', [])
@@ -887,32 +905,13 @@ class AttendanceSummaryReportView(LoginRequiredMixin, View):
                 overall_stats['total_working_hours'] / total_employees
             ).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
     
-    def _count_working_days(self, start_date, end_date, holiday_dates, weekend_days):
-        """Count working days in the date range."""
-        working_days = 0
-        current_date = start_date
-        weekend_day_numbers = [int(d) for d in weekend_days]
-        
-        while current_date <= end_date:
-            if (current_date not in holiday_dates and 
-                current_date.weekday() not in weekend_day_numbers):
-                working_days += 1
-            current_date += timedelta(days=1)
-        
-        return working_days
+    def _count_working_days(self, start_date, end_date, weekend_days):
+        """Count working days in the date range from the precomputed working-day calendar."""
+        return WorkingCalendar(weekend_days).count_working_days(start_date, end_date)
     
     def _count_weekend_days(self, start_date, end_date, weekend_days):
-        """Count weekend days in the date range."""
-        weekend_count = 0
-        current_date = start_date
-        weekend_day_numbers = [int(d) for d in weekend_days]
-        
-        while current_date <= end_date:
-            if current_date.weekday() in weekend_day_numbers:
-                weekend_count += 1
-            current_date += timedelta(days=1)
-        
-        return weekend_count
+        """Count weekend days in the date range from the precomputed working-day calendar."""
+        return WorkingCalendar(weekend_days).count_weekend_days(start_date, end_date)
     
     def _get_filtered_employees(self, form_data):
         """Get employees based on filter criteria (EXACT SAME as daily report)."""
@@ -936,120 +935,96 @@ class AttendanceSummaryReportView(LoginRequiredMixin, View):
     
     def _get_roster_data(self, employees, start_date, end_date):
         """Get roster data for employees (EXACT SAME as daily report)."""
-        roster_data = {}
-        
         try:
-            # Get roster assignments
-            roster_assignments = RosterAssignment.objects.filter(
-                employee__in=employees,
-                roster__start_date__lte=end_date,
-                roster__end_date__gte=start_date
-            ).select_related('roster', 'shift', 'employee')
-            
-            # Get roster days
-            roster_days = RosterDay.objects.filter(
-                roster_assignment__employee__in=employees,
-                date__gte=start_date,
-                date__lte=end_date
-            ).select_related('shift', 'roster_assignment__roster')
-            
+            return RosterResolver(employees, start_date, end_date).as_index(employees)
         except Exception as e:
             logger.warning(f"Could not fetch roster data: {str(e)}")
             return {}
-        
-        # Organize data by employee
-        for employee in employees:
-            roster_data[employee.id] = {
-                'assignments': {},
-                'days': {}
-            }
-        
-        # Organize roster assignments
-        for assignment in roster_assignments:
-            employee_id = assignment.employee.id
-            current_date = max(assignment.roster.start_date, start_date)
-            end_assignment_date = min(assignment.roster.end_date, end_date)
-            
-            while current_date <= end_assignment_date:
-                roster_data[employee_id]['assignments'][current_date] = assignment
-                current_date += timedelta(days=1)
-        
-        # Organize roster days
-        for roster_day in roster_days:
-            employee_id = roster_day.roster_assignment.employee.id
-            roster_data[employee_id]['days'][roster_day.date] = roster_day
-        
-        return roster_data
+    
+    EXPORT_HEADER = [
+        'Employee ID', 'Employee Name', 'Department', 'Designation',
+        'Working Days', 'Present Days', 'Absent Days', 'Late Days',
+        'Half Days', 'Early Out Days', 'Leave Days', 'Holiday Work Days',
+        'Weekend Work Days', 'Working Hours', 'Overtime Hours', 'Overtime Days',
+        'Total Late Minutes', 'Total Early Out Minutes', 'Perfect Attendance Days',
+        'Max Consecutive Absent', 'Attendance %', 'Punctuality %', 
+        'Average Daily Hours', 'Category',
+        # 🔥 NEW RULE COLUMNS
+        'Converted From Min Hours', 'Converted To Half Day', 'Converted From Incomplete Punch',
+        'Excessive Working Hours Days', 'Termination Risk Flag', 'Excessive Early Out Flag',
+        'Dynamic Shift Days'
+    ]
     
     def _handle_export(self, request):
-        """Handle CSV export of attendance summary report with 🔥 NEW RULE fields."""
+        """Stream a CSV/XLSX export of the attendance summary report with 🔥 NEW RULE fields."""
         form = AttendanceSummaryReportForm(request.POST)
         if not form.is_valid():
             messages.error(request, _("Please fix form errors before exporting."))
             return self.post(request)
         
+        form_data = form.cleaned_data
+        filename = f'🔥_enhanced_attendance_summary_report_with_new_rules_{form_data["start_date"].strftime("%Y%m%d")}_{form_data["end_date"].strftime("%Y%m%d")}.csv'
+        return streaming_export_response(
+            filename,
+            self.EXPORT_HEADER,
+            self._iter_export_rows(form_data),
+            file_format=request.POST.get('export_format', 'csv'),
+            sheet_name='Attendance Summary',
+        )
+    
+    def _iter_export_rows(self, form_data):
+        """Yield one export row per employee as soon as that employee is processed."""
+        start_date = form_data['start_date']
+        end_date = form_data['end_date']
+        holidays = Holiday.objects.filter(date__range=[start_date, end_date])
+        holiday_dates = set(holidays.values_list('date', flat=True))
+        processor = UnifiedAttendanceProcessor(form_data)
+        employees = self._get_filtered_employees(form_data).order_by('pk').iterator(chunk_size=self.chunk_size)
+        
         try:
-            report_data = self._generate_attendance_summary_report(form.cleaned_data)
-            
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="🔥_enhanced_attendance_summary_report_with_new_rules_{form.cleaned_data["start_date"].strftime("%Y%m%d")}_{form.cleaned_data["end_date"].strftime("%Y%m%d")}.csv"'
-            
-            writer = csv.writer(response)
-            
-            # 🔥 Enhanced CSV headers with NEW RULE fields
-            writer.writerow([
-                'Employee ID', 'Employee Name', 'Department', 'Designation',
-                'Working Days', 'Present Days', 'Absent Days', 'Late Days',
-                'Half Days', 'Early Out Days', 'Leave Days', 'Holiday Work Days',
-                'Weekend Work Days', 'Working Hours', 'Overtime Hours', 'Overtime Days',
-                'Total Late Minutes', 'Total Early Out Minutes', 'Perfect Attendance Days',
-                'Max Consecutive Absent', 'Attendance %', 'Punctuality %', 
-                'Average Daily Hours', 'Category',
-                # 🔥 NEW RULE COLUMNS
-                'Converted From Min Hours', 'Converted To Half Day', 'Converted From Incomplete Punch',
-                'Excessive Working Hours Days', 'Termination Risk Flag', 'Excessive Early Out Flag',
-                'Dynamic Shift Days'
-            ])
-            
-            for summary in report_data['employee_summaries']:
-                writer.writerow([
-                    summary['employee_id'],
-                    summary['employee_name'],
-                    summary['department'],
-                    summary['designation'],
-                    summary['working_days'],
-                    summary['present_days'],
-                    summary['absent_days'],
-                    summary['late_days'],
-                    summary['half_days'],
-                    summary['early_out_days'],
-                    summary['leave_days'],
-                    summary['holiday_work_days'],
-                    summary['weekend_work_days'],
-                    float(summary['working_hours']),
-                    float(summary['overtime_hours']),
-                    summary['overtime_days'],
-                    summary['total_late_minutes'],
-                    summary['total_early_out_minutes'],
-                    summary['perfect_attendance_days'],
-                    summary['max_consecutive_absent'],
-                    float(summary['attendance_percentage']),
-                    float(summary['punctuality_percentage']),
-                    float(summary['average_daily_hours']),
-                    summary['attendance_category'],
-                    # 🔥 NEW RULE DATA
-                    summary['converted_from_minimum_hours'],
-                    summary['converted_to_half_day'],
-                    summary['converted_from_incomplete_punch'],
-                    summary['excessive_working_hours_days'],
-                    'Yes' if summary['termination_risk_flag'] else 'No',
-                    'Yes' if summary['excessive_early_out_flag'] else 'No',
-                    summary['dynamic_shift_days'],
-                ])
-            
-            return response
-            
+            for employee, attendance_result in self._iter_attendance_results(form_data, employees, processor, holidays):
+                summary = self._calculate_employee_summary(
+                    employee, attendance_result, start_date, end_date, holiday_dates, form_data
+                )
+                if summary:
+                    yield self._summary_to_export_row(summary)
         except Exception as e:
+            # Headers are already sent: log, then re-raise so the download is aborted instead of truncated
             logger.error(f"Error exporting enhanced attendance summary report: {str(e)}")
-            messages.error(request, _("Failed to export report: {}").format(str(e)))
-            return self.post(request)
\ No newline at end of file
+            raise
+    
+    def _summary_to_export_row(self, summary):
+        return [
+            summary['employee_id'],
+            summary['employee_name'],
+            summary['department'],
+            summary['designation'],
+            summary['working_days'],
+            summary['present_days'],
+            summary['absent_days'],
+            summary['late_days'],
+            summary['half_days'],
+            summary['early_out_days'],
+            summary['leave_days'],
+            summary['holiday_work_days'],
+            summary['weekend_work_days'],
+            float(summary['working_hours']),
+            float(summary['overtime_hours']),
+            summary['overtime_days'],
+            summary['total_late_minutes'],
+            summary['total_early_out_minutes'],
+            summary['perfect_attendance_days'],
+            summary['max_consecutive_absent'],
+            float(summary['attendance_percentage']),
+            float(summary['punctuality_percentage']),
+            float(summary['average_daily_hours']),
+            summary['attendance_category'],
+            # 🔥 NEW RULE DATA
+            summary['converted_from_minimum_hours'],
+            summary['converted_to_half_day'],
+            summary['converted_from_incomplete_punch'],
+            summary['excessive_working_hours_days'],
+            'Yes' if summary['termination_risk_flag'] else 'No',
+            'Yes' if summary['excessive_early_out_flag'] else 'No',
+            summary['dynamic_shift_days'],
+        ]
@@ -13,7 +13,9 @@ import json
 import csv
 
 from Hrm.models import *
+from Hrm.rosters import RosterResolver
 from .unified_attendance_processor import UnifiedAttendanceProcessor
+from .attendance_facts import AttendanceFactBuilder
 
 logger = logging.getLogger(__name__)
 
@@ -517,19 +519,19 @@ class DailyAttendanceReportView(LoginRequiredMixin, View):
             'day_name': report_date.strftime('%A'),
         }
         
-        # Get ZK attendance logs for the date
-        employee_ids = [emp.employee_id for emp in employees]
-        zk_logs = ZKAttendanceLog.objects.filter(
-            user_id__in=employee_ids,
-            timestamp__date=report_date
-        ).order_by('user_id', 'timestamp')
-        
         # Get roster data
         roster_data = self._get_roster_data(employees, report_date, report_date)
         
         # 🔥 Initialize enhanced processor with all form options including NEW RULES
         processor = UnifiedAttendanceProcessor(form_data)
         
+        # Batch mode: leaves in one query, per-day records from the materialized
+        # fact table (only dirty or missing days are replayed from raw punches)
+        leave_index = processor.load_leave_index(employees, report_date, report_date)
+        fact_days = AttendanceFactBuilder(processor).get_daily_records(
+            employees, report_date, report_date, holidays, roster_data, leave_index
+        )
+        
         attendance_data = []
         summary_data = {
             'total_employees': len(employees),
@@ -574,21 +576,16 @@ class DailyAttendanceReportView(LoginRequiredMixin, View):
         all_flagged_records = []
         
         for employee in employees:
-            employee_logs = zk_logs.filter(user_id=employee.employee_id)
             employee_roster_data = roster_data.get(employee.id, {})
             
-            # Get leave applications for this employee and date
-            leave_applications = LeaveApplication.objects.filter(
-                employee=employee,
-                status='APP',
-                start_date__lte=report_date,
-                end_date__gte=report_date
-            )
+            # Leave applications for this employee and date
+            leave_applications = leave_index.get(employee.id, [])
             
             # 🔥 Process attendance with enhanced processor including NEW RULES
             attendance_result = processor.process_employee_attendance(
-                employee, report_date, report_date, employee_logs,
-                holidays, leave_applications, employee_roster_data
+                employee, report_date, report_date, {},
+                holidays, leave_applications, employee_roster_data,
+                precomputed_days=fact_days.get(employee.id)
             )
             
             # Get the daily record for this date
@@ -776,50 +773,11 @@ class DailyAttendanceReportView(LoginRequiredMixin, View):
     
     def _get_roster_data(self, employees, start_date, end_date):
         """Get roster data for employees."""
-        roster_data = {}
-        
         try:
-            # Get roster assignments
-            roster_assignments = RosterAssignment.objects.filter(
-                employee__in=employees,
-                roster__start_date__lte=end_date,
-                roster__end_date__gte=start_date
-            ).select_related('roster', 'shift', 'employee')
-            
-            # Get roster days
-            roster_days = RosterDay.objects.filter(
-                roster_assignment__employee__in=employees,
-                date__gte=start_date,
-                date__lte=end_date
-            ).select_related('shift', 'roster_assignment__roster')
-            
+            return RosterResolver(employees, start_date, end_date).as_index(employees)
         except Exception as e:
             logger.warning(f"Could not fetch roster data: {str(e)}")
             return {}
-        
-        # Organize data by employee
-        for employee in employees:
-            roster_data[employee.id] = {
-                'assignments': {},
-                'days': {}
-            }
-        
-        # Organize roster assignments
-        for assignment in roster_assignments:
-            employee_id = assignment.employee.id
-            current_date = max(assignment.roster.start_date, start_date)
-            end_assignment_date = min(assignment.roster.end_date, end_date)
-            
-            while current_date <= end_assignment_date:
-                roster_data[employee_id]['assignments'][current_date] = assignment
-                current_date += timedelta(days=1)
-        
-        # Organize roster days
-        for roster_day in roster_days:
-            employee_id = roster_day.roster_assignment.employee.id
-            roster_data[employee_id]['days'][roster_day.date] = roster_day
-        
-        return roster_data
     
     def _handle_export(self, request):
         """Handle CSV export of daily attendance report with 🔥 NEW RULE fields."""
@@ -13,7 +13,9 @@ import json
 import csv
 
 from Hrm.models import *
+from Hrm.rosters import RosterResolver
 from .unified_attendance_processor import UnifiedAttendanceProcessor
+from .attendance_facts import AttendanceFactBuilder
 
 logger = logging.getLogger(__name__)
 
@@ -205,19 +207,19 @@ class EarlyLeavingReportView(LoginRequiredMixin, View):
         # Get holidays for the date range
         holidays = Holiday.objects.filter(date__range=[start_date, end_date])
         
-        # Get ZK attendance logs for the date range
-        employee_ids = [emp.employee_id for emp in employees]
-        zk_logs = ZKAttendanceLog.objects.filter(
-            user_id__in=employee_ids,
-            timestamp__date__range=[start_date, end_date]
-        ).order_by('user_id', 'timestamp')
-        
         # Get roster data
         roster_data = self._get_roster_data(employees, start_date, end_date)
         
         # Initialize processor
         processor = UnifiedAttendanceProcessor(form_data)
         
+        # Batch mode: leaves in one query, per-day records from the materialized
+        # fact table (only dirty or missing days are replayed from raw punches)
+        leave_index = processor.load_leave_index(employees, start_date, end_date)
+        fact_days = AttendanceFactBuilder(processor).get_daily_records(
+            employees, start_date, end_date, holidays, roster_data, leave_index
+        )
+        
         attendance_data = []
         summary_data = {
             'total_records': 0,
@@ -234,21 +236,16 @@ class EarlyLeavingReportView(LoginRequiredMixin, View):
         departments_affected = set()
         
         for employee in employees:
-            employee_logs = zk_logs.filter(user_id=employee.employee_id)
             employee_roster_data = roster_data.get(employee.id, {})
             
-            # Get leave applications for this employee and date range
-            leave_applications = LeaveApplication.objects.filter(
-                employee=employee,
-                status='APP',
-                start_date__lte=end_date,
-                end_date__gte=start_date
-            )
+            # Leave applications for this employee and date range
+            leave_applications = leave_index.get(employee.id, [])
             
             # Process attendance for this employee for the date range
             attendance_result = processor.process_employee_attendance(
-                employee, start_date, end_date, employee_logs,
-                holidays, leave_applications, employee_roster_data
+                employee, start_date, end_date, {},
+                holidays, leave_applications, employee_roster_data,
+                precomputed_days=fact_days.get(employee.id)
             )
             
             # Filter for early leaving records
@@ -357,50 +354,11 @@ class EarlyLeavingReportView(LoginRequiredMixin, View):
     
     def _get_roster_data(self, employees, start_date, end_date):
         """Get roster data for employees."""
-        roster_data = {}
-        
         try:
-            # Get roster assignments
-            roster_assignments = RosterAssignment.objects.filter(
-                employee__in=employees,
-                roster__start_date__lte=end_date,
-                roster__end_date__gte=start_date
-            ).select_related('roster', 'shift', 'employee')
-            
-            # Get roster days
-            roster_days = RosterDay.objects.filter(
-                roster_assignment__employee__in=employees,
-                date__gte=start_date,
-                date__lte=end_date
-            ).select_related('shift', 'roster_assignment__roster')
-            
+            return RosterResolver(employees, start_date, end_date).as_index(employees)
         except Exception as e:
             logger.warning(f"Could not fetch roster data: {str(e)}")
             return {}
-        
-        # Organize data by employee
-        for employee in employees:
-            roster_data[employee.id] = {
-                'assignments': {},
-                'days': {}
-            }
-        
-        # Organize roster assignments
-        for assignment in roster_assignments:
-            employee_id = assignment.employee.id
-            current_date = max(assignment.roster.start_date, start_date)
-            end_assignment_date = min(assignment.roster.end_date, end_date)
-            
-            while current_date <= end_assignment_date:
-                roster_data[employee_id]['assignments'][current_date] = assignment
-                current_date += timedelta(days=1)
-        
-        # Organize roster days
-        for roster_day in roster_days:
-            employee_id = roster_day.roster_assignment.employee.id
-            roster_data[employee_id]['days'][roster_day.date] = roster_day
-        
-        return roster_data
     
     def _handle_export(self, request):
         """Handle CSV export of early leaving report."""
@@ -14,6 +14,8 @@ import csv
 from decimal import Decimal, ROUND_HALF_UP
 
 from Hrm.models import *
+from Hrm.rosters import RosterResolver
+from Hrm.working_calendar import WorkingCalendar
 from .unified_attendance_processor import UnifiedAttendanceProcessor
 
 logger = logging.getLogger(__name__)
@@ -609,9 +611,9 @@ class EmployeeDetailedAttendanceReportView(LoginRequiredMixin, View):
             'start_date': start_date,
             'end_date': end_date,
             'total_days': (end_date - start_date).days + 1,
-            'working_days': self._count_working_days(start_date, end_date, holiday_dates, form_data['weekend_days']),
+            'working_days': self._count_working_days(start_date, end_date, form_data['weekend_days']),
             'weekend_days': self._count_weekend_days(start_date, end_date, form_data['weekend_days']),
-            'holiday_days': len([d for d in holiday_dates if start_date <= d <= end_date]),
+            'holiday_days': WorkingCalendar(form_data['weekend_days']).count_holidays(start_date, end_date),
         }
         
         # Employee information
@@ -805,79 +807,21 @@ class EmployeeDetailedAttendanceReportView(LoginRequiredMixin, View):
         }
         return status_map.get(status, status)
     
-    def _count_working_days(self, start_date, end_date, holiday_dates, weekend_days):
-        """Count working days in the date range (EXACT SAME as summary report)."""
-        working_days = 0
-        current_date = start_date
-        weekend_day_numbers = [int(d) for d in weekend_days]
-        
-        while current_date <= end_date:
-            if (current_date not in holiday_dates and 
-                current_date.weekday() not in weekend_day_numbers):
-                working_days += 1
-            current_date += timedelta(days=1)
-        
-        return working_days
+    def _count_working_days(self, start_date, end_date, weekend_days):
+        """Count working days in the date range (EXACT SAME as summary report) from the precomputed working-day calendar."""
+        return WorkingCalendar(weekend_days).count_working_days(start_date, end_date)
     
     def _count_weekend_days(self, start_date, end_date, weekend_days):
-        """Count weekend days in the date range (EXACT SAME as summary report)."""
-        weekend_count = 0
-        current_date = start_date
-        weekend_day_numbers = [int(d) for d in weekend_days]
-        
-        while current_date <= end_date:
-            if current_date.weekday() in weekend_day_numbers:
-                weekend_count += 1
-            current_date += timedelta(days=1)
-        
-        return weekend_count
+        """Count weekend days in the date range (EXACT SAME as summary report) from the precomputed working-day calendar."""
+        return WorkingCalendar(weekend_days).count_weekend_days(start_date, end_date)
     
     def _get_roster_data(self, employees, start_date, end_date):
         """Get roster data for employees (EXACT SAME as daily report)."""
-        roster_data = {}
-        
         try:
-            # Get roster assignments
-            roster_assignments = RosterAssignment.objects.filter(
-                employee__in=employees,
-                roster__start_date__lte=end_date,
-                roster__end_date__gte=start_date
-            ).select_related('roster', 'shift', 'employee')
-            
-            # Get roster days
-            roster_days = RosterDay.objects.filter(
-                roster_assignment__employee__in=employees,
-                date__gte=start_date,
-                date__lte=end_date
-            ).select_related('shift', 'roster_assignment__roster')
-            
+            return RosterResolver(employees, start_date, end_date).as_index(employees)
         except Exception as e:
             logger.warning(f"Could not fetch roster data: {str(e)}")
             return {}
-        
-        # Organize data by employee
-        for employee in employees:
-            roster_data[employee.id] = {
-                'assignments': {},
-                'days': {}
-            }
-        
-        # Organize roster assignments
-        for assignment in roster_assignments:
-            employee_id = assignment.employee.id
-            current_date = max(assignment.roster.start_date, start_date)
-            end_assignment_date = min(assignment.roster.end_date, end_date)
-            
-            while current_date <= end_assignment_date:
-                roster_data[employee_id]['assignments'][current_date] = assignment
-                current_date += timedelta(days=1)
-        
-        # Organize roster days
-        for roster_day in roster_days:
-            employee_id = roster_day.roster_assignment.employee.id
-            roster_data[employee_id]['days'][roster_day.date] = roster_day
-        
-        return roster_data
     
     def _handle_export(self, request):
         """Handle CSV export of employee detailed attendance report with 🔥 NEW RULE fields."""
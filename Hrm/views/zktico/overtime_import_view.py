@@ -14,10 +14,13 @@ from decimal import Decimal, ROUND_HALF_UP
 from django.db import transaction
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from Hrm.models import *
+from Hrm.import_sessions import commit_import_records, create_import_session, select_records
+from Hrm.rosters import RosterResolver
 from .unified_attendance_processor import UnifiedAttendanceProcessor
+from .parallel_attendance import iter_attendance_results
+from .attendance_import_view import get_import_session
 
 logger = logging.getLogger(__name__)
 
@@ -447,8 +450,15 @@ class OvertimeImportView(LoginRequiredMixin, View):
             try:
                 report_data = self.generate_overtime_data_for_import(form.cleaned_data)
                 
+                # Keep the preview server-side; the save view only receives the session id
+                import_session = create_import_session(
+                    'OT', report_data['overtime_records'],
+                    form.cleaned_data['start_date'], form.cleaned_data['end_date'], request.user
+                )
+                
                 context_data.update({
                     'data_generated': True,
+                    'import_session_id': str(import_session.pk),
                     'overtime_records': report_data['overtime_records'],
                     'summary_stats': report_data['summary_stats'],
                     'form_data': form.cleaned_data,
@@ -504,37 +514,7 @@ class OvertimeImportView(LoginRequiredMixin, View):
     
     def get_roster_data_for_employee(self, employee, start_date, end_date):
         """Get roster data for an employee within date range."""
-        roster_data = {
-            'days': {},
-            'assignments': {}
-        }
-        
-        # Get roster days
-        roster_days = RosterDay.objects.filter(
-            roster_assignment__employee=employee,
-            date__range=[start_date, end_date]
-        ).select_related('shift', 'roster_assignment__roster')
-        
-        for roster_day in roster_days:
-            roster_data['days'][roster_day.date] = roster_day
-        
-        # Get roster assignments
-        roster_assignments = RosterAssignment.objects.filter(
-            employee=employee,
-            roster__start_date__lte=end_date,
-            roster__end_date__gte=start_date
-        ).select_related('roster', 'shift')
-        
-        for assignment in roster_assignments:
-            current_date = max(assignment.roster.start_date, start_date)
-            end_assignment_date = min(assignment.roster.end_date, end_date)
-            
-            while current_date <= end_assignment_date:
-                if current_date not in roster_data['days']:
-                    roster_data['assignments'][current_date] = assignment
-                current_date += timedelta(days=1)
-        
-        return roster_data
+        return RosterResolver([employee], start_date, end_date).roster_data(employee)
     
     def generate_overtime_data_for_import(self, form_data):
         """🔥 Generate overtime data using COMPLETE unified processor with EXACT field matching."""
@@ -571,79 +551,80 @@ class OvertimeImportView(LoginRequiredMixin, View):
             'termination_risk_flagged': 0,
         }
         
-        # Process employees using COMPLETE unified processor with EXACT field matching
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_employee = {
-                executor.submit(self.process_employee_overtime_complete, employee, start_date, end_date, form_data): employee 
-                for employee in employees
-            }
-            
-            for future in as_completed(future_to_employee):
-                employee = future_to_employee[future]
-                try:
-                    employee_result = future.result()
+        existing_dates = set(OvertimeRecord.objects.filter(
+            employee__in=employees,
+            date__range=[start_date, end_date]
+        ).values_list('employee_id', 'date'))
+        
+        # Process employees in worker processes from data prefetched in bulk
+        processor = UnifiedAttendanceProcessor(form_data)
+        for employee, result in iter_attendance_results(processor, employees, start_date, end_date):
+            try:
+                employee_result = self.build_employee_overtime_result(
+                    employee, result, form_data, existing_dates
+                )
+                
+                for overtime_record in employee_result['overtime_records']:
+                    overtime_records.append(overtime_record)
+                    
+                    # Update summary stats with ALL features
+                    summary_stats['total_overtime_hours'] += overtime_record['hours']
+                    
+                    if overtime_record['is_holiday']:
+                        summary_stats['holiday_overtime_records'] += 1
+                    elif overtime_record['is_weekend']:
+                        summary_stats['weekend_overtime_records'] += 1
+                    else:
+                        summary_stats['regular_overtime_records'] += 1
+                    
+                    if overtime_record['status'] == 'APP':
+                        summary_stats['approved_records'] += 1
+                    elif overtime_record['status'] == 'PEN':
+                        summary_stats['pending_records'] += 1
+                    elif overtime_record['status'] == 'REJ':
+                        summary_stats['rejected_records'] += 1
+                    
+                    if overtime_record['is_duplicate']:
+                        summary_stats['existing_records'] += 1
+                    
+                    if overtime_record.get('dynamic_shift_used', False):
+                        summary_stats['dynamic_shift_detections'] += 1
+                    
+                    if overtime_record.get('flagged', False):
+                        summary_stats['flagged_records'] += 1
+                    
+                    if overtime_record.get('converted', False):
+                        summary_stats['converted_records'] += 1
                     
-                    for overtime_record in employee_result['overtime_records']:
-                        overtime_records.append(overtime_record)
-                        
-                        # Update summary stats with ALL features
-                        summary_stats['total_overtime_hours'] += overtime_record['hours']
-                        
-                        if overtime_record['is_holiday']:
-                            summary_stats['holiday_overtime_records'] += 1
-                        elif overtime_record['is_weekend']:
-                            summary_stats['weekend_overtime_records'] += 1
-                        else:
-                            summary_stats['regular_overtime_records'] += 1
-                        
-                        if overtime_record['status'] == 'APP':
-                            summary_stats['approved_records'] += 1
-                        elif overtime_record['status'] == 'PEN':
-                            summary_stats['pending_records'] += 1
-                        elif overtime_record['status'] == 'REJ':
-                            summary_stats['rejected_records'] += 1
-                        
-                        if overtime_record['is_duplicate']:
-                            summary_stats['existing_records'] += 1
-                        
-                        if overtime_record.get('dynamic_shift_used', False):
-                            summary_stats['dynamic_shift_detections'] += 1
-                        
-                        if overtime_record.get('flagged', False):
-                            summary_stats['flagged_records'] += 1
-                        
-                        if overtime_record.get('converted', False):
-                            summary_stats['converted_records'] += 1
-                        
-                        # Enhanced rule tracking
-                        if overtime_record.get('minimum_hours_rule_applied', False):
-                            summary_stats['minimum_hours_rule_applied'] += 1
-                        
-                        if overtime_record.get('half_day_rule_applied', False):
-                            summary_stats['half_day_rule_applied'] += 1
-                        
-                        if overtime_record.get('maximum_hours_rule_applied', False):
-                            summary_stats['maximum_hours_rule_applied'] += 1
-                        
-                        if overtime_record.get('consecutive_absence_flagged', False):
-                            summary_stats['consecutive_absence_flagged'] += 1
-                        
-                        if overtime_record.get('early_out_flagged', False):
-                            summary_stats['early_out_flagged'] += 1
-                        
-                        if overtime_record.get('termination_risk_flagged', False):
-                            summary_stats['termination_risk_flagged'] += 1
+                    # Enhanced rule tracking
+                    if overtime_record.get('minimum_hours_rule_applied', False):
+                        summary_stats['minimum_hours_rule_applied'] += 1
                     
-                    # Update shift analysis stats
-                    shift_analysis = employee_result.get('shift_analysis', {})
-                    summary_stats['roster_day_usage'] += shift_analysis.get('roster_day_usage', 0)
-                    summary_stats['roster_assignment_usage'] += shift_analysis.get('roster_assignment_usage', 0)
-                    summary_stats['default_shift_usage'] += shift_analysis.get('default_shift_usage', 0)
-                    summary_stats['no_shift_days'] += shift_analysis.get('no_shift_days', 0)
-                        
-                except Exception as e:
-                    logger.error(f"Error processing employee {employee.employee_id}: {str(e)}")
-                    continue
+                    if overtime_record.get('half_day_rule_applied', False):
+                        summary_stats['half_day_rule_applied'] += 1
+                    
+                    if overtime_record.get('maximum_hours_rule_applied', False):
+                        summary_stats['maximum_hours_rule_applied'] += 1
+                    
+                    if overtime_record.get('consecutive_absence_flagged', False):
+                        summary_stats['consecutive_absence_flagged'] += 1
+                    
+                    if overtime_record.get('early_out_flagged', False):
+                        summary_stats['early_out_flagged'] += 1
+                    
+                    if overtime_record.get('termination_risk_flagged', False):
+                        summary_stats['termination_risk_flagged'] += 1
+                
+                # Update shift analysis stats
+                shift_analysis = employee_result.get('shift_analysis', {})
+                summary_stats['roster_day_usage'] += shift_analysis.get('roster_day_usage', 0)
+                summary_stats['roster_assignment_usage'] += shift_analysis.get('roster_assignment_usage', 0)
+                summary_stats['default_shift_usage'] += shift_analysis.get('default_shift_usage', 0)
+                summary_stats['no_shift_days'] += shift_analysis.get('no_shift_days', 0)
+                    
+            except Exception as e:
+                logger.error(f"Error processing employee {employee.employee_id}: {str(e)}")
+                continue
         
         summary_stats['total_records'] = len(overtime_records)
         summary_stats['new_records'] = summary_stats['total_records'] - summary_stats['existing_records']
@@ -690,22 +671,7 @@ class OvertimeImportView(LoginRequiredMixin, View):
                 roster_data=roster_data
             )
             
-            # Convert daily records to overtime records with ALL enhanced features
-            overtime_records = []
-            for daily_record in result['daily_records']:
-                overtime_record = self.convert_daily_record_to_overtime(
-                    employee, daily_record, form_data
-                )
-                if overtime_record:
-                    overtime_records.append(overtime_record)
-            
-            return {
-                'overtime_records': overtime_records,
-                'shift_analysis': result.get('shift_analysis', {}),
-                'summary_stats': result.get('summary_stats', {}),
-                'flagged_records': result.get('flagged_records', []),
-                'rule_applications': result.get('rule_applications', {}),
-            }
+            return self.build_employee_overtime_result(employee, result, form_data)
             
         except Exception as e:
             logger.error(f"Error processing employee {employee.employee_id}: {str(e)}")
@@ -717,7 +683,26 @@ class OvertimeImportView(LoginRequiredMixin, View):
                 'rule_applications': {},
             }
     
-    def convert_daily_record_to_overtime(self, employee, daily_record, form_data):
+    def build_employee_overtime_result(self, employee, result, form_data, existing_dates=None):
+        """Convert one employee's processor result into overtime records plus its analysis."""
+        # Convert daily records to overtime records with ALL enhanced features
+        overtime_records = []
+        for daily_record in result['daily_records']:
+            overtime_record = self.convert_daily_record_to_overtime(
+                employee, daily_record, form_data, existing_dates
+            )
+            if overtime_record:
+                overtime_records.append(overtime_record)
+        
+        return {
+            'overtime_records': overtime_records,
+            'shift_analysis': result.get('shift_analysis', {}),
+            'summary_stats': result.get('summary_stats', {}),
+            'flagged_records': result.get('flagged_records', []),
+            'rule_applications': result.get('rule_applications', {}),
+        }
+    
+    def convert_daily_record_to_overtime(self, employee, daily_record, form_data, existing_dates=None):
         """Convert daily attendance record to overtime record with ALL enhanced features and EXACT field matching."""
         date = daily_record['date']
         status = 'APP' if form_data.get('set_approved_by_default') else 'PEN'
@@ -728,12 +713,10 @@ class OvertimeImportView(LoginRequiredMixin, View):
             return None
         
         # Check if record already exists
-        existing_record = OvertimeRecord.objects.filter(
-            employee=employee,
-            date=date
-        ).first()
-        
-        is_duplicate = existing_record is not None
+        if existing_dates is not None:
+            is_duplicate = (employee.id, date) in existing_dates
+        else:
+            is_duplicate = OvertimeRecord.objects.filter(employee=employee, date=date).exists()
         
         # Apply maximum limit
         if overtime_hours > form_data['maximum_overtime_hours']:
@@ -810,6 +793,7 @@ class OvertimeImportView(LoginRequiredMixin, View):
             full_reason = base_reason
         
         return {
+            'employee_pk': employee.pk,
             'employee_id': employee.employee_id,
             'employee_name': employee.get_full_name(),
             'date': date.strftime('%Y-%m-%d'),
@@ -865,11 +849,38 @@ class OvertimeImportView(LoginRequiredMixin, View):
 class OvertimeImportSaveView(View):
     """🔥 COMPLETE Save view for overtime import data with enhanced validation and ALL features."""
     
+    FEATURE_FLAGS = {
+        'dynamic_shift_records': 'dynamic_shift_used',
+        'flagged_records': 'flagged',
+        'converted_records': 'converted',
+        'minimum_hours_rule_applied': 'minimum_hours_rule_applied',
+        'half_day_rule_applied': 'half_day_rule_applied',
+        'maximum_hours_rule_applied': 'maximum_hours_rule_applied',
+        'consecutive_absence_flagged': 'consecutive_absence_flagged',
+        'early_out_flagged': 'early_out_flagged',
+        'termination_risk_flagged': 'termination_risk_flagged',
+    }
+    
     def post(self, request, *args, **kwargs):
-        """Handle POST request to save selected overtime data with ALL enhanced features."""
+        """
+        Save the selected overtime rows from the import session (``session_id``,
+        ``import_type``, ``record_indexes``) in bulk chunks. Bodies carrying
+        ``overtime_data`` rows directly are still accepted.
+        """
         try:
             data = json.loads(request.body)
-            overtime_data = data.get('overtime_data', [])
+            session = None
+            
+            if data.get('session_id'):
+                session = get_import_session(request, data['session_id'], 'OT')
+                if session is None:
+                    return JsonResponse({
+                        'success': False,
+                        'error': _('Import session not found or expired, please generate the data again')
+                    }, status=404)
+                overtime_data = select_records(session, data.get('import_type', 'all'), data.get('record_indexes'))
+            else:
+                overtime_data = data.get('overtime_data', [])
             
             if not overtime_data:
                 return JsonResponse({
@@ -877,147 +888,18 @@ class OvertimeImportSaveView(View):
                     'error': _('No overtime data provided')
                 }, status=400)
             
-            saved_count = 0
-            updated_count = 0
+            result = commit_import_records('OT', overtime_data, session=session)
+            saved_count = result['created']
+            updated_count = result['updated']
             skipped_count = 0
-            errors = []
-            saved_records = []
+            errors = result['errors']
             
-            # Enhanced statistics tracking
+            # Enhanced statistics tracking (only the records actually written)
             feature_stats = {
-                'dynamic_shift_records': 0,
-                'flagged_records': 0,
-                'converted_records': 0,
-                'minimum_hours_rule_applied': 0,
-                'half_day_rule_applied': 0,
-                'maximum_hours_rule_applied': 0,
-                'consecutive_absence_flagged': 0,
-                'early_out_flagged': 0,
-                'termination_risk_flagged': 0,
+                stat: sum(1 for record in result['saved'] if record.get(flag, False))
+                for stat, flag in self.FEATURE_FLAGS.items()
             }
             
-            with transaction.atomic():
-                for record in overtime_data:
-                    try:
-                        # Validate required fields
-                        required_fields = ['employee_id', 'date', 'start_time', 'end_time', 'hours']
-                        if not all(field in record for field in required_fields):
-                            errors.append(f"Missing required fields in record: {record}")
-                            continue
-                        
-                        # Get employee
-                        try:
-                            employee = Employee.objects.get(employee_id=record['employee_id'])
-                        except Employee.DoesNotExist:
-                            errors.append(f"Employee with ID {record['employee_id']} not found")
-                            continue
-                        
-                        # Parse date
-                        try:
-                            date = datetime.strptime(record['date'], '%Y-%m-%d').date()
-                        except ValueError:
-                            errors.append(f"Invalid date format for employee {record['employee_id']}: {record['date']}")
-                            continue
-                        
-                        # Parse times
-                        try:
-                            start_time = datetime.strptime(record['start_time'], '%H:%M').time()
-                            end_time = datetime.strptime(record['end_time'], '%H:%M').time()
-                        except ValueError:
-                            errors.append(f"Invalid time format for employee {record['employee_id']}")
-                            continue
-                        
-                        # Validate hours
-                        try:
-                            hours = Decimal(str(record['hours']))
-                            if hours <= 0:
-                                errors.append(f"Invalid hours for employee {record['employee_id']}: {hours}")
-                                continue
-                        except (ValueError, TypeError):
-                            errors.append(f"Invalid hours format for employee {record['employee_id']}: {record['hours']}")
-                            continue
-                        
-                        # Check for existing record
-                        existing_record = OvertimeRecord.objects.filter(
-                            employee=employee,
-                            date=date
-                        ).first()
-                        
-                        overtime_data_dict = {
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'hours': hours,
-                            'reason': record.get('reason', '🔥 COMPLETE Imported via overtime import with ALL unified processor features'),
-                            'status': record.get('status', 'APP'),
-                            'remarks': record.get('remarks'),
-                        }
-                        
-                        if existing_record:
-                            # Update existing record
-                            for field, value in overtime_data_dict.items():
-                                setattr(existing_record, field, value)
-                            existing_record.save()
-                            updated_count += 1
-                        else:
-                            # Create new record
-                            overtime_data_dict.update({
-                                'employee': employee,
-                                'date': date,
-                            })
-                            OvertimeRecord.objects.create(**overtime_data_dict)
-                            saved_count += 1
-                        
-                        # Track enhanced features
-                        if record.get('dynamic_shift_used', False):
-                            feature_stats['dynamic_shift_records'] += 1
-                        
-                        if record.get('flagged', False):
-                            feature_stats['flagged_records'] += 1
-                        
-                        if record.get('converted', False):
-                            feature_stats['converted_records'] += 1
-                        
-                        if record.get('minimum_hours_rule_applied', False):
-                            feature_stats['minimum_hours_rule_applied'] += 1
-                        
-                        if record.get('half_day_rule_applied', False):
-                            feature_stats['half_day_rule_applied'] += 1
-                        
-                        if record.get('maximum_hours_rule_applied', False):
-                            feature_stats['maximum_hours_rule_applied'] += 1
-                        
-                        if record.get('consecutive_absence_flagged', False):
-                            feature_stats['consecutive_absence_flagged'] += 1
-                        
-                        if record.get('early_out_flagged', False):
-                            feature_stats['early_out_flagged'] += 1
-                        
-                        if record.get('termination_risk_flagged', False):
-                            feature_stats['termination_risk_flagged'] += 1
-                        
-                        saved_records.append({
-                            'employee_id': record['employee_id'],
-                            'employee_name': employee.get_full_name(),
-                            'date': record['date'],
-                            'hours': float(hours),
-                            'shift_source': record.get('shift_source', 'Unknown'),
-                            'dynamic_shift_used': record.get('dynamic_shift_used', False),
-                            'flagged': record.get('flagged', False),
-                            'converted': record.get('converted', False),
-                            'minimum_hours_rule_applied': record.get('minimum_hours_rule_applied', False),
-                            'half_day_rule_applied': record.get('half_day_rule_applied', False),
-                            'maximum_hours_rule_applied': record.get('maximum_hours_rule_applied', False),
-                            'consecutive_absence_flagged': record.get('consecutive_absence_flagged', False),
-                            'early_out_flagged': record.get('early_out_flagged', False),
-                            'termination_risk_flagged': record.get('termination_risk_flagged', False),
-                        })
-                        
-                    except Exception as e:
-                        error_msg = f"Error saving record for employee {record.get('employee_id', 'unknown')}: {str(e)}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
-                        continue
-            
             # Build enhanced success message
             success_message = f"🔥 COMPLETE Import completed with ALL features! {saved_count} records saved, {updated_count} updated."
             
@@ -1036,8 +918,7 @@ class OvertimeImportSaveView(View):
                 'updated_count': updated_count,
                 'skipped_count': skipped_count,
                 'error_count': len(errors),
-                'errors': errors,
-                'saved_records': saved_records,
+                'errors': errors[:200],
                 'feature_stats': feature_stats,
                 'message': success_message
             }
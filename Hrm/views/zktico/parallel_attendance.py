@@ -0,0 +1,136 @@
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import connections
+
+from Hrm.models import Holiday
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 25
+
+# Worker-process state, set once per worker by _init_worker
+_worker_state = {}
+
+
+def get_worker_count():
+    """Worker processes for bulk attendance processing (ATTENDANCE_PROCESS_WORKERS, 0/1 = inline)."""
+    default = min(4, os.cpu_count() or 1)
+    return max(int(getattr(settings, 'ATTENDANCE_PROCESS_WORKERS', default)), 1)
+
+
+def get_chunk_size():
+    """Employees per task sent to a worker (ATTENDANCE_PROCESS_CHUNK_SIZE)."""
+    return max(int(getattr(settings, 'ATTENDANCE_PROCESS_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)), 1)
+
+
+def _init_worker(state):
+    """
+    Receive the shared processor, date range and holidays once per worker.
+
+    The state arrives pickled so that, under the ``spawn`` start method, Django
+    is set up before any model instance is unpickled.
+    """
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+    _worker_state.update(pickle.loads(state))
+
+
+def _process_payloads(state, payloads):
+    """Run the processor for ``(employee, zk_logs, leave_applications, roster_data)`` payloads."""
+    processor = state['processor']
+    results = []
+    for employee, zk_logs, leave_applications, roster_data in payloads:
+        try:
+            result = processor.process_employee_attendance(
+                employee=employee,
+                start_date=state['start_date'],
+                end_date=state['end_date'],
+                zk_logs=zk_logs,
+                holidays=state['holidays'],
+                leave_applications=leave_applications,
+                roster_data=roster_data
+            )
+            results.append((employee.pk, result))
+        except Exception as e:
+            logger.error(f"Error processing employee {employee.employee_id}: {str(e)}")
+    return results
+
+
+def _process_chunk(payloads):
+    return _process_payloads(_worker_state, payloads)
+
+
+def iter_attendance_results(processor, employees, start_date, end_date, max_workers=None, chunk_size=None):
+    """
+    Process attendance for many employees, yielding ``(employee, result)`` as chunks finish.
+
+    Punches, leaves, rosters, holidays and shifts are loaded once up front in a
+    handful of queries; each worker then only receives compact per-employee
+    payloads and never touches the database. Small batches, a single worker or
+    a broken pool fall back to processing in this process. Employees whose
+    processing fails are logged and skipped.
+    """
+    employees = list(employees)
+    if not employees:
+        return
+
+    max_workers = max_workers or get_worker_count()
+    chunk_size = chunk_size or get_chunk_size()
+
+    punch_index = processor.load_punch_index(employees, start_date, end_date)
+    leave_index = processor.load_leave_index(employees, start_date, end_date)
+    roster_index = processor.load_roster_index(employees, start_date, end_date)
+    processor.preload_shifts()
+    state = {
+        'processor': processor,
+        'start_date': start_date,
+        'end_date': end_date,
+        'holidays': list(Holiday.objects.filter(date__range=[start_date, end_date])),
+    }
+
+    employee_map = {employee.pk: employee for employee in employees}
+    payloads = [
+        (
+            employee,
+            punch_index.get(employee.employee_id, {}),
+            leave_index.get(employee.id, []),
+            roster_index.get(employee.id, {'days': {}, 'assignments': {}}),
+        )
+        for employee in employees
+    ]
+    chunks = [payloads[i:i + chunk_size] for i in range(0, len(payloads), chunk_size)]
+
+    if max_workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            for employee_pk, result in _process_payloads(state, chunk):
+                yield employee_map[employee_pk], result
+        return
+
+    # Forked workers must not share the parent's database sockets.
+    connections.close_all()
+
+    pending = list(range(len(chunks)))
+    try:
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers, len(chunks)),
+            initializer=_init_worker,
+            initargs=(pickle.dumps(state),)
+        ) as executor:
+            future_to_chunk = {executor.submit(_process_chunk, chunks[i]): i for i in pending}
+            for future in as_completed(future_to_chunk):
+                results = future.result()
+                pending.remove(future_to_chunk[future])
+                for employee_pk, result in results:
+                    yield employee_map[employee_pk], result
+    except BrokenProcessPool as e:
+        logger.warning(f"Attendance worker pool failed ({e}); processing {len(pending)} remaining chunks inline")
+        for i in pending:
+            for employee_pk, result in _process_payloads(state, chunks[i]):
+                yield employee_map[employee_pk], result
@@ -10,10 +10,10 @@ from django.views import View
 from django.db.models import Q, Sum, Avg
 from django.http import JsonResponse, HttpResponse
 import json
-import csv
 import calendar
 
 from Hrm.models import *
+from config.exports import streaming_export_response
 from .unified_attendance_processor import UnifiedAttendanceProcessor
 
 logger = logging.getLogger(__name__)
@@ -436,21 +436,16 @@ class PayslipReportView(LoginRequiredMixin, View):
             # Initialize processor
             processor = UnifiedAttendanceProcessor(form_data)
             
+            # Batch mode: ZK punches and leaves for all employees in one query each
+            punch_index = processor.load_punch_index(employees, start_date, end_date)
+            leave_index = processor.load_leave_index(employees, start_date, end_date)
+            
             for employee in employees:
-                # Get ZK logs for this employee
-                zk_logs = ZKAttendanceLog.objects.filter(
-                    user_id=employee.employee_id,
-                    timestamp__date__gte=start_date,
-                    timestamp__date__lte=end_date
-                ).order_by('timestamp')
+                # Pre-grouped ZK punches for this employee
+                zk_logs = punch_index.get(employee.employee_id, {})
                 
-                # Get leave applications
-                leave_applications = LeaveApplication.objects.filter(
-                    employee=employee,
-                    status='APP',
-                    start_date__lte=end_date,
-                    end_date__gte=start_date
-                )
+                # Leave applications
+                leave_applications = leave_index.get(employee.id, [])
                 
                 # Process attendance
                 attendance_result = processor.process_employee_attendance(
@@ -493,45 +488,61 @@ class PayslipReportView(LoginRequiredMixin, View):
         
         return ytd_data
     
+    EXPORT_HEADER = [
+        'Employee ID', 'Employee Name', 'Department', 'Designation',
+        'Basic Salary', 'Gross Salary', 'Total Deductions', 'Net Salary',
+        'Working Days', 'Present Days', 'Overtime Hours', 'Overtime Amount'
+    ]
+    
     def _handle_export(self, request):
-        """Handle CSV export of payslip report."""
+        """Stream a CSV/XLSX export of the payslip report."""
         form = PayslipReportForm(request.POST)
         if not form.is_valid():
             messages.error(request, _("Please fix form errors before exporting."))
             return self.post(request)
         
+        form_data = form.cleaned_data
+        year = int(form_data['year'])
+        month = int(form_data['month'])
+        salary_month = SalaryMonth.objects.filter(year=year, month=month).first()
+        if not salary_month:
+            messages.error(request, _("Failed to export report: {}").format(
+                _("Salary month not found for {} {}").format(calendar.month_name[month], year)))
+            return self.post(request)
+        
+        return streaming_export_response(
+            f'payslip_report_{year}_{month:02d}.csv',
+            self.EXPORT_HEADER,
+            self._iter_export_rows(salary_month, form_data),
+            file_format=request.POST.get('export_format', 'csv'),
+            sheet_name='Payslips',
+        )
+    
+    def _iter_export_rows(self, salary_month, form_data):
+        """Yield export rows straight from the salary rows; the export needs none of the optional sections."""
+        employee_salaries = EmployeeSalary.objects.filter(
+            salary_month=salary_month,
+            employee__in=self._get_filtered_employees(form_data)
+        ).select_related('employee__department', 'employee__designation').order_by('pk')
+        
         try:
-            report_data = self._generate_payslip_report(form.cleaned_data)
-            
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="payslip_report_{form.cleaned_data["year"]}_{form.cleaned_data["month"]:02d}.csv"'
-            
-            writer = csv.writer(response)
-            writer.writerow([
-                'Employee ID', 'Employee Name', 'Department', 'Designation',
-                'Basic Salary', 'Gross Salary', 'Total Deductions', 'Net Salary',
-                'Working Days', 'Present Days', 'Overtime Hours', 'Overtime Amount'
-            ])
-            
-            for payslip in report_data['payslip_data']:
-                writer.writerow([
-                    payslip['employee_id'],
-                    payslip['employee_name'],
-                    payslip['department'],
-                    payslip['designation'],
-                    payslip['basic_salary'],
-                    payslip['gross_salary'],
-                    payslip['total_deductions'],
-                    payslip['net_salary'],
-                    payslip['working_days'],
-                    payslip['present_days'],
-                    payslip['overtime_hours'],
-                    payslip['overtime_amount'],
-                ])
-            
-            return response
-            
+            for emp_salary in employee_salaries.iterator(chunk_size=2000):
+                employee = emp_salary.employee
+                yield [
+                    employee.employee_id,
+                    employee.get_full_name(),
+                    employee.department.name if employee.department else 'N/A',
+                    employee.designation.name if employee.designation else 'N/A',
+                    emp_salary.basic_salary,
+                    emp_salary.gross_salary,
+                    emp_salary.total_deductions,
+                    emp_salary.net_salary,
+                    emp_salary.working_days,
+                    emp_salary.present_days,
+                    emp_salary.overtime_hours,
+                    emp_salary.overtime_amount,
+                ]
         except Exception as e:
+            # Headers are already sent: log, then re-raise so the download is aborted instead of truncated
             logger.error(f"Error exporting payslip report: {str(e)}")
-            messages.error(request, _("Failed to export report: {}").format(str(e)))
-            return self.post(request)
+            raise
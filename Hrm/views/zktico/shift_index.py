@@ -0,0 +1,86 @@
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+MINUTES_PER_DAY = 24 * 60
+
+ShiftMatch = namedtuple('ShiftMatch', 'shift score day_offset')
+
+
+def minute_of_day(value):
+    """A ``time`` as (fractional) minutes after midnight."""
+    return value.hour * 60 + value.minute + value.second / 60
+
+
+class ShiftIntervalIndex:
+    """
+    Shifts compiled into sorted start/end minute-of-day arrays for dynamic shift detection.
+
+    Every shift boundary is stored three times (the day before, the day
+    itself, the day after), so a tolerance window that crosses midnight is a
+    single bisection range: a 00:05 check-in finds a 23:50 shift and reports
+    that the shift started the previous day (``day_offset=-1``).
+
+    ``match`` scores only the shifts whose start or end falls within the
+    tolerance of the punches, with the same 50/50/25 scheme the processor
+    used when it scanned every shift. ``stats`` counts lookups and scored
+    candidates so callers can confirm detection no longer scans or queries.
+    """
+
+    def __init__(self, shifts, tolerance_minutes):
+        self.shifts = list(shifts)
+        self.tolerance = tolerance_minutes
+        self.stats = {'shifts': len(self.shifts), 'lookups': 0, 'candidates': 0}
+        self._starts, self._start_entries = self._compile(lambda shift: shift.start_time)
+        self._ends, self._end_entries = self._compile(lambda shift: shift.end_time)
+
+    def _compile(self, boundary):
+        entries = sorted(
+            (minute_of_day(boundary(shift)) + day * MINUTES_PER_DAY, day, position)
+            for position, shift in enumerate(self.shifts)
+            for day in (-1, 0, 1)
+        )
+        return [entry[0] for entry in entries], entries
+
+    def _window(self, keys, entries, minute):
+        low = bisect_left(keys, minute - self.tolerance)
+        high = bisect_right(keys, minute + self.tolerance)
+        for key, day, position in entries[low:high]:
+            yield position, abs(minute - key), day
+
+    def score(self, start_diff, end_diff=None, has_out_time=False):
+        """Score from the check-in/check-out distances (minutes) to a shift's start/end."""
+        score = 0
+        if start_diff is not None and start_diff <= self.tolerance:
+            score += max(0, 50 - start_diff)
+        if has_out_time:
+            if end_diff is not None and end_diff <= self.tolerance:
+                score += max(0, 50 - end_diff)
+        elif score > 0:
+            score += 25
+        return score
+
+    def match(self, in_time, out_time=None):
+        """``ShiftMatch`` tuples with a positive score for the given punch times, best first."""
+        self.stats['lookups'] += 1
+        in_minute = minute_of_day(in_time)
+        starts = {}
+        for position, diff, day in self._window(self._starts, self._start_entries, in_minute):
+            if position not in starts or diff < starts[position][0]:
+                starts[position] = (diff, day)
+
+        ends = {}
+        if out_time is not None:
+            out_minute = minute_of_day(out_time)
+            for position, diff, _ in self._window(self._ends, self._end_entries, out_minute):
+                if position not in ends or diff < ends[position]:
+                    ends[position] = diff
+
+        matches = []
+        for position in sorted(starts.keys() | ends.keys()):
+            self.stats['candidates'] += 1
+            start_diff, day_offset = starts.get(position, (None, 0))
+            score = self.score(start_diff, ends.get(position), out_time is not None)
+            if score > 0:
+                matches.append(ShiftMatch(self.shifts[position], score, day_offset))
+        matches.sort(key=lambda match: match.score, reverse=True)  # stable: ties keep shift order
+        return matches
@@ -1,9 +1,13 @@
+import hashlib
+import json
 import logging
 from datetime import timedelta, datetime, time
 from django.utils import timezone
 from collections import defaultdict
 from typing import Dict, List, Optional, Any, Tuple
 
+from .shift_index import ShiftIntervalIndex
+
 logger = logging.getLogger(__name__)
 
 class UnifiedAttendanceProcessor:
@@ -95,6 +99,9 @@ class UnifiedAttendanceProcessor:
         # Cache for performance
         self._shift_cache = {}
         self._employee_cache = {}
+        self._calendar = None
+        self._holiday_source = None
+        self._holiday_names = {}
     
     def get_config_summary(self):
         """Get current configuration summary for display including new rules."""
@@ -126,6 +133,10 @@ class UnifiedAttendanceProcessor:
                 'tolerance_minutes': self.dynamic_shift_tolerance_minutes,
                 'multiple_shift_priority': self.multiple_shift_priority,
                 'fallback_to_default': self.dynamic_shift_fallback_to_default,
+                # Forms pass either a Shift or its id
+                'fallback_shift_id': getattr(self.dynamic_shift_fallback_shift_id, 'pk',
+                                             self.dynamic_shift_fallback_shift_id),
+                'cross_midnight_matching': True,
             },
             'overtime_rules': {
                 'calculation_method': self.overtime_calculation_method,
@@ -147,11 +158,128 @@ class UnifiedAttendanceProcessor:
             'weekend_days': self.weekend_days,
         }
     
+    def get_config_key(self):
+        """Stable hash of the rule configuration, used to key materialized attendance facts."""
+        config = json.dumps(self.get_config_summary(), sort_keys=True, default=str)
+        return hashlib.sha256(config.encode('utf-8')).hexdigest()
+    
+    def load_punch_index(self, employees, start_date, end_date, chunk_size=5000):
+        """
+        Batch mode: load ZK punches for all employees in one streamed query.
+
+        Returns ``{user_id: {local_date: [punch, ...]}}`` with each day's punches
+        ordered by time. A punch exposes ``timestamp`` and ``punch_type`` like a
+        ZKAttendanceLog, so ``punch_index.get(employee.employee_id, {})`` can be
+        passed straight to ``process_employee_attendance`` as ``zk_logs``.
+        """
+        from Hrm.models import ZKAttendanceLog
+
+        employee_ids = [emp.employee_id for emp in employees]
+        punch_index = defaultdict(lambda: defaultdict(list))
+        if not employee_ids:
+            return {}
+
+        punches = ZKAttendanceLog.objects.filter(
+            user_id__in=employee_ids,
+            timestamp__date__range=[start_date, end_date]
+        ).order_by('user_id', 'timestamp').values_list(
+            'user_id', 'timestamp', 'punch_type', named=True
+        )
+
+        for punch in punches.iterator(chunk_size=chunk_size):
+            timestamp = punch.timestamp
+            local_date = timezone.localtime(timestamp).date() if timezone.is_aware(timestamp) else timestamp.date()
+            punch_index[punch.user_id][local_date].append(punch)
+
+        return {user_id: dict(days) for user_id, days in punch_index.items()}
+
+    def load_leave_index(self, employees, start_date, end_date):
+        """Batch mode: approved leave applications overlapping the range, keyed by employee pk."""
+        from Hrm.models import LeaveApplication
+
+        leave_index = defaultdict(list)
+        leave_applications = LeaveApplication.objects.filter(
+            employee__in=employees,
+            status='APP',
+            start_date__lte=end_date,
+            end_date__gte=start_date
+        )
+        for leave_app in leave_applications:
+            leave_index[leave_app.employee_id].append(leave_app)
+        return dict(leave_index)
+
+    def load_roster_index(self, employees, start_date, end_date):
+        """
+        Batch mode: roster data for all employees in two queries, keyed by employee pk.
+
+        Each value has the ``{'days': {...}, 'assignments': {...}}`` shape expected by
+        ``process_employee_attendance``; a RosterDay hides its assignment's date.
+        """
+        from Hrm.rosters import RosterResolver
+
+        return RosterResolver(employees, start_date, end_date).as_index()
+
+    def get_all_shifts(self):
+        """All configured shifts, loaded once per processor instead of once per day."""
+        if 'all' not in self._shift_cache:
+            from Hrm.models import Shift
+            self._shift_cache['all'] = list(Shift.objects.all())
+        return self._shift_cache['all']
+
+    def get_fallback_shift(self):
+        """The fixed fallback shift for dynamic detection, or None if it no longer exists."""
+        if 'fallback' not in self._shift_cache:
+            from Hrm.models import Shift
+            self._shift_cache['fallback'] = Shift.objects.filter(id=self.dynamic_shift_fallback_shift_id).first()
+        return self._shift_cache['fallback']
+
+    def get_shift_index(self):
+        """Start/end interval index over all shifts for dynamic detection, compiled once per processor."""
+        if 'index' not in self._shift_cache:
+            self._shift_cache['index'] = ShiftIntervalIndex(self.get_all_shifts(), self.dynamic_shift_tolerance_minutes)
+        return self._shift_cache['index']
+
+    def get_shift_index_stats(self):
+        """Lookup counters of the shift index (``shifts``, ``lookups``, ``candidates``), or {} if unused."""
+        index = self._shift_cache.get('index')
+        return dict(index.stats) if index else {}
+
+    @property
+    def calendar(self):
+        """The working-day calendar of this processor's weekend days (compiled years are cached)."""
+        if self._calendar is None:
+            from Hrm.working_calendar import WorkingCalendar
+            self._calendar = WorkingCalendar(self.weekend_days)
+        return self._calendar
+
+    def get_holiday_names(self, holidays):
+        """``{date: name}`` of ``holidays``, built once per holiday collection rather than once per day."""
+        if holidays is not self._holiday_source:
+            self._holiday_source = holidays
+            self._holiday_names = {h.date: h.name for h in holidays}
+        return self._holiday_names
+
+    def preload_shifts(self):
+        """Warm the shift cache so day processing needs no further queries (e.g. in worker processes)."""
+        self.get_all_shifts()
+        if self.enable_dynamic_shift_detection:
+            self.get_shift_index()
+        if self.dynamic_shift_fallback_shift_id:
+            self.get_fallback_shift()
+
     def process_employee_attendance(self, employee, start_date, end_date, zk_logs, 
-                                  holidays, leave_applications, roster_data):
+                                  holidays, leave_applications, roster_data, precomputed_days=None):
         """
         🔥 Enhanced attendance processing with new rules and dynamic shift detection.
         Returns both daily records and comprehensive summary statistics.
+
+        ``zk_logs`` is either a ZKAttendanceLog queryset for the employee or, in
+        batch mode, the employee's entry from ``load_punch_index`` (punches
+        pre-grouped by date, so no per-day queries are issued).
+
+        ``precomputed_days`` maps dates to per-day records already produced by
+        ``_process_single_day_attendance`` (see AttendanceFactBuilder); those
+        days skip the per-day pipeline and only the rules run on top of them.
         """
         
         # Organize leave applications by date
@@ -178,10 +306,15 @@ class UnifiedAttendanceProcessor:
         flagged_records = []
         
         while current_date <= end_date:
-            daily_record = self._process_single_day_attendance(
-                current_date, employee, zk_logs, holidays, leave_dates, 
-                roster_data, shift_analysis
-            )
+            if precomputed_days and current_date in precomputed_days:
+                daily_record = dict(precomputed_days[current_date])
+                for key, count in daily_record.pop('_shift_analysis', {}).items():
+                    shift_analysis[key] = shift_analysis.get(key, 0) + count
+            else:
+                daily_record = self._process_single_day_attendance(
+                    current_date, employee, zk_logs, holidays, leave_dates, 
+                    roster_data, shift_analysis
+                )
             
             # 🔥 NEW RULE: Apply minimum working hours rule
             if self.enable_minimum_working_hours_rule:
@@ -358,19 +491,19 @@ class UnifiedAttendanceProcessor:
         }
         
         # Check holidays first (highest priority)
-        holiday_dict = {h.date: h.name for h in holidays}
-        if date in holiday_dict:
+        holiday_names = self.get_holiday_names(holidays)
+        if date in holiday_names:
             record.update({
                 'status': 'HOL',
                 'original_status': 'HOL',
                 'is_holiday': True,
-                'holiday_name': holiday_dict[date]
+                'holiday_name': holiday_names[date]
             })
             shift_analysis['no_shift_days'] += 1
             
             # Process holiday attendance if present
-            daily_zk_logs = zk_logs.filter(timestamp__date=date)
-            if daily_zk_logs.exists():
+            daily_zk_logs = self._get_daily_logs(zk_logs, date)
+            if daily_zk_logs:
                 self._process_holiday_attendance(record, daily_zk_logs, employee)
             
             return record
@@ -386,7 +519,7 @@ class UnifiedAttendanceProcessor:
             return record
         
         # Check weekends
-        if date.weekday() in self.weekend_days:
+        if self.calendar.is_weekend(date):
             record.update({
                 'status': 'HOL',
                 'original_status': 'HOL',
@@ -396,17 +529,17 @@ class UnifiedAttendanceProcessor:
             shift_analysis['no_shift_days'] += 1
             
             # Process weekend attendance if present
-            daily_zk_logs = zk_logs.filter(timestamp__date=date)
-            if daily_zk_logs.exists():
+            daily_zk_logs = self._get_daily_logs(zk_logs, date)
+            if daily_zk_logs:
                 self._process_weekend_attendance(record, daily_zk_logs, employee)
             
             return record
         
         # Process ZK logs for this date
-        daily_zk_logs = zk_logs.filter(timestamp__date=date)
-        record['total_logs'] = daily_zk_logs.count()
+        daily_zk_logs = self._get_daily_logs(zk_logs, date)
+        record['total_logs'] = len(daily_zk_logs)
         
-        if not daily_zk_logs.exists():
+        if not daily_zk_logs:
             # No attendance logs - determine shift for absence analysis
             shift_info = self._get_shift_for_date(date, employee, roster_data, None, shift_analysis)
             record.update(shift_info)
@@ -440,40 +573,34 @@ class UnifiedAttendanceProcessor:
         
         return record
     
+    def _get_daily_logs(self, zk_logs, date):
+        """Return the punches for one date from a pre-grouped index or a queryset."""
+        if isinstance(zk_logs, dict):
+            return zk_logs.get(date, [])
+        return list(zk_logs.filter(timestamp__date=date))
+    
     def _detect_shift_dynamically(self, date, employee, attendance_record, shift_analysis):
         """🔥 Dynamic shift detection with fallback options."""
         
         if not attendance_record['in_time']:
             return self._get_fallback_shift_info(date, employee, "No check-in time for dynamic detection")
         
-        # Import Shift model
-        try:
-            from Hrm.models import Shift
-        except ImportError:
-            return self._get_fallback_shift_info(date, employee, "Shift model not available")
-        
-        # Get all available shifts
-        all_shifts = Shift.objects.all()
-        if not all_shifts.exists():
+        shift_index = self.get_shift_index()
+        if not shift_index.shifts:
             return self._get_fallback_shift_info(date, employee, "No shifts configured in system")
         
-        # Find matching shifts
-        matching_shifts = []
+        # Find matching shifts: only those whose start/end lies within the tolerance are scored
         in_time = attendance_record['in_time'].time()
         out_time = attendance_record['out_time'].time() if attendance_record['out_time'] else None
-        
-        for shift in all_shifts:
-            match_score = self._calculate_shift_match_score(shift, in_time, out_time)
-            
-            if match_score > 0:
-                matching_shifts.append({
-                    'shift': shift,
-                    'score': match_score,
-                    'confidence': min(match_score / 100, 1.0)
-                })
-        
-        # Sort by score (highest first)
-        matching_shifts.sort(key=lambda x: x['score'], reverse=True)
+        matching_shifts = [
+            {
+                'shift': match.shift,
+                'score': match.score,
+                'confidence': min(match.score / 100, 1.0),
+                'day_offset': match.day_offset,
+            }
+            for match in shift_index.match(in_time, out_time)
+        ]
         
         if not matching_shifts:
             shift_analysis['no_shift_days'] += 1
@@ -488,7 +615,7 @@ class UnifiedAttendanceProcessor:
         
         shift_analysis['dynamic_detection_usage'] += 1
         
-        return self._build_shift_info(
+        shift_info = self._build_shift_info(
             shift=best_shift['shift'],
             source='DynamicDetection',
             roster_info=f"Dynamic Detection (Confidence: {best_shift['confidence']:.1%})",
@@ -500,6 +627,12 @@ class UnifiedAttendanceProcessor:
                 'dynamic_shift_used': True,
             }
         )
+        # Check-in matched across midnight: the shift started the day before/after
+        if best_shift['day_offset'] and shift_info.get('expected_start'):
+            offset = timedelta(days=best_shift['day_offset'])
+            shift_info['expected_start'] += offset
+            shift_info['expected_end'] += offset
+        return shift_info
     
     def _get_fallback_shift_info(self, date, employee, reason):
         """🔥 NEW RULE 5: Get fallback shift when dynamic detection fails."""
@@ -513,15 +646,15 @@ class UnifiedAttendanceProcessor:
             )
         elif self.dynamic_shift_fallback_shift_id:
             try:
-                from Hrm.models import Shift
-                fallback_shift = Shift.objects.get(id=self.dynamic_shift_fallback_shift_id)
-                return self._build_shift_info(
-                    shift=fallback_shift,
-                    source='FallbackFixed',
-                    roster_info=f"Fallback to Fixed Shift: {reason}",
-                    date=date,
-                    is_roster_day=False
-                )
+                fallback_shift = self.get_fallback_shift()
+                if fallback_shift:
+                    return self._build_shift_info(
+                        shift=fallback_shift,
+                        source='FallbackFixed',
+                        roster_info=f"Fallback to Fixed Shift: {reason}",
+                        date=date,
+                        is_roster_day=False
+                    )
             except:
                 pass
         
@@ -596,45 +729,6 @@ class UnifiedAttendanceProcessor:
             if record['original_status'] not in ['HAL']:
                 record['original_status'] = 'HAL'
     
-    def _calculate_shift_match_score(self, shift, in_time, out_time=None):
-        """Calculate how well attendance times match a shift."""
-        
-        score = 0
-        tolerance_minutes = self.dynamic_shift_tolerance_minutes
-        tolerance = timedelta(minutes=tolerance_minutes)
-        
-        # Convert times to datetime for calculation
-        base_date = datetime.now().date()
-        shift_start = datetime.combine(base_date, shift.start_time)
-        shift_end = datetime.combine(base_date, shift.end_time)
-        
-        # Handle overnight shifts
-        if shift.end_time < shift.start_time:
-            shift_end += timedelta(days=1)
-        
-        actual_start = datetime.combine(base_date, in_time)
-        
-        # Check in time match
-        start_diff = abs((actual_start - shift_start).total_seconds())
-        if start_diff <= tolerance.total_seconds():
-            # Perfect match gets 50 points, decreasing with difference
-            score += max(0, 50 - (start_diff / 60))  # Reduce by 1 point per minute
-        
-        # Check out time match (if available)
-        if out_time:
-            actual_end = datetime.combine(base_date, out_time)
-            if out_time < in_time:  # Overnight attendance
-                actual_end += timedelta(days=1)
-            
-            end_diff = abs((actual_end - shift_end).total_seconds())
-            if end_diff <= tolerance.total_seconds():
-                score += max(0, 50 - (end_diff / 60))
-        else:
-            # No out time, give partial score if in time matches
-            score += 25 if score > 0 else 0
-        
-        return score
-    
     def _select_best_shift_from_matches(self, matching_shifts):
         """🔥 Select the best shift when multiple matches are found."""
         
@@ -935,10 +1029,10 @@ class UnifiedAttendanceProcessor:
     
     def _apply_holiday_absence_rule(self, daily_records, holidays):
         """Apply holiday absence rule: if absent before and after holiday, mark holiday as absent."""
-        holiday_dates = {h.date for h in holidays}
+        holiday_names = self.get_holiday_names(holidays)
         
         for i, record in enumerate(daily_records):
-            if record['date'] in holiday_dates and record['is_holiday']:
+            if record['date'] in holiday_names and record['is_holiday']:
                 prev_day_absent = False
                 if i > 0:
                     prev_record = daily_records[i - 1]
@@ -958,7 +1052,7 @@ class UnifiedAttendanceProcessor:
     def _apply_weekend_absence_rule(self, daily_records):
         """Apply weekend absence rule similar to holiday rule."""
         for i, record in enumerate(daily_records):
-            if (record['date'].weekday() in self.weekend_days and 
+            if (self.calendar.is_weekend(record['date']) and 
                 record['is_holiday'] and 'Weekend' in record.get('holiday_name', '')):
                 
                 prev_day_absent = False
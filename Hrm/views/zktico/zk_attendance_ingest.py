@@ -0,0 +1,104 @@
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from Hrm.models import ZKAttendanceLog, ZKDevice
+from Hrm.signals.attendance_fact_signals import mark_attendance_dirty
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def bulk_save_attendance_logs(records, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Insert device punches in bulk, skipping ones already stored.
+
+    ``records`` are dicts with ``device_id``, ``user_id`` and a ``timestamp``
+    datetime, plus optional ``punch_type``, ``status``, ``verify_type`` and
+    ``work_code``. Devices are resolved in one query and
+    duplicates on ``(device, user_id, timestamp, punch_type)`` are detected
+    with one range query per device, so the cost no longer grows with a query
+    per punch. Rows are written with batched ``bulk_create(ignore_conflicts=True)``.
+
+    Returns ``{'inserted_count', 'skipped_count', 'errors', 'inserted_logs', 'devices'}``
+    where ``devices`` maps each saved device id to its own inserted/skipped counts.
+    Since bulk_create bypasses signals, affected attendance facts are marked
+    dirty here.
+    """
+    result = {'inserted_count': 0, 'skipped_count': 0, 'errors': [], 'inserted_logs': [], 'devices': {}}
+
+    by_device = defaultdict(list)
+    for record in records:
+        by_device[record['device_id']].append(record)
+    if not by_device:
+        return result
+
+    devices = ZKDevice.objects.in_bulk(list(by_device.keys()))
+    dirty_user_ids = set()
+    dirty_dates = []
+
+    for device_id, device_records in by_device.items():
+        device = devices.get(device_id)
+        if device is None:
+            result['errors'].append(f"Device with ID {device_id} not found")
+            continue
+
+        logs = []
+        for record in device_records:
+            timestamp = record['timestamp']
+            if timezone.is_naive(timestamp):
+                timestamp = timezone.make_aware(timestamp)
+            logs.append(ZKAttendanceLog(
+                device=device,
+                user_id=str(record['user_id']),
+                timestamp=timestamp,
+                punch_type=record.get('punch_type') or None,
+                status=record.get('status') or None,
+                verify_type=record.get('verify_type') or None,
+                work_code=record.get('work_code') or None,
+            ))
+
+        timestamps = [log.timestamp for log in logs]
+        range_logs = ZKAttendanceLog.objects.filter(
+            device=device,
+            timestamp__range=[min(timestamps), max(timestamps)]
+        )
+        existing = list(range_logs.values_list('user_id', 'timestamp', 'punch_type').iterator())
+        existing_count = len(existing)
+        seen = set(existing)
+
+        new_logs = []
+        for log in logs:
+            key = (log.user_id, log.timestamp, log.punch_type)
+            if key in seen:
+                continue
+            seen.add(key)
+            new_logs.append(log)
+
+        device_result = result['devices'][device.id] = {'inserted': 0, 'skipped': len(logs) - len(new_logs)}
+        result['skipped_count'] += device_result['skipped']
+        if not new_logs:
+            continue
+
+        with transaction.atomic():
+            ZKAttendanceLog.objects.bulk_create(new_logs, batch_size=batch_size, ignore_conflicts=True)
+
+        # ignore_conflicts hides rows inserted concurrently by another sync; count what actually landed.
+        inserted = range_logs.count() - existing_count
+        device_result['inserted'] = inserted
+        device_result['skipped'] += len(new_logs) - inserted
+        result['inserted_count'] += inserted
+        result['skipped_count'] += len(new_logs) - inserted
+        result['inserted_logs'].extend(new_logs)
+
+        dirty_user_ids.update(log.user_id for log in new_logs)
+        dirty_dates.extend((timezone.localtime(min(timestamps)).date(), timezone.localtime(max(timestamps)).date()))
+        logger.info(f"Device {device.name}: {inserted} punches inserted, {len(logs) - inserted} skipped")
+
+    if dirty_user_ids:
+        mark_attendance_dirty(user_ids=dirty_user_ids, start_date=min(dirty_dates), end_date=max(dirty_dates))
+
+    return result
@@ -20,6 +20,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMix
 from Hrm.forms.zk_device_forms import ZKDeviceConnectionTestForm, ZKDeviceSyncForm,EmployeeAttendanceReportForm,ZKAttendanceLogForm,ZKAttendanceLogFilterForm
 from Hrm.models import ZKDevice, Employee, Department, Designation,Shift,Attendance,ZKAttendanceLog,OvertimeRecord
 from config.views import BaseBulkDeleteConfirmView, BaseBulkDeleteView, BaseExportView, GenericDeleteView, GenericFilterView
+from .zk_attendance_ingest import bulk_save_attendance_logs
+from .zk_device_sync import advance_sync_marks, compute_sync_marks, filter_new_records, get_connection_params
 
 try:
     from zk import ZK
@@ -31,6 +33,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Saved rows echoed back in the save response; counts always cover the full payload
+SAVED_RECORDS_PREVIEW_LIMIT = 1000
+
 # === ZK Device Connection Test View ===
 class ZKDeviceConnectionTestView(LoginRequiredMixin, FormView):
     """View for testing connection to multiple ZK Devices."""
@@ -179,20 +184,30 @@ class ZKDeviceSyncView(FormView):
         devices = form.cleaned_data['devices']
         start_date = form.cleaned_data.get('start_date')
         end_date = form.cleaned_data.get('end_date')
-        sync_result = self._sync_devices(devices, start_date, end_date)
+        only_new = form.cleaned_data.get('only_new')
+        sync_result = self._sync_devices(devices, start_date, end_date, only_new)
         context = self.get_context_data(form=form)
         context.update(sync_result)
         return render(self.request, self.template_name, context)
 
-    def _sync_devices(self, devices, start_date=None, end_date=None):
-        """Sync attendance data from specified devices."""
+    def _sync_devices(self, devices, start_date=None, end_date=None, only_new=False):
+        """
+        Sync attendance data from specified devices.
+
+        With ``only_new`` punches before each device's high-water mark, or
+        already stored from its last synced second, are dropped before any
+        parsing. Without a date filter the preview covers
+        everything new on the device, so its marks are handed to the save view
+        to be persisted once the punches are stored.
+        """
         result = {
             'sync_performed': True,
             'sync_results': [],
             'total_records': 0,
             'all_attendance_data': [],
             'start_date': start_date,
-            'end_date': end_date
+            'end_date': end_date,
+            'sync_marks': {},
         }
         for device in devices:
             device_result = {
@@ -203,17 +218,18 @@ class ZKDeviceSyncView(FormView):
                 'attendance_data': []
             }
             try:
-                conn_params = device.get_connection_params()
-                password = conn_params.get('password')
-                if password in [None, '']:
-                    conn_params['password'] = 0
-                elif isinstance(password, str) and password.isdigit():
-                    conn_params['password'] = int(password)
-                
-                zk = ZK(**conn_params)
+                zk = ZK(**get_connection_params(device))
                 conn = zk.connect()
                 if conn:
                     attendance = conn.get_attendance()
+                    if only_new:
+                        attendance = filter_new_records(device, attendance)
+                    if not (start_date or end_date):
+                        marks = compute_sync_marks(attendance)
+                        if attendance:
+                            result['sync_marks'][device.id] = {
+                                'last_punch_at': marks['last_punch_at'].isoformat(),
+                            }
                     if start_date or end_date:
                         filtered_attendance = [
                             record for record in attendance
@@ -289,74 +305,62 @@ class ZKDeviceSaveDataView(View):
                     'error': _('No attendance data provided')
                 }, status=400)
 
-            saved_count = 0
-            skipped_count = 0
             errors = []
-            saved_records = []
+            valid_records = []
 
             for record in attendance_data:
+                # Validate required fields
+                required_fields = ['device_id', 'user_id', 'timestamp']
+                if not all(field in record for field in required_fields):
+                    errors.append(f"Missing required fields in record: {record}")
+                    continue
+
                 try:
-                    # Validate required fields
-                    required_fields = ['device_id', 'user_id', 'timestamp']
-                    if not all(field in record for field in required_fields):
-                        errors.append(f"Missing required fields in record: {record}")
-                        continue
+                    device_id = int(record['device_id'])
+                except (TypeError, ValueError):
+                    errors.append(f"Device with ID {record['device_id']} not found")
+                    continue
 
-                    # Fetch device
-                    try:
-                        device = ZKDevice.objects.get(id=record['device_id'])
-                    except ZKDevice.DoesNotExist:
-                        errors.append(f"Device with ID {record['device_id']} not found")
-                        continue
+                # Parse timestamp
+                try:
+                    timestamp = datetime.strptime(record['timestamp'], '%Y-%m-%d %H:%M:%S')
+                except (TypeError, ValueError):
+                    errors.append(f"Invalid timestamp format for user {record['user_id']}: {record['timestamp']}")
+                    continue
 
-                    # Parse timestamp
-                    try:
-                        timestamp = datetime.strptime(record['timestamp'], '%Y-%m-%d %H:%M:%S')
-                    except ValueError:
-                        errors.append(f"Invalid timestamp format for user {record['user_id']}: {record['timestamp']}")
-                        continue
+                valid_records.append({**record, 'device_id': device_id, 'timestamp': timestamp})
 
-                    # Log record details for debugging
-                    logger.debug(f"Saving record: Device ID: {record['device_id']}, User ID: {record['user_id']}, Timestamp: {record['timestamp']}, Punch Type: {record.get('punch_type')}, Verify Type: {record.get('verify_type')}")
-
-                    # Check for duplicate record
-                    if ZKAttendanceLog.objects.filter(
-                        device=device,
-                        user_id=str(record['user_id']),
-                        timestamp=timestamp,
-                        punch_type=record.get('punch_type') or None
-                    ).exists():
-                        skipped_count += 1
-                        logger.info(f"Skipped duplicate record for user {record['user_id']} at {record['timestamp']}")
-                        continue
+            # Resolve devices once, dedupe per device with a range query and insert in batches
+            ingest_result = bulk_save_attendance_logs(valid_records)
+            errors.extend(ingest_result['errors'])
 
-                    # Create attendance log
-                    log = ZKAttendanceLog.objects.create(
-                        device=device,
-                        user_id=str(record['user_id']),
-                        timestamp=timestamp,
-                        punch_type=record.get('punch_type') or None,
-                        status=record.get('status') or None,
-                        verify_type=record.get('verify_type') or None,
-                        work_code=record.get('work_code') or None
-                    )
-                    saved_count += 1
-                    saved_records.append({
-                        'device_name': device.name,
-                        'user_id': record['user_id'],
-                        'timestamp': record['timestamp'],
-                        'punch_type': record.get('punch_type', '-'),
-                        'verify_type': record.get('verify_type', '-')
-                    })
-                except Exception as e:
-                    error_msg = f"Error saving record for user {record.get('user_id', 'unknown')}: {str(e)}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    continue
+            # Persist the preview's high-water marks only once every punch was accepted
+            if not errors:
+                for device_id, marks in (data.get('sync_marks') or {}).items():
+                    device = ZKDevice.objects.filter(pk=device_id).first()
+                    if device and int(device_id) in ingest_result['devices']:
+                        advance_sync_marks(
+                            device,
+                            last_punch_at=datetime.fromisoformat(marks['last_punch_at']) if marks.get('last_punch_at') else None
+                        )
+
+            saved_count = ingest_result['inserted_count']
+            skipped_count = ingest_result['skipped_count']
+            saved_records = [
+                {
+                    'device_name': log.device.name,
+                    'user_id': log.user_id,
+                    'timestamp': timezone.localtime(log.timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+                    'punch_type': log.punch_type or '-',
+                    'verify_type': log.verify_type or '-'
+                }
+                for log in ingest_result['inserted_logs'][:SAVED_RECORDS_PREVIEW_LIMIT]
+            ]
 
             response = {
                 'success': saved_count > 0 or skipped_count > 0,
                 'saved_count': saved_count,
+                'inserted_count': saved_count,
                 'skipped_count': skipped_count,
                 'error_count': len(errors),
                 'errors': errors,
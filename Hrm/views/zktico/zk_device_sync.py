@@ -0,0 +1,159 @@
+import logging
+
+from django.utils import timezone
+
+from Hrm.models import ZKAttendanceLog, ZKDevice
+from .zk_attendance_ingest import bulk_save_attendance_logs
+
+logger = logging.getLogger(__name__)
+
+PUNCH_TYPES = {
+    0: 'Check In',
+    1: 'Check Out',
+    2: 'Break Out',
+    3: 'Break In',
+    4: 'Overtime In',
+    5: 'Overtime Out'
+}
+
+
+def get_connection_params(device):
+    """Device connection params with the password coerced the way pyzk expects it."""
+    conn_params = device.get_connection_params()
+    password = conn_params.get('password')
+    if password in [None, '']:
+        conn_params['password'] = 0
+    elif isinstance(password, str) and password.isdigit():
+        conn_params['password'] = int(password)
+    return conn_params
+
+
+def get_punch_type(record):
+    """Map a pyzk punch code to its display string."""
+    if getattr(record, 'punch', None) is not None:
+        return PUNCH_TYPES.get(record.punch, f'Unknown ({record.punch})')
+    return None
+
+
+def _aware(timestamp):
+    return timezone.make_aware(timestamp) if timezone.is_naive(timestamp) else timestamp
+
+
+def filter_new_records(device, records):
+    """
+    Drop punches older than the device's high-water mark (``last_punch_at``).
+
+    Punches from the last synced second onwards are kept (several punches can
+    share it) and checked against the device's stored logs, so only punches
+    whose (user id, timestamp) is not saved yet remain. The mark is purely
+    time based: pyzk's ``uid`` is the user's slot on the device, not a record
+    sequence number.
+    """
+    records = [record for record in records if record.user_id and str(record.user_id).strip()]
+    if not records or device.last_punch_at is None:
+        return records
+
+    records = [record for record in records if _aware(record.timestamp) >= device.last_punch_at]
+    if not records:
+        return records
+    timestamps = [_aware(record.timestamp) for record in records]
+    stored = set(ZKAttendanceLog.objects.filter(
+        device=device,
+        timestamp__range=[min(timestamps), max(timestamps)]
+    ).values_list('user_id', 'timestamp'))
+    return [
+        record for record, timestamp in zip(records, timestamps)
+        if (str(record.user_id).strip(), timestamp) not in stored
+    ]
+
+
+def compute_sync_marks(records):
+    """High-water mark covering ``records``: the newest punch timestamp."""
+    return {
+        'last_punch_at': max(_aware(record.timestamp) for record in records) if records else None,
+    }
+
+
+def advance_sync_marks(device, last_punch_at=None):
+    """Move the device's mark forward (never back) and stamp ``last_sync``."""
+    device.refresh_from_db(fields=['last_punch_at'])
+    if last_punch_at is not None and (device.last_punch_at is None or last_punch_at > device.last_punch_at):
+        device.last_punch_at = last_punch_at
+    device.last_sync = timezone.now()
+    ZKDevice.objects.filter(pk=device.pk).update(
+        last_punch_at=device.last_punch_at,
+        last_sync=device.last_sync,
+    )
+
+
+def record_to_row(device, record):
+    """A pyzk attendance record as a row for ``bulk_save_attendance_logs``."""
+    return {
+        'device_id': device.id,
+        'user_id': int(record.user_id),
+        'timestamp': record.timestamp,
+        'punch_type': get_punch_type(record),
+        'status': getattr(record, 'status', None),
+        'verify_type': getattr(record, 'verify_type', None),
+        'work_code': getattr(record, 'work_code', None),
+    }
+
+
+def _verify_saved(device, rows):
+    """True if every fetched punch is now stored for the device."""
+    if not rows:
+        return True
+    timestamps = [_aware(row['timestamp']) for row in rows]
+    stored = set(ZKAttendanceLog.objects.filter(
+        device=device,
+        timestamp__range=[min(timestamps), max(timestamps)]
+    ).values_list('user_id', 'timestamp', 'punch_type'))
+    return all(
+        (str(row['user_id']), timestamp, row['punch_type'] or None) in stored
+        for row, timestamp in zip(rows, timestamps)
+    )
+
+
+def sync_device_attendance(device, zk_class=None, clear_buffer=None):
+    """
+    Pull only new punches from one device, save them and advance its marks.
+
+    ``zk_class`` defaults to pyzk's ``ZK``. The device buffer is cleared only
+    when ``clear_buffer`` (default: ``device.clear_buffer_after_sync``) is set
+    and every fetched punch was verified as stored.
+
+    Returns ``{'fetched', 'new', 'inserted', 'skipped', 'errors', 'verified', 'cleared'}``.
+    Connection and protocol errors propagate to the caller.
+    """
+    if zk_class is None:
+        from zk import ZK as zk_class
+    if clear_buffer is None:
+        clear_buffer = device.clear_buffer_after_sync
+
+    result = {'fetched': 0, 'new': 0, 'inserted': 0, 'skipped': 0, 'errors': [], 'verified': False, 'cleared': False}
+    conn = zk_class(**get_connection_params(device)).connect()
+    if not conn:
+        raise ConnectionError(f"Failed to connect to {device.name}")
+    try:
+        records = conn.get_attendance() or []
+        result['fetched'] = len(records)
+        new_records = filter_new_records(device, records)
+        result['new'] = len(new_records)
+
+        rows = [record_to_row(device, record) for record in new_records]
+        saved = bulk_save_attendance_logs(rows)
+        result.update(inserted=saved['inserted_count'], skipped=saved['skipped_count'], errors=saved['errors'])
+
+        result['verified'] = not saved['errors'] and _verify_saved(device, rows)
+        if not result['verified']:
+            logger.warning(f"Device {device.name}: save could not be verified, sync marks left unchanged")
+            return result
+
+        marks = compute_sync_marks(new_records)
+        if clear_buffer and records:
+            conn.clear_attendance()
+            result['cleared'] = True
+        advance_sync_marks(device, marks['last_punch_at'])
+        return result
+    finally:
+        conn.disconnect()
@@ -0,0 +1,152 @@
+"""
+Precomputed working-day calendar.
+
+``WorkingCalendar(weekend_days)`` answers "is this a working day / weekend /
+holiday" and "how many working days between two dates" without walking the
+range day by day or querying Holiday per date. Each calendar year is
+compiled once per weekend configuration into a ``YearCalendar``: one flag
+byte per day of the year (weekend and holiday bits) plus prefix sums of
+working, weekend and holiday days, so a range count is two subtractions per
+year it spans.
+
+Compiled years live in the Django cache under a generation counter that the
+Holiday signals bump on every save/delete (see ``invalidate_calendar``), and
+a ``WorkingCalendar`` instance also keeps the years it has used, so a
+processor or report hits the cache at most once per year. With the default
+per-process cache other workers pick holiday changes up after
+``WORKING_CALENDAR_CACHE_TIMEOUT`` seconds; configure a shared cache backend
+for immediate invalidation everywhere.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Holiday
+
+CACHE_PREFIX = 'working_calendar'
+GENERATION_KEY = f'{CACHE_PREFIX}:generation'
+
+WEEKEND = 1
+HOLIDAY = 2
+
+
+class YearCalendar:
+    """Flags and prefix counts of one year for one weekend configuration."""
+
+    def __init__(self, year, weekend_days, holidays):
+        self.year = year
+        self.weekend_days = weekend_days
+        self.first_ordinal = date(year, 1, 1).toordinal()
+        size = date(year, 12, 31).toordinal() - self.first_ordinal + 1
+        self.holidays = {day: name for day, name in holidays if day.year == year}
+
+        flags = bytearray(size)
+        first_weekday = date(year, 1, 1).weekday()
+        for offset in range(size):
+            if (first_weekday + offset) % 7 in weekend_days:
+                flags[offset] |= WEEKEND
+        for day in self.holidays:
+            flags[day.toordinal() - self.first_ordinal] |= HOLIDAY
+        self.flags = bytes(flags)
+
+        # Prefix sums: counts[i] covers the first i days of the year
+        self.working = [0] * (size + 1)
+        self.weekends = [0] * (size + 1)
+        self.holiday_counts = [0] * (size + 1)
+        for offset, flag in enumerate(self.flags):
+            self.working[offset + 1] = self.working[offset] + (not flag)
+            self.weekends[offset + 1] = self.weekends[offset] + bool(flag & WEEKEND)
+            self.holiday_counts[offset + 1] = self.holiday_counts[offset] + bool(flag & HOLIDAY)
+
+    def flag(self, day):
+        return self.flags[day.toordinal() - self.first_ordinal]
+
+    def count(self, counts, start, end):
+        """Days of ``counts`` between ``start`` and ``end`` (both inside this year, inclusive)."""
+        return counts[end.toordinal() - self.first_ordinal + 1] - counts[start.toordinal() - self.first_ordinal]
+
+
+def _weekend_key(weekend_days):
+    return frozenset(int(day) for day in weekend_days)
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def invalidate_calendar():
+    """Drop every compiled year (called by the Holiday signals)."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, None)
+
+
+def build_year(year, weekend_days):
+    """Compile ``year`` from the Holiday table without touching the cache."""
+    holidays = Holiday.objects.filter(date__year=year).order_by('date', 'pk').values_list('date', 'name')
+    return YearCalendar(year, _weekend_key(weekend_days), holidays)
+
+
+def get_year(year, weekend_days):
+    """The cached ``YearCalendar`` of ``year`` for ``weekend_days`` (weekday numbers, Monday=0)."""
+    weekend_days = _weekend_key(weekend_days)
+    key = f"{CACHE_PREFIX}:{_generation()}:{year}:{''.join(map(str, sorted(weekend_days)))}"
+    year_calendar = cache.get(key)
+    if year_calendar is None:
+        year_calendar = build_year(year, weekend_days)
+        cache.set(key, year_calendar, getattr(settings, 'WORKING_CALENDAR_CACHE_TIMEOUT', 86400))
+    return year_calendar
+
+
+class WorkingCalendar:
+    """Working days, weekends and holidays for one weekend configuration."""
+
+    def __init__(self, weekend_days):
+        self.weekend_days = _weekend_key(weekend_days)
+        self._years = {}
+
+    def year(self, year):
+        if year not in self._years:
+            self._years[year] = get_year(year, self.weekend_days)
+        return self._years[year]
+
+    def is_weekend(self, day):
+        return day.weekday() in self.weekend_days
+
+    def is_holiday(self, day):
+        return bool(self.year(day.year).flag(day) & HOLIDAY)
+
+    def is_working_day(self, day):
+        return not self.year(day.year).flag(day)
+
+    def holiday_name(self, day):
+        """The holiday's name, or None when ``day`` is not a holiday."""
+        return self.year(day.year).holidays.get(day)
+
+    def holidays(self, start, end):
+        """``{date: name}`` of the holidays between ``start`` and ``end``."""
+        found = {}
+        for year in range(start.year, end.year + 1):
+            found.update((day, name) for day, name in self.year(year).holidays.items() if start <= day <= end)
+        return found
+
+    def _count(self, counts, start, end):
+        total = 0
+        for year in range(start.year, end.year + 1):
+            year_calendar = self.year(year)
+            total += year_calendar.count(getattr(year_calendar, counts),
+                                         max(start, date(year, 1, 1)), min(end, date(year, 12, 31)))
+        return total
+
+    def count_working_days(self, start, end):
+        """Days in the range that are neither weekend nor holiday."""
+        return self._count('working', start, end) if start <= end else 0
+
+    def count_weekend_days(self, start, end):
+        return self._count('weekends', start, end) if start <= end else 0
+
+    def count_holidays(self, start, end):
+        """Holiday dates in the range (a date with several Holiday rows counts once)."""
+        return self._count('holiday_counts', start, end) if start <= end else 0
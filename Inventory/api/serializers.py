@@ -47,29 +47,27 @@ class ItemListSerializer(serializers.ModelSerializer):
 
 
     def get_image(self, obj):
+        # Lists only need the thumbnail variant
         request = self.context.get('request')
         if obj.image:
-            image_url = obj.image.url
+            image_url = obj.thumbnail_url
             if request is not None:
                 return request.build_absolute_uri(image_url)
             return image_url
         return None
     
+    # The Item properties read with_stock() annotations when the queryset has them
     def get_in_stock(self, obj):
-        warehouse_info = obj.warehouse_info.filter(warehouse=obj.default_warehouse).first()
-        return warehouse_info.in_stock if warehouse_info else 0
+        return obj.in_stock
     
     def get_committed(self, obj):
-        warehouse_info = obj.warehouse_info.filter(warehouse=obj.default_warehouse).first()
-        return warehouse_info.committed if warehouse_info else 0
+        return obj.committed
     
     def get_ordered(self, obj):
-        warehouse_info = obj.warehouse_info.filter(warehouse=obj.default_warehouse).first()
-        return warehouse_info.ordered if warehouse_info else 0
+        return obj.ordered
     
     def get_available(self, obj):
-        warehouse_info = obj.warehouse_info.filter(warehouse=obj.default_warehouse).first()
-        return warehouse_info.available if warehouse_info else 0
+        return obj.available
  
 class ItemSerializer(serializers.ModelSerializer):
     item_group_name = serializers.CharField(source='item_group.name', read_only=True)
@@ -95,7 +93,7 @@ class ItemSerializer(serializers.ModelSerializer):
     def get_image(self, obj):
         request = self.context.get('request')
         if obj.image:
-            image_url = obj.image.url
+            image_url = obj.detail_image_url
             if request is not None:
                 return request.build_absolute_uri(image_url)
             return image_url
@@ -40,7 +40,7 @@ class ItemViewSet(viewsets.ModelViewSet):
         return ItemSerializer
 
     def get_queryset(self):
-        queryset = Item.objects.select_related(
+        queryset = Item.objects.with_stock().select_related(
             'item_group', 
             'inventory_uom',
             'purchase_uom',
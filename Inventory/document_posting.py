@@ -0,0 +1,259 @@
+"""
+Document-level stock posting for multi-line inventory documents.
+
+Line signals no longer post their own line. They call
+``schedule_document_posting``, which defers ``post_document_stock`` to
+``transaction.on_commit`` once per document, so saving a receipt with
+hundreds of lines posts it in one pass: the wanted transactions are built
+from all lines, matched against the document's existing transactions,
+and only the difference is written. Stock deltas are summed per
+(item, warehouse), the rows are locked together and updated in one
+statement, and the new transactions are bulk inserted.
+
+Each posting type's effect on the warehouse figures is derived from the
+transaction itself, so reversing an old transaction undoes exactly what
+posting it did. Transactions written by the old line signals were
+backfilled with the same markers (migration Inventory 0003): GRPO receipts
+against a purchase order carry ``ORDERED_RECEIPT_NOTE`` and transfer legs,
+which never moved stock, ``LEGACY_TRANSFER_NOTE``.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Q
+
+from global_settings.on_commit import defer_once
+
+from .item_cache import item_cache
+from .models import InventoryTransaction
+from .stock import apply_stock_deltas, lock_warehouse_rows
+
+# Marks receipt transactions that reduced the ordered quantity of a PO
+ORDERED_RECEIPT_NOTE = "Received against purchase order"
+# Marks transfer legs recorded before transfers moved stock
+LEGACY_TRANSFER_NOTE = "Recorded before transfers moved stock"
+
+
+class StockDocument:
+    """How one document type turns its lines into inventory transactions."""
+
+    model = None
+    prefix = None
+    transaction_type = None
+    posted_status = None  # None: every status posts
+    line_related = ()
+
+    def existing_filter(self, document_id):
+        return Q(reference=f"{self.prefix}-{document_id}", transaction_type=self.transaction_type)
+
+    def get_lines(self, document):
+        return document.lines.select_related(*self.line_related)
+
+    def get_warehouse_id(self, document, line, item):
+        return item.default_warehouse_id
+
+    def line_transactions(self, document, line, item):
+        warehouse_id = self.get_warehouse_id(document, line, item)
+        if warehouse_id is None:
+            return []
+        return [self.transaction(line, warehouse_id, line.quantity, f"{self.prefix}-{document.pk}")]
+
+    def transaction(self, line, warehouse_id, quantity, reference, notes=None):
+        return InventoryTransaction(
+            item_code=line.item_code,
+            item_name=line.item_name,
+            warehouse_id=warehouse_id,
+            transaction_type=self.transaction_type,
+            quantity=quantity,
+            unit_price=line.unit_price or Decimal('0'),
+            total_amount=quantity * (line.unit_price or Decimal('0')),
+            reference=reference,
+            notes=notes,
+        )
+
+
+class GoodsReceiptDocument(StockDocument):
+    model = 'Inventory.GoodsReceipt'
+    prefix = 'GR'
+    transaction_type = 'RECEIPT'
+    posted_status = 'Posted'
+
+
+class GoodsIssueDocument(StockDocument):
+    model = 'Inventory.GoodsIssue'
+    prefix = 'GI'
+    transaction_type = 'ISSUE'
+    posted_status = 'Posted'
+
+
+class InventoryTransferDocument(StockDocument):
+    model = 'Inventory.InventoryTransfer'
+    prefix = 'IT'
+    transaction_type = 'TRANSFER'
+    posted_status = 'Posted'
+
+    def existing_filter(self, document_id):
+        references = [f"IT-{document_id}-OUT", f"IT-{document_id}-IN"]
+        return Q(reference__in=references, transaction_type=self.transaction_type)
+
+    def line_transactions(self, document, line, item):
+        # Outgoing leg is negative at the source, incoming positive at the target
+        return [
+            self.transaction(line, line.from_warehouse_id, -line.quantity, f"IT-{document.pk}-OUT"),
+            self.transaction(line, line.to_warehouse_id, line.quantity, f"IT-{document.pk}-IN"),
+        ]
+
+
+class DeliveryDocument(StockDocument):
+    model = 'Sales.Delivery'
+    prefix = 'DEL'
+    transaction_type = 'DELIVERY'
+
+    def existing_filter(self, document_id):
+        return Q(reference__startswith=f"DEL-{document_id}-", transaction_type=self.transaction_type)
+
+    def line_transactions(self, document, line, item):
+        if item.default_warehouse_id is None:
+            return []
+        return [self.transaction(line, item.default_warehouse_id, line.quantity,
+                                 f"DEL-{document.pk}-{line.pk}", notes="Auto created from DeliveryLine Save")]
+
+
+class GoodsReceiptPoDocument(StockDocument):
+    model = 'Purchase.GoodsReceiptPo'
+    prefix = 'GRPO'
+    transaction_type = 'RECEIPT'
+    posted_status = 'Open'
+
+    def get_warehouse_id(self, document, line, item):
+        return document.warehouse_id or item.default_warehouse_id
+
+    def line_transactions(self, document, line, item):
+        warehouse_id = self.get_warehouse_id(document, line, item)
+        if warehouse_id is None:
+            return []
+        notes = ORDERED_RECEIPT_NOTE if line.purchase_order_line_id else None
+        return [self.transaction(line, warehouse_id, line.quantity, f"GRPO-{document.pk}", notes=notes)]
+
+
+STOCK_DOCUMENTS = {
+    'GR': GoodsReceiptDocument(),
+    'GI': GoodsIssueDocument(),
+    'IT': InventoryTransferDocument(),
+    'DEL': DeliveryDocument(),
+    'GRPO': GoodsReceiptPoDocument(),
+}
+
+
+def transaction_effects(txn):
+    """Stock field deltas and zero-clamped fields for one posted transaction."""
+    quantity = txn.quantity
+    if txn.transaction_type == 'ISSUE':
+        return {'in_stock': -quantity}, ()
+    if txn.transaction_type == 'DELIVERY':
+        return {'in_stock': -quantity, 'committed': -quantity}, ('in_stock', 'committed')
+    if txn.transaction_type == 'RECEIPT' and txn.notes == ORDERED_RECEIPT_NOTE:
+        return {'in_stock': quantity, 'ordered': -quantity}, ('ordered',)
+    if txn.transaction_type == 'TRANSFER' and txn.notes == LEGACY_TRANSFER_NOTE:
+        return {}, ()
+    # RECEIPT and both TRANSFER legs (signed quantities)
+    return {'in_stock': quantity}, ()
+
+
+def _transaction_key(txn):
+    # A legacy transfer leg still matches its line, so an unchanged old transfer is not reposted
+    notes = None if txn.notes == LEGACY_TRANSFER_NOTE else txn.notes or None
+    return (txn.reference, txn.item_code, txn.warehouse_id, txn.quantity, txn.unit_price, notes)
+
+
+def post_document_stock(kind, document_id):
+    """
+    Bring stock and inventory transactions in line with one document.
+
+    Documents outside their posting status are left alone; a deleted
+    document has its transactions reversed. Returns
+    ``{'created', 'deleted', 'rows'}`` (rows: warehouse rows updated).
+    The document row (or, once deleted, its transactions) is locked before
+    the difference is computed, so concurrent postings of one document
+    cannot apply the same difference twice.
+    """
+    spec = STOCK_DOCUMENTS[kind]
+    result = {'created': 0, 'deleted': 0, 'rows': 0}
+    with transaction.atomic():
+        document = apps.get_model(spec.model).objects.select_for_update().filter(pk=document_id).first()
+        if document is not None and spec.posted_status and document.status != spec.posted_status:
+            return result
+
+        existing = list(InventoryTransaction.objects.select_for_update()
+                        .filter(spec.existing_filter(document_id)).order_by('pk'))
+        lines = list(spec.get_lines(document)) if document is not None else []
+
+        codes = {line.item_code for line in lines} | {txn.item_code for txn in existing}
+        items = item_cache.get_many(codes)
+
+        unmatched = defaultdict(list)
+        for txn in existing:
+            unmatched[_transaction_key(txn)].append(txn)
+        to_create = []
+        for line in lines:
+            item = items.get(line.item_code)
+            if item is None:
+                continue
+            for txn in spec.line_transactions(document, line, item):
+                matches = unmatched.get(_transaction_key(txn))
+                if matches:
+                    matches.pop()  # already posted as it is
+                else:
+                    to_create.append(txn)
+        to_delete = [txn for txns in unmatched.values() for txn in txns]
+        if not (to_create or to_delete):
+            return result
+
+        deltas = defaultdict(lambda: defaultdict(Decimal))
+        clamps = defaultdict(set)
+        for sign, txns in ((1, to_create), (-1, to_delete)):
+            for txn in txns:
+                item = items.get(txn.item_code)
+                if item is None:
+                    continue
+                pair = (item.pk, txn.warehouse_id)
+                effects, clamp = transaction_effects(txn)
+                if not effects:
+                    continue
+                for field, delta in effects.items():
+                    deltas[pair][field] += sign * delta
+                clamps[pair].update(clamp)
+
+        items_by_id = {item.pk: item for item in items.values()}
+        rows = lock_warehouse_rows(deltas.keys(), items_by_id)
+        updated = apply_stock_deltas(
+            {rows[pair]: fields for pair, fields in deltas.items()},
+            clamps={rows[pair]: clamp for pair, clamp in clamps.items()},
+        )
+        if to_delete:
+            InventoryTransaction.objects.filter(pk__in=[txn.pk for txn in to_delete]).delete()
+        if to_create:
+            InventoryTransaction.objects.bulk_create(to_create, batch_size=500)
+
+    result.update(created=len(to_create), deleted=len(to_delete), rows=len(updated))
+    return result
+
+
+def _post_after_commit(kind, document_id):
+    result = post_document_stock(kind, document_id)
+    if result['created'] or result['deleted']:
+        print(f"✅ Stock posted for {kind}-{document_id}: {result['created']} transactions created, "
+              f"{result['deleted']} reversed, {result['rows']} warehouse rows updated")
+
+
+def schedule_document_posting(kind, document_id):
+    """
+    Post a document's stock once the current transaction commits.
+
+    Like GL posting, ``defer_once`` keeps one pending posting per document,
+    so a document is posted once however many of its lines were saved.
+    Outside an atomic block the posting runs immediately.
+    """
+    defer_once('stock_posting', (kind, document_id), _post_after_commit, kind, document_id)
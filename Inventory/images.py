@@ -0,0 +1,134 @@
+"""
+Item image pipeline.
+
+Uploads are fingerprinted with a SHA-256 content hash while the item is
+saved; an unchanged image (same hash) is never reprocessed, and saves that
+do not touch the image never open it. New images are resized off the
+request path: ``schedule_image_processing`` hands the item to a small
+in-process worker pool once the transaction commits, which writes one file
+per entry of ``IMAGE_VARIANTS`` and records them on the item. Variant
+files are named after the content hash, so identical uploads share them.
+
+Templates and serializers ask for the variant they need
+(``item.image_variant_url('thumb')``) and fall back to the original
+upload until processing has finished.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes per use: list thumbnails, detail pages, print layouts
+IMAGE_VARIANTS = {
+    'thumb': (128, 128),
+    'detail': (800, 800),
+    'print': (1600, 1600),
+}
+VARIANT_DIR = 'items/variants'
+SAVE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+_executor = None
+
+
+def image_content_hash(field_file):
+    """SHA-256 of an uploaded or stored image, read in chunks."""
+    digest = hashlib.sha256()
+    field_file.open('rb')
+    field_file.seek(0)
+    for chunk in field_file.chunks():
+        digest.update(chunk)
+    field_file.seek(0)
+    return digest.hexdigest()
+
+
+def _render_variant(image, size, image_format):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if image_format == 'JPEG' and variant.mode not in ('RGB', 'L'):
+        variant = variant.convert('RGB')
+    buffer = BytesIO()
+    variant.save(buffer, format=image_format, quality=80, optimize=True)
+    return buffer.getvalue()
+
+
+def build_variants(item, force=False):
+    """
+    Write every missing variant of ``item.image`` and return ``{name: storage name}``.
+
+    Existing files for the same content hash are reused unless ``force``
+    is set (e.g. after ``IMAGE_VARIANTS`` sizes changed).
+    """
+    storage = item.image.storage
+    with item.image.open('rb') as handle:
+        image = Image.open(handle)
+        image.load()
+    image_format = image.format if image.format in SAVE_FORMATS else 'PNG'
+    extension = SAVE_FORMATS[image_format]
+
+    variants = {}
+    for name, size in IMAGE_VARIANTS.items():
+        path = os.path.join(VARIANT_DIR, f"{item.image_hash}_{name}.{extension}")
+        if force and storage.exists(path):
+            storage.delete(path)
+        if not storage.exists(path):
+            path = storage.save(path, ContentFile(_render_variant(image, size, image_format)))
+        variants[name] = path
+    return variants
+
+
+def process_item_image(item_id, force=False):
+    """Generate the variants of one item; skipped if its image changed meanwhile."""
+    from .models import Item
+
+    item = Item.objects.filter(pk=item_id).only('id', 'image', 'image_hash', 'image_variants').first()
+    if item is None or not item.image:
+        return None
+    if not item.image_hash:
+        item.image_hash = image_content_hash(item.image)
+        Item.objects.filter(pk=item.pk).update(image_hash=item.image_hash)
+    variants = build_variants(item, force=force)
+    # Guarded by the hash so a newer upload is not overwritten with stale variants
+    Item.objects.filter(pk=item.pk, image_hash=item.image_hash).update(image_variants=variants)
+    return variants
+
+
+def _process_in_worker(item_id):
+    try:
+        process_item_image(item_id)
+    except Exception:
+        logger.exception("Image processing failed for item %s", item_id)
+    finally:
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'ITEM_IMAGE_WORKERS', 2),
+            thread_name_prefix='item-images',
+        )
+    return _executor
+
+
+def schedule_image_processing(item_id):
+    """
+    Queue an item for variant generation after the current transaction commits.
+
+    With ``ITEM_IMAGE_WORKERS = 0`` the variants are built inline instead.
+    """
+    def submit():
+        if getattr(settings, 'ITEM_IMAGE_WORKERS', 2) == 0:
+            process_item_image(item_id)
+        else:
+            _get_executor().submit(_process_in_worker, item_id)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,136 @@
+"""
+Process-local cache of item data keyed by item code.
+
+Document lines refer to items by their ``item_code`` string, and signals,
+validators and reports resolve the same handful of codes again and again.
+``item_cache`` keeps the fields those paths need (id, default warehouse,
+UoMs, prices and stock limits) in a size-bounded LRU map. Entries are
+dropped by the Item post_save/post_delete signals and expire after
+``ITEM_CODE_CACHE_TTL`` seconds, which bounds how long other worker
+processes can serve data changed elsewhere.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from .models import Item
+
+CACHED_ITEM_FIELDS = (
+    'id', 'code', 'name', 'is_active', 'default_warehouse_id',
+    'inventory_uom_id', 'purchase_uom_id', 'sales_uom_id',
+    'unit_price', 'item_cost', 'purchase_price', 'selling_price',
+    'minimum_stock', 'maximum_stock', 'reorder_point',
+)
+
+
+class CachedItem(namedtuple('CachedItem', CACHED_ITEM_FIELDS)):
+    """Read-only snapshot of an Item row; ``pk`` works as on the model."""
+    __slots__ = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+
+class ItemCodeCache:
+    """LRU map of item code to CachedItem with hit/miss counters."""
+
+    def __init__(self, maxsize=2048, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._codes_by_id = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, code, now):
+        entry = self._entries.get(code)
+        if entry is None:
+            return None
+        item, stored_at = entry
+        if self.ttl and now - stored_at > self.ttl:
+            self._discard(code)
+            return None
+        self._entries.move_to_end(code)
+        return item
+
+    def _store(self, item, now):
+        self._discard(self._codes_by_id.get(item.id))
+        self._entries[item.code] = (item, now)
+        self._entries.move_to_end(item.code)
+        self._codes_by_id[item.id] = item.code
+        while len(self._entries) > self.maxsize:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._codes_by_id.pop(evicted.id, None)
+
+    def _discard(self, code):
+        entry = self._entries.pop(code, None)
+        if entry is not None:
+            self._codes_by_id.pop(entry[0].id, None)
+
+    def get(self, code):
+        """Return the CachedItem for ``code``, or None if no such item exists."""
+        return self.get_many([code]).get(code)
+
+    def get_many(self, codes):
+        """Resolve several codes at once; misses are loaded with a single query."""
+        codes = {code for code in codes if code}
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for code in codes:
+                item = self._lookup(code, now)
+                if item is not None:
+                    found[code] = item
+            missing = codes - set(found)
+            self.hits += len(found)
+            self.misses += len(missing)
+        if missing:
+            # Unknown codes are not cached: items created later resolve at once
+            rows = Item.objects.filter(code__in=missing).values_list(*CACHED_ITEM_FIELDS)
+            loaded = [CachedItem(*row) for row in rows]
+            with self._lock:
+                for item in loaded:
+                    self._store(item, now)
+                    found[item.code] = item
+        return found
+
+    def invalidate(self, code=None, item_id=None):
+        """Drop one item (by code and/or id), or everything when called bare."""
+        with self._lock:
+            if code is None and item_id is None:
+                self._entries.clear()
+                self._codes_by_id.clear()
+                return
+            self._discard(code)
+            self._discard(self._codes_by_id.get(item_id))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+item_cache = ItemCodeCache(
+    maxsize=getattr(settings, 'ITEM_CODE_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'ITEM_CODE_CACHE_TTL', 300),
+)
+
+
+def get_cached_item(code):
+    """Shortcut for ``item_cache.get(code)``."""
+    return item_cache.get(code)
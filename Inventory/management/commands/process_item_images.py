@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from Inventory.images import process_item_image
+from Inventory.models import Item
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the thumb/detail/print variants of item images synchronously. By default only items "
+        "without variants are processed (e.g. uploads from before the image pipeline)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', nargs='+', help="Only process these item codes.")
+        parser.add_argument('--all', action='store_true', help="Rebuild variants for every item with an image, overwriting existing files.")
+
+    def handle(self, *args, **options):
+        items = Item.objects.exclude(image='').exclude(image__isnull=True)
+        if options['items']:
+            items = items.filter(code__in=options['items'])
+        if not options['all']:
+            items = items.filter(image_variants={})
+
+        done = failed = 0
+        for item_id in items.values_list('pk', flat=True).iterator():
+            try:
+                process_item_image(item_id, force=options['all'])
+                done += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Item {item_id}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} item images, {failed} failed"))
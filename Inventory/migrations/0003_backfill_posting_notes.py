@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models import Q
+
+# Mirrors Inventory.document_posting; the strings are frozen here on purpose
+ORDERED_RECEIPT_NOTE = "Received against purchase order"
+LEGACY_TRANSFER_NOTE = "Recorded before transfers moved stock"
+
+
+def backfill_posting_notes(apps, schema_editor):
+    """
+    Mark transactions posted by the old line signals so document posting
+    reverses exactly what they did: GRPO receipts that reduced a PO's ordered
+    quantity get the ordered-receipt note, and transfer legs (which never
+    moved stock) the legacy-transfer note.
+    """
+    InventoryTransaction = apps.get_model('Inventory', 'InventoryTransaction')
+    GoodsReceiptPoLine = apps.get_model('Purchase', 'GoodsReceiptPoLine')
+
+    ordered_lines = (GoodsReceiptPoLine.objects
+                     .filter(purchase_order_line__isnull=False)
+                     .values_list('goods_receipt_id', 'item_code')
+                     .distinct())
+    by_receipt = {}
+    for receipt_id, item_code in ordered_lines.iterator(chunk_size=2000):
+        by_receipt.setdefault(f"GRPO-{receipt_id}", set()).add(item_code)
+
+    receipts = (InventoryTransaction.objects
+                .filter(transaction_type='RECEIPT', reference__startswith='GRPO-', notes__isnull=True)
+                .values_list('pk', 'reference', 'item_code'))
+    ordered_ids = [pk for pk, reference, item_code in receipts.iterator(chunk_size=2000)
+                   if item_code in by_receipt.get(reference, ())]
+    for offset in range(0, len(ordered_ids), 500):
+        InventoryTransaction.objects.filter(pk__in=ordered_ids[offset:offset + 500]).update(
+            notes=ORDERED_RECEIPT_NOTE)
+
+    InventoryTransaction.objects.filter(
+        Q(notes__isnull=True) | Q(notes=''),
+        transaction_type='TRANSFER', reference__startswith='IT-',
+    ).update(notes=LEGACY_TRANSFER_NOTE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Inventory', '0002_item_image_variants'),
+        ('Purchase', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_posting_notes, migrations.RunPython.noop),
+    ]
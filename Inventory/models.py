@@ -7,8 +7,10 @@ from django.utils import timezone
 import datetime
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import gettext_lazy as _
-from PIL import Image
 import os
+
+from .images import image_content_hash, schedule_image_processing
+
 class BaseModel(models.Model):
     """Base model with common fields for all models."""
     created_at = models.DateTimeField(default=timezone.now)
@@ -76,6 +78,25 @@ class ItemGroup(BaseModel):
         if self.parent: return f"{self.parent.get_full_path()} > {self.name}"
         return self.name
 
+# Default-warehouse quantities that Item exposes as properties
+ITEM_STOCK_FIELDS = ('in_stock', 'committed', 'ordered', 'available')
+
+class ItemQuerySet(models.QuerySet):
+    def with_stock(self):
+        """
+        Annotate default-warehouse quantities as ``default_<field>`` in the same
+        SELECT (one LEFT JOIN), so the stock properties need no extra queries.
+        """
+        queryset = self.annotate(
+            default_warehouse_info=models.FilteredRelation(
+                'warehouse_info',
+                condition=models.Q(warehouse_info__warehouse=models.F('default_warehouse')),
+            )
+        )
+        return queryset.annotate(**{
+            f'default_{field}': models.F(f'default_warehouse_info__{field}') for field in ITEM_STOCK_FIELDS
+        })
+
 class Item(BaseModel):
     """Item master data"""
 
@@ -85,6 +106,8 @@ class Item(BaseModel):
     description = models.TextField(_("Description"), blank=True, null=True)
     item_group = models.ForeignKey('ItemGroup', on_delete=models.PROTECT, related_name='items', verbose_name=_("Item Group"))
     image = models.ImageField(upload_to="items/",null=True, blank=True,default="")
+    image_hash = models.CharField(_("Image Hash"), max_length=64, blank=True, default="", editable=False)
+    image_variants = models.JSONField(_("Image Variants"), default=dict, blank=True, editable=False)
 
     # Unit of Measure fields
     inventory_uom = models.ForeignKey('UnitOfMeasure', on_delete=models.PROTECT, related_name='inventory_items', verbose_name=_("Inventory UOM"))
@@ -117,6 +140,8 @@ class Item(BaseModel):
     markup_percentage = models.DecimalField(_("Markup Percentage"), max_digits=10, decimal_places=2, default=0, blank=True, null=True)
     discount_percentage = models.DecimalField(_("Discount Percentage"), max_digits=10, decimal_places=2, default=0, blank=True, null=True)
 
+    objects = ItemQuerySet.as_manager()
+
     class Meta:
         ordering = ['code']
         indexes = [
@@ -140,40 +165,76 @@ class Item(BaseModel):
         if not self.default_warehouse:
             first_warehouse = Warehouse.objects.filter(is_active=True).order_by('id').first()
             if first_warehouse:
-                self.default_warehouse = first_warehouse            
-        super().save(*args, **kwargs)  # Save first to get the image path
+                self.default_warehouse = first_warehouse
+
+        # Only a newly uploaded file is hashed; unchanged content keeps its variants
+        process_image = False
+        if self.image and not self.image._committed:
+            content_hash = image_content_hash(self.image)
+            if content_hash != self.image_hash:
+                self.image_hash = content_hash
+                self.image_variants = {}
+                process_image = True
+        elif not self.image and self.image_hash:
+            self.image_hash = ""
+            self.image_variants = {}
+        super().save(*args, **kwargs)
+
+        # Variants are built by the background image worker after commit
+        if process_image:
+            schedule_image_processing(self.pk)
 
-        # Ensure an image is uploaded
-        if self.image:
-            img_path = self.image.path
-            img = Image.open(img_path)
+    def image_variant_url(self, name):
+        """URL of an image variant ('thumb', 'detail', 'print'), or the original until it exists."""
+        if not self.image:
+            return ""
+        path = (self.image_variants or {}).get(name)
+        if path:
+            return self.image.storage.url(path)
+        return self.image.url
 
-            # Resize if the image is larger than 800x800
-            max_size = (800, 800)
-            img.thumbnail(max_size, Image.LANCZOS)
+    @property
+    def thumbnail_url(self):
+        return self.image_variant_url('thumb')
+
+    @property
+    def detail_image_url(self):
+        return self.image_variant_url('detail')
+
+    @property
+    def print_image_url(self):
+        return self.image_variant_url('print')
 
-            # Save back to the same path with compression
-            img.save(img_path, format=img.format, quality=80, optimize=True)
     @property
     def warehouse_info_data(self):
         """Retrieve warehouse info for the default warehouse if available."""
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('warehouse_info')
+        if prefetched is not None:
+            return next((info for info in prefetched if info.warehouse_id == self.default_warehouse_id), None)
         return self.warehouse_info.filter(warehouse=self.default_warehouse).first()
 
+    def _stock_quantity(self, field):
+        # Annotated by Item.objects.with_stock(); NULL when the item has no row yet
+        annotated = f'default_{field}'
+        if annotated in self.__dict__:
+            return self.__dict__[annotated] if self.__dict__[annotated] is not None else 0
+        return getattr(self.warehouse_info_data, field, 0)
+
     @property
     def in_stock(self):
-        return getattr(self.warehouse_info_data, 'in_stock', 0)
+        return self._stock_quantity('in_stock')
 
     @property
     def committed(self):
-        return getattr(self.warehouse_info_data, 'committed', 0)
+        return self._stock_quantity('committed')
 
     @property
     def ordered(self):
-        return getattr(self.warehouse_info_data, 'ordered', 0)
+        return self._stock_quantity('ordered')
 
     @property
     def available(self):
-        return getattr(self.warehouse_info_data, 'available', 0)
+        return self._stock_quantity('available')
 
 
 class ItemWarehouseInfo(BaseModel):
@@ -1,102 +1,17 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db import transaction
-from decimal import Decimal
 
-from Inventory.models import GoodsIssueLine, InventoryTransaction, Item, ItemWarehouseInfo
+from Inventory.document_posting import schedule_document_posting
+from Inventory.models import GoodsIssue, GoodsIssueLine
 
-@receiver(post_save, sender=GoodsIssueLine)
-def create_issue_transaction(sender, instance, created, **kwargs):
-    """Create or update inventory transaction when a GoodsIssueLine is saved."""
-    if instance.goods_issue.status != 'Posted':
-        return  # Only process posted documents
-        
-    try:
-        item_instance = Item.objects.get(code=instance.item_code)
-        warehouse = item_instance.default_warehouse
-        
-        with transaction.atomic():
-            # Get or create ItemWarehouseInfo
-            warehouse_info, created_info = ItemWarehouseInfo.objects.get_or_create(
-                item=item_instance,
-                warehouse=warehouse,
-                defaults={
-                    'in_stock': 0,
-                    'committed': 0,
-                    'ordered': 0,
-                    'available': 0,
-                    'min_stock': item_instance.minimum_stock,
-                    'max_stock': item_instance.maximum_stock
-                }
-            )
-            
-            # Calculate quantity change
-            old_quantity = Decimal('0')
-            if not created:
-                # Find existing transaction to determine quantity change
-                old_transaction = InventoryTransaction.objects.filter(
-                    reference=f"GI-{instance.goods_issue.id}",
-                    item_code=instance.item_code
-                ).first()
-                
-                if old_transaction:
-                    old_quantity = old_transaction.quantity
-                    
-                    # Delete existing transaction for this line if updating
-                    InventoryTransaction.objects.filter(
-                        reference=f"GI-{instance.goods_issue.id}",
-                        item_code=instance.item_code
-                    ).delete()
-            
-            # Update in_stock (add old quantity and subtract new quantity since this is an issue)
-            warehouse_info.in_stock = warehouse_info.in_stock + old_quantity - instance.quantity
-            warehouse_info.save()  # This will also update available field
-            
-            # Create new transaction
-            InventoryTransaction.objects.create(
-                item_code=instance.item_code,
-                item_name=instance.item_name,
-                warehouse=warehouse,
-                transaction_type="ISSUE",
-                quantity=instance.quantity,
-                unit_price=instance.unit_price,
-                reference=f"GI-{instance.goods_issue.id}"
-            )
-    except Item.DoesNotExist:
-        pass
+@receiver(post_save, sender=GoodsIssue)
+def post_goods_issue_stock(sender, instance, **kwargs):
+    """Post the stock of all lines when a GoodsIssue is saved (e.g. Draft -> Posted)."""
+    schedule_document_posting('GI', instance.pk)
 
 
+@receiver(post_save, sender=GoodsIssueLine)
 @receiver(post_delete, sender=GoodsIssueLine)
-def delete_issue_transaction(sender, instance, **kwargs):
-    """Delete inventory transaction when a GoodsIssueLine is deleted."""
-    if instance.goods_issue.status != 'Posted':
-        return  # Only process posted documents
-        
-    try:
-        item_instance = Item.objects.get(code=instance.item_code)
-        warehouse = item_instance.default_warehouse
-        
-        with transaction.atomic():
-            # Get transaction to determine quantity
-            transaction = InventoryTransaction.objects.filter(
-                reference=f"GI-{instance.goods_issue.id}",
-                item_code=instance.item_code
-            ).first()
-            
-            if transaction:
-                # Update warehouse info
-                warehouse_info = ItemWarehouseInfo.objects.filter(
-                    item=item_instance,
-                    warehouse=warehouse
-                ).first()
-                
-                if warehouse_info:
-                    # Add the deleted quantity back to in_stock (since this was an issue)
-                    warehouse_info.in_stock += transaction.quantity
-                    warehouse_info.save()  # This will also update available field
-                
-                # Delete the transaction
-                transaction.delete()
-    except Item.DoesNotExist:
-        pass
-
+def post_issue_transaction(sender, instance, **kwargs):
+    """Repost the GoodsIssue once the transaction commits; only posted documents move stock."""
+    schedule_document_posting('GI', instance.goods_issue_id)
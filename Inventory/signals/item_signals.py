@@ -1,9 +1,23 @@
-from django.db.models.signals import post_save
+from functools import partial
+
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 import django.db.transaction as db_transaction  # ✅ fixed here
 
+from Inventory.item_cache import item_cache
 from Inventory.models import Item, ItemWarehouseInfo, Warehouse
 
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def invalidate_item_cache(sender, instance, **kwargs):
+    """
+    Drop the item from the code cache now and again on commit, so a reader
+    in between cannot leave the pre-commit row cached.
+    """
+    invalidate = partial(item_cache.invalidate, code=instance.code, item_id=instance.pk)
+    invalidate()
+    db_transaction.on_commit(invalidate)
+
 @receiver(post_save, sender=Item)
 def create_or_update_item_warehouse_info(sender, instance, created, **kwargs):
     """
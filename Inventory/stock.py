@@ -0,0 +1,228 @@
+"""
+Stock posting service.
+
+Warehouse quantities are changed with a single UPDATE per posting that adds
+the delta in the database (``in_stock = in_stock + delta``) and recomputes
+``available`` in the same statement, so concurrent postings cannot overwrite
+each other's read-modify-write. ``post_stock`` posts one document line: it
+locks the ItemWarehouseInfo row, reverses the line's previous transaction,
+applies the net delta and records the new InventoryTransaction inside one
+atomic block.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import InventoryTransaction, ItemWarehouseInfo
+
+STOCK_FIELDS = ('in_stock', 'committed', 'ordered')
+
+# Effects of a line quantity on the warehouse figures, per posting type
+RECEIPT_EFFECTS = {'in_stock': 1}
+ISSUE_EFFECTS = {'in_stock': -1}
+SALE_EFFECTS = {'in_stock': -1, 'committed': -1}
+ORDER_EFFECTS = {'in_stock': 1, 'ordered': 1}
+
+ZERO = Decimal('0')
+
+# Rows per multi-row UPDATE statement
+UPDATE_CHUNK_SIZE = 200
+
+
+def _quantity_field():
+    return DecimalField(max_digits=18, decimal_places=6)
+
+
+def _shifted(field, delta, clamp):
+    expression = F(field) + Value(delta, output_field=_quantity_field())
+    if field in clamp:
+        expression = Greatest(expression, Value(ZERO, output_field=_quantity_field()), output_field=_quantity_field())
+    return expression
+
+
+def lock_warehouse_info(item, warehouse_id):
+    """
+    Return the pk of the item's ItemWarehouseInfo row, locked for update.
+
+    ``item`` may be an Item or a cached item. The row is created with the
+    item's stock limits when missing.
+    """
+    info_pk = (ItemWarehouseInfo.objects.select_for_update()
+               .filter(item_id=item.pk, warehouse_id=warehouse_id)
+               .values_list('pk', flat=True).first())
+    if info_pk is None:
+        info, _ = ItemWarehouseInfo.objects.get_or_create(
+            item_id=item.pk,
+            warehouse_id=warehouse_id,
+            defaults={'min_stock': item.minimum_stock, 'max_stock': item.maximum_stock},
+        )
+        info_pk = info.pk
+    return info_pk
+
+
+def lock_warehouse_rows(pairs, items):
+    """
+    Lock the ItemWarehouseInfo rows of several ``(item_id, warehouse_id)`` pairs.
+
+    Missing rows are inserted in one statement first; ``items`` maps item ids
+    to Item (or cached item) instances for their stock limits. Returns
+    ``{pair: info_pk}``.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+    item_ids = {item_id for item_id, _ in pairs}
+    warehouse_ids = {warehouse_id for _, warehouse_id in pairs}
+
+    def fetch():
+        # Locked in primary key order so concurrent postings queue instead of deadlocking
+        rows = (ItemWarehouseInfo.objects.select_for_update()
+                .filter(item_id__in=item_ids, warehouse_id__in=warehouse_ids)
+                .order_by('pk').values_list('item_id', 'warehouse_id', 'pk'))
+        return {(item_id, warehouse_id): pk for item_id, warehouse_id, pk in rows
+                if (item_id, warehouse_id) in pairs}
+
+    found = fetch()
+    missing = pairs - set(found)
+    if missing:
+        ItemWarehouseInfo.objects.bulk_create([
+            ItemWarehouseInfo(
+                item_id=item_id,
+                warehouse_id=warehouse_id,
+                min_stock=items[item_id].minimum_stock,
+                max_stock=items[item_id].maximum_stock,
+            )
+            for item_id, warehouse_id in missing
+        ], ignore_conflicts=True)
+        found = fetch()
+    return found
+
+
+def _row_values(deltas, clamp):
+    """New-value expressions for one row; ``available`` uses the old columns too."""
+    new_values = {field: _shifted(field, delta, clamp) for field, delta in deltas.items()}
+    in_stock = new_values.get('in_stock', F('in_stock'))
+    committed = new_values.get('committed', F('committed'))
+    values = {'available': in_stock - committed}
+    values.update(new_values)
+    return values
+
+
+def _clean_deltas(deltas):
+    deltas = {field: Decimal(delta) for field, delta in deltas.items() if delta}
+    unknown = set(deltas) - set(STOCK_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown stock fields: {', '.join(sorted(unknown))}")
+    return deltas
+
+
+def apply_stock_delta(info_pk, clamp=(), **deltas):
+    """
+    Add ``deltas`` (``in_stock``, ``committed``, ``ordered``) to one row.
+
+    Fields named in ``clamp`` never drop below zero. Returns True when a row
+    was updated.
+    """
+    deltas = _clean_deltas(deltas)
+    if not deltas:
+        return False
+
+    # available goes first: every expression must see the old column values
+    updates = _row_values(deltas, clamp)
+    updates['updated_at'] = timezone.now()
+    updated = ItemWarehouseInfo.objects.filter(pk=info_pk).update(**updates)
+
+    notify_stock_levels([info_pk])
+    return bool(updated)
+
+
+def apply_stock_deltas(row_deltas, clamps=None):
+    """
+    Apply per-row deltas (``{info_pk: {field: delta}}``) with one UPDATE per chunk.
+
+    Each column is set through a CASE on the primary key, so a document
+    touching hundreds of items still costs a single statement per
+    ``UPDATE_CHUNK_SIZE`` rows. ``clamps`` maps pks to fields kept at zero or above.
+    """
+    clamps = clamps or {}
+    rows = {}
+    for pk, deltas in row_deltas.items():
+        deltas = _clean_deltas(deltas)
+        if deltas:
+            rows[pk] = _row_values(deltas, clamps.get(pk, ()))
+    if not rows:
+        return []
+
+    pks = sorted(rows)
+    now = timezone.now()
+    for start in range(0, len(pks), UPDATE_CHUNK_SIZE):
+        chunk = pks[start:start + UPDATE_CHUNK_SIZE]
+        updates = {}
+        # available first, as in apply_stock_delta
+        for field in ('available',) + STOCK_FIELDS:
+            whens = [When(pk=pk, then=rows[pk][field]) for pk in chunk if field in rows[pk]]
+            if whens:
+                updates[field] = Case(*whens, default=F(field), output_field=_quantity_field())
+        updates['updated_at'] = now
+        ItemWarehouseInfo.objects.filter(pk__in=chunk).update(**updates)
+
+    notify_stock_levels(pks)
+    return pks
+
+
+def notify_stock_levels(info_pks):
+    """Run the stock level alerts that a model save would have triggered."""
+    from .signals.item_warehouse_info_signals import check_stock_levels_and_notify
+
+    for info in ItemWarehouseInfo.objects.select_related('item', 'warehouse').filter(pk__in=info_pks):
+        check_stock_levels_and_notify(sender=ItemWarehouseInfo, instance=info)
+
+
+def post_stock(item, warehouse_id, *, reference, transaction_type, effects, quantity=None,
+               item_name=None, unit_price=ZERO, notes=None, clamp=(), replace=True):
+    """
+    Post one document line to stock.
+
+    ``item`` is an Item or a cached item (see ``Inventory.item_cache``).
+    With ``replace`` the line's previous transaction (same reference, item
+    and type) is reversed and removed first. Passing ``quantity=None`` only
+    reverses, which is what deleting a line does. ``effects`` maps stock
+    fields to the sign a line quantity has on them, e.g. ``SALE_EFFECTS``.
+    Returns the net quantity change.
+    """
+    if warehouse_id is None:
+        return ZERO
+
+    with transaction.atomic():
+        info_pk = lock_warehouse_info(item, warehouse_id)
+
+        old_quantity = ZERO
+        if replace:
+            old = (InventoryTransaction.objects
+                   .filter(reference=reference, item_code=item.code, transaction_type=transaction_type)
+                   .values_list('pk', 'quantity').first())
+            if old:
+                InventoryTransaction.objects.filter(pk=old[0]).delete()
+                old_quantity = old[1]
+
+        if quantity is None and not old_quantity:
+            return ZERO
+
+        net = (quantity or ZERO) - old_quantity
+        apply_stock_delta(info_pk, clamp=clamp, **{field: sign * net for field, sign in effects.items()})
+
+        if quantity is not None:
+            InventoryTransaction.objects.create(
+                item_code=item.code,
+                item_name=item_name or item.name,
+                warehouse_id=warehouse_id,
+                transaction_type=transaction_type,
+                quantity=quantity,
+                unit_price=unit_price or ZERO,
+                reference=reference,
+                notes=notes,
+            )
+    return net
@@ -24,7 +24,8 @@ class ItemListView(GenericFilterView):
     permission_required = 'Inventory.view_item'
     
     def get_queryset(self):
-        queryset = super().get_queryset().order_by('-created_at')
+        # Stock columns come from the with_stock() join, not per-row queries
+        queryset = super().get_queryset().with_stock().select_related('item_group').order_by('-created_at')
         
         # Filter by search query if provided
         search_query = self.request.GET.get('search', '')
@@ -101,13 +102,13 @@ class ItemAllListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     permission_required = 'Inventory.view_item'
 
     def get_queryset(self):
-        return Item.objects.all().select_related(
+        return Item.objects.with_stock().select_related(
             'item_group',
             'inventory_uom',
             'purchase_uom',
             'sales_uom',
             'default_warehouse'
-        ).prefetch_related('warehouse_info__warehouse')
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -369,26 +370,23 @@ class ItemSearchAPIView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
         
         if query:
             # Search for items matching the query
-            items = Item.objects.filter(
+            items = Item.objects.with_stock().filter(
                 Q(code__icontains=query) | 
                 Q(name__icontains=query)
             ).filter(is_active=True).select_related(
                 'inventory_uom', 
                 'default_warehouse'
-            ).prefetch_related('warehouse_info__warehouse')[:100]
+            )[:100]
         else:
             # Return all active items when no query is provided
-            items = Item.objects.filter(is_active=True).select_related(
+            items = Item.objects.with_stock().filter(is_active=True).select_related(
                 'inventory_uom', 
                 'default_warehouse'
-            ).prefetch_related('warehouse_info__warehouse')[:500]
+            )[:500]
         
-        # Format the response
+        # Format the response; stock figures are annotated by with_stock()
         items_data = []
         for item in items:
-            # Get warehouse info for stock data
-            warehouse_info = item.warehouse_info.filter(warehouse=item.default_warehouse).first()
-            
             items_data.append({
                 'id': item.id,
                 'code': item.code,
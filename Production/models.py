@@ -4,6 +4,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from Inventory.models import BaseModel, Item, Warehouse, InventoryTransaction, UnitOfMeasure
+from global_settings.sequences import max_trailing_number, next_value
 
 class BOMType(models.TextChoices):
     PRODUCTION = 'Production', _('Production')
@@ -178,12 +179,10 @@ class ProductionOrder(BaseModel):
     def save(self, *args, **kwargs):
         # Generate order number if not provided
         if not self.order_number and not self.pk:
-            last_order = ProductionOrder.objects.order_by('-id').first()
-            if last_order:
-                last_id = last_order.id
-            else:
-                last_id = 0
-            self.order_number = f"PO{last_id + 1:06d}"
+            next_number = next_value('PO', seed=lambda: max_trailing_number(
+                ProductionOrder.objects.filter(order_number__startswith='PO').values_list('order_number', flat=True)
+            ))
+            self.order_number = f"PO{next_number:06d}"
             
         super().save(*args, **kwargs)
     def get_completion_percentage(self):
@@ -249,12 +248,10 @@ class ProductionReceipt(BaseModel):
     def save(self, *args, **kwargs):
         # Generate receipt number if not provided
         if not self.receipt_number and not self.pk:
-            last_receipt = ProductionReceipt.objects.order_by('-id').first()
-            if last_receipt:
-                last_id = last_receipt.id
-            else:
-                last_id = 0
-            self.receipt_number = f"PR{last_id + 1:06d}"
+            next_number = next_value('PR', seed=lambda: max_trailing_number(
+                ProductionReceipt.objects.filter(receipt_number__startswith='PR').values_list('receipt_number', flat=True)
+            ))
+            self.receipt_number = f"PR{next_number:06d}"
             
         super().save(*args, **kwargs)
         
@@ -350,12 +347,10 @@ class ProductionIssue(BaseModel):
     def save(self, *args, **kwargs):
         # Generate issue number if not provided
         if not self.issue_number and not self.pk:
-            last_issue = ProductionIssue.objects.order_by('-id').first()
-            if last_issue:
-                last_id = last_issue.id
-            else:
-                last_id = 0
-            self.issue_number = f"PI{last_id + 1:06d}"
+            next_number = next_value('PI', seed=lambda: max_trailing_number(
+                ProductionIssue.objects.filter(issue_number__startswith='PI').values_list('issue_number', flat=True)
+            ))
+            self.issue_number = f"PI{next_number:06d}"
             
         super().save(*args, **kwargs)
 
@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Sales.rollups import ROLLUP_SOURCES, rebuild_sales_rollups
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily sales rollups read by the sales dashboards from the source documents. "
+        "Run after bulk imports or any change that bypassed model signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help="First document date to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--to', dest='end', help="Last document date to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--types', nargs='+', choices=sorted(ROLLUP_SOURCES),
+                            help="Only rebuild these document types.")
+
+    def handle(self, *args, **options):
+        start = _parse_date(options['start']) if options['start'] else None
+        end = _parse_date(options['end']) if options['end'] else None
+        if start and end and start > end:
+            raise CommandError("--from must not be after --to.")
+
+        result = rebuild_sales_rollups(start, end, options['types'])
+        for document_type, (documents, items) in result.items():
+            self.stdout.write(f"{document_type}: {documents} document rows, {items} item rows")
+        self.stdout.write(self.style.SUCCESS("Sales rollups rebuilt."))
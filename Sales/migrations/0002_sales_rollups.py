@@ -0,0 +1,54 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BusinessPartnerMasterData', '0001_initial'),
+        ('Sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesItemDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('document_type', models.CharField(choices=[('QUO', 'Sales Quotation'), ('SO', 'Sales Order'), ('DEL', 'Delivery'), ('RET', 'Return'), ('INV', 'A/R Invoice')], max_length=3, verbose_name='Document Type')),
+                ('item_code', models.CharField(max_length=50, verbose_name='Item Code')),
+                ('item_name', models.CharField(max_length=100, verbose_name='Item Name')),
+                ('line_count', models.PositiveIntegerField(default=0, verbose_name='Lines')),
+                ('quantity', models.DecimalField(decimal_places=6, default=0, max_digits=18, verbose_name='Quantity')),
+                ('total_amount', models.DecimalField(decimal_places=6, default=0, max_digits=18, verbose_name='Total Amount')),
+            ],
+            options={
+                'verbose_name': 'Sales Item Daily Rollup',
+                'verbose_name_plural': 'Sales Item Daily Rollups',
+                'indexes': [models.Index(fields=['document_type', 'date'], name='Sales_sales_documen_224f71_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SalesDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('document_type', models.CharField(choices=[('QUO', 'Sales Quotation'), ('SO', 'Sales Order'), ('DEL', 'Delivery'), ('RET', 'Return'), ('INV', 'A/R Invoice')], max_length=3, verbose_name='Document Type')),
+                ('delivery_employee', models.CharField(blank=True, max_length=100, null=True, verbose_name='Delivery Employee')),
+                ('document_count', models.PositiveIntegerField(default=0, verbose_name='Documents')),
+                ('total_amount', models.DecimalField(decimal_places=6, default=0, max_digits=18, verbose_name='Total Amount')),
+                ('draft_count', models.PositiveIntegerField(default=0, verbose_name='Draft Documents')),
+                ('draft_amount', models.DecimalField(decimal_places=6, default=0, max_digits=18, verbose_name='Draft Amount')),
+                ('invoice_count', models.PositiveIntegerField(default=0, help_text='Sales orders only: invoices raised against them.', verbose_name='Linked Invoices')),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='BusinessPartnerMasterData.businesspartner', verbose_name='Customer')),
+                ('sales_employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='Sales.salesemployee', verbose_name='Sales Employee')),
+            ],
+            options={
+                'verbose_name': 'Sales Daily Rollup',
+                'verbose_name_plural': 'Sales Daily Rollups',
+                'indexes': [models.Index(fields=['document_type', 'date'], name='Sales_sales_documen_a8a025_idx'), models.Index(fields=['date'], name='Sales_sales_date_601795_idx')],
+            },
+        ),
+    ]
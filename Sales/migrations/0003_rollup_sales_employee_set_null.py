@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-18 11:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sales', '0002_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='salesdailyrollup',
+            name='sales_employee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales_rollups', to='Sales.salesemployee', verbose_name='Sales Employee'),
+        ),
+    ]
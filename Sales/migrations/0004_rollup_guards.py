@@ -0,0 +1,55 @@
+# Generated by Django 4.2.20 on 2026-10-18 11:16
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_rollups(apps, schema_editor):
+    """Keep one row per rollup key; duplicates were left by refreshes that interleaved."""
+    keys = {
+        'SalesDailyRollup': ('date', 'document_type', 'customer', 'sales_employee', 'delivery_employee'),
+        'SalesItemDailyRollup': ('date', 'document_type', 'item_code', 'item_name'),
+    }
+    for model_name, fields in keys.items():
+        model = apps.get_model('Sales', model_name)
+        duplicates = (model.objects.values(*fields).order_by()
+                      .annotate(rows=Count('id'), keep=Min('id')).filter(rows__gt=1))
+        for group in duplicates:
+            key = {field: group[field] for field in fields}
+            model.objects.filter(**key).exclude(pk=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Sales', '0003_rollup_sales_employee_set_null'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_rollups, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='SalesRollupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('document_type', models.CharField(choices=[('QUO', 'Sales Quotation'), ('SO', 'Sales Order'), ('DEL', 'Delivery'), ('RET', 'Return'), ('INV', 'A/R Invoice')], max_length=3, verbose_name='Document Type')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Refreshed At')),
+            ],
+            options={
+                'verbose_name': 'Sales Rollup Day',
+                'verbose_name_plural': 'Sales Rollup Days',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='salesdailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'document_type', 'customer', 'sales_employee', 'delivery_employee'), name='sales_daily_rollup_unique_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='salesitemdailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'document_type', 'item_code', 'item_name'), name='sales_item_daily_rollup_unique_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='salesrollupday',
+            constraint=models.UniqueConstraint(fields=('date', 'document_type'), name='sales_rollup_day_unique'),
+        ),
+    ]
@@ -11,6 +11,7 @@ from django.utils.translation import gettext_lazy as _
 from Inventory.models import BaseModel, Item, Warehouse, InventoryTransaction
 from BusinessPartnerMasterData.models import BusinessPartner, Address, ContactPerson
 from global_settings.models import Currency, PaymentTerms
+from global_settings.sequences import max_trailing_number, next_value
 from .utils import validate_sales_order_line_stock 
 
 class SalesEmployee(BaseModel):
@@ -104,13 +105,11 @@ class SalesQuotation(BaseModel):
         # Generate document_no if not already set
         if not self.document_no:
             year = datetime.datetime.now().year
-            last_sq = SalesQuotation.objects.filter(document_no__startswith=f'SQ-{year}-').order_by('-id').first()
-            if last_sq:
-                last_num = int(last_sq.document_no.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.document_no = f'SQ-{year}-{new_num:04d}'
+            prefix = f'SQ-{year}-'
+            new_num = next_value('SQ', year=year, seed=lambda: max_trailing_number(
+                SalesQuotation.objects.filter(document_no__startswith=prefix).values_list('document_no', flat=True)
+            ))
+            self.document_no = f'{prefix}{new_num:04d}'
 
         # Calculate Total Amount from Lines (assuming lines are already added or will be calculated by signals/utilities)
         if self.pk:  # Only if the object is saved (otherwise no lines exist)
@@ -214,13 +213,11 @@ class SalesOrder(BaseModel):
         # Generate document_no if not already set
         if not self.document_no:
             year = datetime.datetime.now().year
-            last_so = SalesOrder.objects.filter(document_no__startswith=f'SO-{year}-').order_by('-id').first()
-            if last_so:
-                last_num = int(last_so.document_no.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.document_no = f'SO-{year}-{new_num:04d}'
+            prefix = f'SO-{year}-'
+            new_num = next_value('SO', year=year, seed=lambda: max_trailing_number(
+                SalesOrder.objects.filter(document_no__startswith=prefix).values_list('document_no', flat=True)
+            ))
+            self.document_no = f'{prefix}{new_num:04d}'
 
         # ✅ Calculate Total Amount from Lines
         if self.pk:  
@@ -636,3 +633,100 @@ class FreeItemDiscount(BaseModel):
 
     def __str__(self):
         return f"Buy {self.buy_quantity} of {self.item.name} get {self.free_quantity} of {self.free_item.name} free"
+
+
+# --- Dashboard Rollups ---
+ROLLUP_DOCUMENT_TYPES = [
+    ('QUO', _('Sales Quotation')),
+    ('SO', _('Sales Order')),
+    ('DEL', _('Delivery')),
+    ('RET', _('Return')),
+    ('INV', _('A/R Invoice')),
+]
+
+
+class SalesDailyRollup(models.Model):
+    """
+    Document totals per day, document type, customer and sales employee.
+
+    Maintained by the rollup signals (see ``Sales.rollups``); rebuild with
+    ``manage.py rebuild_sales_rollups`` after bulk changes to documents.
+    """
+    date = models.DateField(_("Date"))
+    document_type = models.CharField(_("Document Type"), max_length=3, choices=ROLLUP_DOCUMENT_TYPES)
+    customer = models.ForeignKey(BusinessPartner, on_delete=models.CASCADE, null=True, blank=True,
+                                 related_name='sales_rollups', verbose_name=_("Customer"))
+    sales_employee = models.ForeignKey(SalesEmployee, on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='sales_rollups', verbose_name=_("Sales Employee"))
+    delivery_employee = models.CharField(_("Delivery Employee"), max_length=100, null=True, blank=True)
+    document_count = models.PositiveIntegerField(_("Documents"), default=0)
+    total_amount = models.DecimalField(_("Total Amount"), max_digits=18, decimal_places=6, default=0)
+    draft_count = models.PositiveIntegerField(_("Draft Documents"), default=0)
+    draft_amount = models.DecimalField(_("Draft Amount"), max_digits=18, decimal_places=6, default=0)
+    invoice_count = models.PositiveIntegerField(_("Linked Invoices"), default=0,
+                                                help_text=_("Sales orders only: invoices raised against them."))
+
+    class Meta:
+        verbose_name = _("Sales Daily Rollup")
+        verbose_name_plural = _("Sales Daily Rollups")
+        indexes = [
+            models.Index(fields=['document_type', 'date']),
+            models.Index(fields=['date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'document_type', 'customer', 'sales_employee', 'delivery_employee'],
+                name='sales_daily_rollup_unique_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.document_type} {self.date}: {self.document_count} / {self.total_amount}"
+
+
+class SalesItemDailyRollup(models.Model):
+    """Line quantities and amounts per day, document type and item."""
+    date = models.DateField(_("Date"))
+    document_type = models.CharField(_("Document Type"), max_length=3, choices=ROLLUP_DOCUMENT_TYPES)
+    item_code = models.CharField(_("Item Code"), max_length=50)
+    item_name = models.CharField(_("Item Name"), max_length=100)
+    line_count = models.PositiveIntegerField(_("Lines"), default=0)
+    quantity = models.DecimalField(_("Quantity"), max_digits=18, decimal_places=6, default=0)
+    total_amount = models.DecimalField(_("Total Amount"), max_digits=18, decimal_places=6, default=0)
+
+    class Meta:
+        verbose_name = _("Sales Item Daily Rollup")
+        verbose_name_plural = _("Sales Item Daily Rollups")
+        indexes = [
+            models.Index(fields=['document_type', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'document_type', 'item_code', 'item_name'],
+                name='sales_item_daily_rollup_unique_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.document_type} {self.date}: {self.item_code} x {self.quantity}"
+
+
+class SalesRollupDay(models.Model):
+    """
+    Guard row per (day, document type). Rollup refreshes lock it with
+    ``select_for_update`` so two refreshes of the same day run one after
+    the other instead of interleaving their delete and insert.
+    """
+    date = models.DateField(_("Date"))
+    document_type = models.CharField(_("Document Type"), max_length=3, choices=ROLLUP_DOCUMENT_TYPES)
+    refreshed_at = models.DateTimeField(_("Refreshed At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Sales Rollup Day")
+        verbose_name_plural = _("Sales Rollup Days")
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'document_type'], name='sales_rollup_day_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.document_type} {self.date}"
@@ -0,0 +1,308 @@
+"""
+Daily sales rollups for the dashboards.
+
+SalesDailyRollup holds document totals per (day, document type, customer,
+sales employee, delivery employee) and SalesItemDailyRollup line totals per
+(day, document type, item). The signals in ``Sales.signals.rollup_signals``
+do not adjust them row by row: a document or line change schedules
+``refresh_sales_rollups`` for the days it touched, which runs once per
+document type when the transaction commits and rebuilds just those days
+from the source documents with a few grouped queries. That stays correct
+across date changes, status changes and deletes without tracking what each
+document contributed. The compute and replace run in one transaction that
+holds a SalesRollupDay guard row per refreshed day, so two refreshes of the
+same day cannot interleave.
+
+Dashboards read totals through ``RollupTotals`` and the ``top_*`` helpers,
+which only scan rollup rows.
+"""
+from collections import defaultdict, namedtuple
+from datetime import date
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from global_settings.on_commit import defer_once
+
+from .models import SalesDailyRollup, SalesItemDailyRollup, SalesRollupDay
+
+RollupSource = namedtuple('RollupSource', 'model line_model header_field')
+
+ROLLUP_SOURCES = {
+    'QUO': RollupSource('Sales.SalesQuotation', 'Sales.SalesQuotationLine', 'quotation'),
+    'SO': RollupSource('Sales.SalesOrder', 'Sales.SalesOrderLine', 'order'),
+    'DEL': RollupSource('Sales.Delivery', 'Sales.DeliveryLine', 'delivery'),
+    'RET': RollupSource('Sales.Return', 'Sales.ReturnLine', 'return_doc'),
+    'INV': RollupSource('Sales.ARInvoice', 'Sales.ARInvoiceLine', 'invoice'),
+}
+
+ZERO = Decimal('0')
+
+
+def _amount_field():
+    return DecimalField(max_digits=18, decimal_places=6)
+
+
+def _sum(field, **kwargs):
+    return Coalesce(Sum(field, **kwargs), Value(ZERO, output_field=_amount_field()), output_field=_amount_field())
+
+
+def _document_rows(document_type, date_filter):
+    source = ROLLUP_SOURCES[document_type]
+    keys = ['document_date', 'customer_id', 'sales_employee_id']
+    if document_type == 'DEL':
+        keys.append('deliveryemployee')
+    groups = (apps.get_model(source.model).objects
+              .filter(**{f'document_date{lookup}': value for lookup, value in date_filter.items()})
+              .values(*keys).order_by()
+              .annotate(documents=Count('id'),
+                        amount=_sum('total_amount'),
+                        drafts=Count('id', filter=Q(status='Draft')),
+                        draft_total=_sum('total_amount', filter=Q(status='Draft'))))
+
+    invoice_counts = {}
+    if document_type == 'SO':
+        # Counted separately: joining invoices above would repeat order totals
+        linked = (apps.get_model('Sales.ARInvoice').objects
+                  .filter(**{f'sales_order__document_date{lookup}': value for lookup, value in date_filter.items()})
+                  .values_list('sales_order__document_date', 'sales_order__customer_id',
+                               'sales_order__sales_employee_id')
+                  .order_by().annotate(count=Count('id')))
+        invoice_counts = {(day, customer_id, employee_id): count for day, customer_id, employee_id, count in linked}
+
+    return [
+        SalesDailyRollup(
+            date=group['document_date'],
+            document_type=document_type,
+            customer_id=group['customer_id'],
+            sales_employee_id=group['sales_employee_id'],
+            delivery_employee=group.get('deliveryemployee'),
+            document_count=group['documents'],
+            total_amount=group['amount'],
+            draft_count=group['drafts'],
+            draft_amount=group['draft_total'],
+            invoice_count=invoice_counts.get(
+                (group['document_date'], group['customer_id'], group['sales_employee_id']), 0),
+        )
+        for group in groups
+    ]
+
+
+def _item_rows(document_type, date_filter):
+    source = ROLLUP_SOURCES[document_type]
+    date_field = f'{source.header_field}__document_date'
+    line_amount = ExpressionWrapper(F('quantity') * F('unit_price'), output_field=_amount_field())
+    groups = (apps.get_model(source.line_model).objects
+              .filter(**{f'{date_field}{lookup}': value for lookup, value in date_filter.items()})
+              .values(date_field, 'item_code', 'item_name').order_by()
+              .annotate(line_count=Count('id'), quantity_total=_sum('quantity'), amount_total=_sum(line_amount)))
+    return [
+        SalesItemDailyRollup(
+            date=group[date_field],
+            document_type=document_type,
+            item_code=group['item_code'],
+            item_name=group['item_name'],
+            line_count=group['line_count'],
+            quantity=group['quantity_total'],
+            total_amount=group['amount_total'],
+        )
+        for group in groups
+    ]
+
+
+def _rollup_days(document_type, date_filter):
+    """Days matched by ``date_filter`` that have source documents or rollup rows."""
+    source = ROLLUP_SOURCES[document_type]
+    rollup_filter = {f'date{lookup}': value for lookup, value in date_filter.items()}
+    days = set(apps.get_model(source.model).objects
+               .filter(**{f'document_date{lookup}': value for lookup, value in date_filter.items()})
+               .order_by().values_list('document_date', flat=True).distinct())
+    days.update(SalesDailyRollup.objects.filter(document_type=document_type, **rollup_filter)
+                .order_by().values_list('date', flat=True).distinct())
+    days.update(SalesItemDailyRollup.objects.filter(document_type=document_type, **rollup_filter)
+                .order_by().values_list('date', flat=True).distinct())
+    return days
+
+
+def _lock_days(document_type, days):
+    """Create the missing guard rows of ``days`` and lock them all; call inside a transaction."""
+    # Writing first also takes SQLite's write lock up front, before any read in the transaction
+    SalesRollupDay.objects.bulk_create(
+        [SalesRollupDay(date=day, document_type=document_type) for day in days],
+        batch_size=500, ignore_conflicts=True)
+    # A fixed lock order keeps overlapping refreshes from deadlocking
+    locked = (SalesRollupDay.objects.select_for_update()
+              .filter(document_type=document_type, date__in=days).order_by('date'))
+    return list(locked.values_list('pk', flat=True))
+
+
+def _replace_rows(document_type, date_filter, days=None):
+    """
+    Recompute and replace the rollups of the filtered days in one transaction,
+    holding the days' guard rows so concurrent refreshes of a day serialise.
+    ``days`` lists the days of ``date_filter`` when the caller knows them.
+    """
+    if days is None:
+        days = _rollup_days(document_type, date_filter)
+    rollup_filter = {f'date{lookup}': value for lookup, value in date_filter.items()}
+    with transaction.atomic():
+        guard_ids = _lock_days(document_type, days)
+        documents = _document_rows(document_type, date_filter)
+        items = _item_rows(document_type, date_filter)
+        SalesDailyRollup.objects.filter(document_type=document_type, **rollup_filter).delete()
+        SalesItemDailyRollup.objects.filter(document_type=document_type, **rollup_filter).delete()
+        SalesDailyRollup.objects.bulk_create(documents, batch_size=500)
+        SalesItemDailyRollup.objects.bulk_create(items, batch_size=500)
+        SalesRollupDay.objects.filter(pk__in=guard_ids).update(refreshed_at=timezone.now())
+    return len(documents), len(items)
+
+
+def refresh_sales_rollups(document_type, dates):
+    """Recompute the rollups of one document type for the given days."""
+    dates = sorted({day for day in dates if day is not None})
+    if not dates:
+        return 0, 0
+    return _replace_rows(document_type, {'__in': dates}, days=dates)
+
+
+def rebuild_sales_rollups(start=None, end=None, document_types=None):
+    """
+    Rebuild rollups from scratch, optionally limited to a date range.
+
+    Returns ``{document_type: (document rows, item rows)}``.
+    """
+    if start and end:
+        date_filter = {'__range': (start, end)}
+    elif start:
+        date_filter = {'__gte': start}
+    elif end:
+        date_filter = {'__lte': end}
+    else:
+        date_filter = {'__isnull': False}
+    return {document_type: _replace_rows(document_type, date_filter)
+            for document_type in (document_types or ROLLUP_SOURCES)}
+
+
+def schedule_rollup_refresh(document_type, *dates):
+    """
+    Refresh the given days once the current transaction commits.
+
+    As with stock and GL posting, ``defer_once`` keeps one pending refresh
+    per document type; further days are added to it, so a transaction
+    saving many documents refreshes each type once.
+    """
+    dates = {day for day in dates if day is not None}
+    if dates:
+        batch = defer_once('sales_rollups', document_type, refresh_sales_rollups, document_type, dates)
+        if batch.args[1] is not dates:
+            batch.args[1].update(dates)
+
+
+# ------------------------------------------------------------------
+# Readers
+# ------------------------------------------------------------------
+class RollupTotals:
+    """Per document type, per day totals of a date range, loaded with one query."""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        rows = (SalesDailyRollup.objects
+                .filter(date__range=[start, end])
+                .values('document_type', 'date').order_by()
+                .annotate(count=Sum('document_count'), total=_sum('total_amount'),
+                          draft_count=Sum('draft_count'), draft_total=_sum('draft_amount')))
+        self._days = defaultdict(dict)
+        for row in rows:
+            self._days[row['document_type']][row['date']] = row
+
+    def _rows(self, document_type, start, end):
+        return [row for day, row in self._days[document_type].items() if start <= day <= end]
+
+    def totals(self, document_type, start, end, drafts_only=False):
+        """``{'total', 'count'}`` as the dashboards' aggregate queries returned them."""
+        rows = self._rows(document_type, start, end)
+        if drafts_only:
+            return {'total': sum((row['draft_total'] for row in rows), ZERO),
+                    'count': sum(row['draft_count'] for row in rows)}
+        return {'total': sum((row['total'] for row in rows), ZERO),
+                'count': sum(row['count'] for row in rows)}
+
+    def daily(self, document_type, start, end):
+        """``{date: total}`` for the days that have documents."""
+        return {row['date']: row['total'] for row in self._rows(document_type, start, end)}
+
+    def monthly(self, document_type, start, end):
+        """``{first day of month: total}``."""
+        months = defaultdict(Decimal)
+        for row in self._rows(document_type, start, end):
+            months[date(row['date'].year, row['date'].month, 1)] += row['total']
+        return dict(months)
+
+
+def top_items(document_type, start, end, limit=5):
+    """Best-selling items by line amount, shaped like the old SalesOrderLine aggregate."""
+    rows = (SalesItemDailyRollup.objects
+            .filter(document_type=document_type, date__range=[start, end])
+            .values('item_name').order_by()
+            .annotate(total_quantity=Sum('quantity'), total_sales=Sum('total_amount'))
+            .order_by('-total_sales')[:limit])
+    result = []
+    for row in rows:
+        quantity = row['total_quantity'] or ZERO
+        row['avg_price'] = row['total_sales'] / quantity if quantity else ZERO
+        result.append(row)
+    return result
+
+
+def top_customers(start, end, limit=5):
+    """Customers with the highest sales order totals."""
+    return list(SalesDailyRollup.objects
+                .filter(document_type='SO', date__range=[start, end], customer__isnull=False)
+                .values('customer__id', 'customer__name').order_by()
+                .annotate(customer_name=F('customer__name'),
+                          order_count=Sum('document_count'),
+                          invoice_count=Sum('invoice_count'),
+                          total_sales=Sum('total_amount'))
+                .order_by('-total_sales')[:limit])
+
+
+def sales_employee_totals(start, end):
+    """Sales order count and amount per sales employee, largest first."""
+    rows = (SalesDailyRollup.objects
+            .filter(document_type='SO', date__range=[start, end], sales_employee__isnull=False)
+            .values('sales_employee_id', 'sales_employee__name').order_by()
+            .annotate(order_count=Sum('document_count'), total_amount=Sum('total_amount'))
+            .order_by('-total_amount'))
+    return [
+        {
+            'employee_id': row['sales_employee_id'],
+            'employee_name': row['sales_employee__name'],
+            'order_count': row['order_count'],
+            'total_amount': row['total_amount'],
+            'avg_order': row['total_amount'] / row['order_count'] if row['order_count'] else 0,
+        }
+        for row in rows if row['order_count']
+    ]
+
+
+def delivery_employee_totals(start, end):
+    """Delivery count and amount per delivery employee, largest first."""
+    rows = (SalesDailyRollup.objects
+            .filter(document_type='DEL', date__range=[start, end], delivery_employee__isnull=False)
+            .values('delivery_employee').order_by()
+            .annotate(delivery_count=Sum('document_count'), total_amount=Sum('total_amount'))
+            .order_by('-total_amount'))
+    return [
+        {
+            'delivery_employee_name': row['delivery_employee'],
+            'delivery_count': row['delivery_count'],
+            'total_amount': row['total_amount'],
+            'avg_delivery': row['total_amount'] / row['delivery_count'] if row['delivery_count'] else 0,
+        }
+        for row in rows
+    ]
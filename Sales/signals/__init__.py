@@ -2,4 +2,4 @@ from .sales_signals import *
 from .delivery_signals import *
 from .return_signals import *
 from .discount_signal import *
-
+from .rollup_signals import *
@@ -0,0 +1,77 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from Sales.models import (
+    ARInvoice, ARInvoiceLine, Delivery, DeliveryLine, Return, ReturnLine,
+    SalesOrder, SalesOrderLine, SalesQuotation, SalesQuotationLine,
+)
+from Sales.rollups import schedule_rollup_refresh
+
+ROLLUP_HEADERS = {
+    SalesQuotation: 'QUO',
+    SalesOrder: 'SO',
+    Delivery: 'DEL',
+    Return: 'RET',
+    ARInvoice: 'INV',
+}
+ROLLUP_LINES = {
+    SalesQuotationLine: ('QUO', 'quotation'),
+    SalesOrderLine: ('SO', 'order'),
+    DeliveryLine: ('DEL', 'delivery'),
+    ReturnLine: ('RET', 'return_doc'),
+    ARInvoiceLine: ('INV', 'invoice'),
+}
+
+
+def _sales_order_date(sales_order_id):
+    if sales_order_id is None:
+        return None
+    return SalesOrder.objects.filter(pk=sales_order_id).values_list('document_date', flat=True).first()
+
+
+# ------------------------------------------
+# ✅ ডকুমেন্ট সেভের আগে পুরনো তারিখ মনে রাখা হবে
+# ------------------------------------------
+def remember_rollup_dates(sender, instance, **kwargs):
+    """
+    তারিখ বদলালে পুরনো দিনের রোলআপও রিফ্রেশ করতে হবে
+    """
+    if instance.pk is None:
+        return
+    fields = ['document_date', 'sales_order__document_date'] if sender is ARInvoice else ['document_date']
+    previous = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    instance._rollup_previous_dates = previous or ()
+
+
+# ------------------------------------------
+# ✅ ডকুমেন্ট সেভ বা ডিলিট হলে সংশ্লিষ্ট দিনের রোলআপ কমিটের পর রিফ্রেশ হবে
+# ------------------------------------------
+def refresh_document_rollups(sender, instance, **kwargs):
+    document_type = ROLLUP_HEADERS[sender]
+    previous = getattr(instance, '_rollup_previous_dates', ())
+    schedule_rollup_refresh(document_type, instance.document_date, *previous[:1])
+
+    if sender is ARInvoice:
+        # Invoices count towards the rollup of the order they were raised against
+        schedule_rollup_refresh('SO', _sales_order_date(instance.sales_order_id), *previous[1:])
+
+
+# ------------------------------------------
+# ✅ লাইন তৈরি, আপডেট বা ডিলিট হলে হেডারের দিনের রোলআপ রিফ্রেশ হবে
+# ------------------------------------------
+def refresh_line_rollups(sender, instance, **kwargs):
+    document_type, header_field = ROLLUP_LINES[sender]
+    try:
+        header = getattr(instance, header_field)
+    except ObjectDoesNotExist:
+        return  # header deleted as well; its own signal refreshes the day
+    schedule_rollup_refresh(document_type, header.document_date)
+
+
+for model in ROLLUP_HEADERS:
+    pre_save.connect(remember_rollup_dates, sender=model, dispatch_uid=f'rollup_dates_{model.__name__}')
+    post_save.connect(refresh_document_rollups, sender=model, dispatch_uid=f'rollup_save_{model.__name__}')
+    post_delete.connect(refresh_document_rollups, sender=model, dispatch_uid=f'rollup_delete_{model.__name__}')
+for model in ROLLUP_LINES:
+    post_save.connect(refresh_line_rollups, sender=model, dispatch_uid=f'rollup_line_save_{model.__name__}')
+    post_delete.connect(refresh_line_rollups, sender=model, dispatch_uid=f'rollup_line_delete_{model.__name__}')
@@ -11,6 +11,7 @@ from django.utils.translation import gettext_lazy as _
 # like 'Inventory' and do not cause circular imports with 'Sales.models'.
 # So, they can remain at the top.
 from Inventory.models import Item, Warehouse, ItemWarehouseInfo
+from Inventory.item_cache import get_cached_item
 
 
 def calculate_delivered_quantities(sales_order):
@@ -62,53 +63,52 @@ def validate_sales_order_line_stock(sales_order_line_instance):
     # Local import: SalesOrderLine is from Sales.models
     from .models import SalesOrderLine
 
-    try:
-        # Item and Warehouse are imported at the top from Inventory.models, which is fine.
-        item = Item.objects.get(code=sales_order_line_instance.item_code)
-        warehouse = item.default_warehouse
-
-        if not warehouse:
-            raise ValidationError(_("Default warehouse not set for item: %(item_name)s"),
-                                  params={'item_name': item.name}) # Changed from item.item_name to item.name
-
-        # Get the ItemWarehouseInfo for the item and its default warehouse
-        item_warehouse_info = ItemWarehouseInfo.objects.filter(item=item, warehouse=warehouse).first()
-
-        if not item_warehouse_info:
-            raise ValidationError(_("Item '%(item_name)s' is not available in the default warehouse."),
-                                  params={'item_name': item.name}) # Changed from item.item_name to item.name
-
-        # Determine the quantity to check against
-        old_quantity = Decimal('0.000000')
-        if sales_order_line_instance.pk:
-            try:
-                # We need to fetch the old instance to calculate the change in quantity.
-                # SalesOrderLine is imported locally above.
-                old_instance = SalesOrderLine.objects.get(pk=sales_order_line_instance.pk)
-                old_quantity = old_instance.quantity
-            except SalesOrderLine.DoesNotExist:
-                # This case should ideally not happen if pk exists, but good for robustness.
-                pass
-
-        # Calculate the effective quantity needed for this transaction (delta)
-        effective_quantity_change = sales_order_line_instance.quantity - old_quantity
-
-        # Only check if effective_quantity_change is positive (i.e., quantity is increasing or a new line)
-        if effective_quantity_change > 0 and item_warehouse_info.available < effective_quantity_change:
-            raise ValidationError(
-                _("Insufficient stock for item '%(item_name)s' in warehouse '%(warehouse_name)s'. Available: %(available_stock)s, Required: %(required_quantity)s"),
-                params={
-                    'item_name': item.name, # Changed from item.item_name to item.name
-                    'warehouse_name': warehouse.name,
-                    'available_stock': item_warehouse_info.available,
-                    'required_quantity': sales_order_line_instance.quantity # Show the total requested quantity
-                }
-            )
-
-    except Item.DoesNotExist:
+    # Item data comes from the process-local code cache
+    item = get_cached_item(sales_order_line_instance.item_code)
+    if item is None:
         raise ValidationError(_("Item with code '%(item_code)s' does not exist."),
                               params={'item_code': sales_order_line_instance.item_code})
 
+    if not item.default_warehouse_id:
+        raise ValidationError(_("Default warehouse not set for item: %(item_name)s"),
+                              params={'item_name': item.name}) # Changed from item.item_name to item.name
+
+    # Get the ItemWarehouseInfo for the item and its default warehouse
+    item_warehouse_info = ItemWarehouseInfo.objects.select_related('warehouse').filter(
+        item_id=item.id, warehouse_id=item.default_warehouse_id
+    ).first()
+
+    if not item_warehouse_info:
+        raise ValidationError(_("Item '%(item_name)s' is not available in the default warehouse."),
+                              params={'item_name': item.name}) # Changed from item.item_name to item.name
+
+    # Determine the quantity to check against
+    old_quantity = Decimal('0.000000')
+    if sales_order_line_instance.pk:
+        try:
+            # We need to fetch the old instance to calculate the change in quantity.
+            # SalesOrderLine is imported locally above.
+            old_instance = SalesOrderLine.objects.get(pk=sales_order_line_instance.pk)
+            old_quantity = old_instance.quantity
+        except SalesOrderLine.DoesNotExist:
+            # This case should ideally not happen if pk exists, but good for robustness.
+            pass
+
+    # Calculate the effective quantity needed for this transaction (delta)
+    effective_quantity_change = sales_order_line_instance.quantity - old_quantity
+
+    # Only check if effective_quantity_change is positive (i.e., quantity is increasing or a new line)
+    if effective_quantity_change > 0 and item_warehouse_info.available < effective_quantity_change:
+        raise ValidationError(
+            _("Insufficient stock for item '%(item_name)s' in warehouse '%(warehouse_name)s'. Available: %(available_stock)s, Required: %(required_quantity)s"),
+            params={
+                'item_name': item.name, # Changed from item.item_name to item.name
+                'warehouse_name': item_warehouse_info.warehouse.name,
+                'available_stock': item_warehouse_info.available,
+                'required_quantity': sales_order_line_instance.quantity # Show the total requested quantity
+            }
+        )
+
 def prepare_delivery_from_order(sales_order, user=None):
     """
     Prepare delivery data from a sales order
@@ -191,17 +191,16 @@ def adjust_committed_quantity(line):
     Adjusts the committed quantity for an item in ItemWarehouseInfo.
     This function is related to handling free items.
     """
-    # Item and ItemWarehouseInfo are imported globally at the top of utils.py.
+    # ItemWarehouseInfo is imported globally; item data comes from the code cache.
     # SalesOrderLine is needed for querying, so it's imported locally.
     from .models import SalesOrderLine
 
-    try:
-        item = Item.objects.get(code=line.item_code)
-        warehouse = item.default_warehouse
-        if not warehouse:
-            return
+    item = get_cached_item(line.item_code)
+    if item is None or not item.default_warehouse_id:
+        return
 
-        item_warehouse = ItemWarehouseInfo.objects.get(item=item, warehouse=warehouse)
+    try:
+        item_warehouse = ItemWarehouseInfo.objects.get(item_id=item.id, warehouse_id=item.default_warehouse_id)
 
         # Calculate committed quantity based on SalesOrderLines (excluding Free Items)
         paid_qty = line.order.lines.exclude(remarks="Free Item (Auto)").filter(
@@ -217,7 +216,7 @@ def adjust_committed_quantity(line):
         item_warehouse.committed = paid_qty + free_qty
         item_warehouse.save()
 
-    except Item.DoesNotExist:
+    except ItemWarehouseInfo.DoesNotExist:
         pass
 
 
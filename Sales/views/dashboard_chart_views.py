@@ -4,6 +4,7 @@ from django.views.generic import TemplateView
 from django.db.models import Sum, Count, F, Q, Value, FloatField, DecimalField, ExpressionWrapper, Avg
 from django.db.models.functions import TruncDay, TruncMonth, Coalesce, ExtractDay, ExtractMonth
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.shortcuts import redirect
 from django.http import JsonResponse
 
@@ -13,6 +14,9 @@ from Sales.models import (
 )
 from Inventory.models import Item, Warehouse
 from BusinessPartnerMasterData.models import BusinessPartner
+from Sales.rollups import (
+    RollupTotals, delivery_employee_totals, sales_employee_totals, top_customers, top_items,
+)
 
 
 class SalesDashboardChartView(TemplateView):
@@ -145,23 +149,14 @@ class SalesDashboardChartView(TemplateView):
         start_date = today - timedelta(days=6)  # Last 7 days including today
         
         # Get daily sales data
-        daily_sales = SalesOrder.objects.filter(
-            document_date__gte=start_date,
-            document_date__lte=today
-        ).annotate(
-            day=TruncDay('document_date')
-        ).values('day').annotate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        ).order_by('day')
+        daily_sales = self.rollup_totals.daily('SO', start_date, today)
         
         # Create a dictionary to store sales by day
         sales_by_day = {day.strftime('%Y-%m-%d'): 0 for day in [start_date + timedelta(days=i) for i in range(7)]}
         
         # Fill in the actual sales data
-        for entry in daily_sales:
-            day_str = entry['day'].strftime('%Y-%m-%d')
-            sales_by_day[day_str] = float(entry['total'])
+        for day, total in daily_sales.items():
+            sales_by_day[day.strftime('%Y-%m-%d')] = float(total)
         
         # Format for Chart.js
         labels = [day for day in sales_by_day.keys()]
@@ -185,19 +180,10 @@ class SalesDashboardChartView(TemplateView):
     def get_monthly_sales_chart_data(self):
         """Get sales data for the last 6 months for chart visualization"""
         today = timezone.now().date()
-        start_date = (today.replace(day=1) - timedelta(days=1)).replace(day=1)  # First day of 6 months ago
-        start_date = start_date - timedelta(days=5*30)  # Approximate 5 months back
+        start_date = self.get_chart_start_date(today)
         
         # Get monthly sales data
-        monthly_sales = SalesOrder.objects.filter(
-            document_date__gte=start_date,
-            document_date__lte=today
-        ).annotate(
-            month=TruncMonth('document_date')
-        ).values('month').annotate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        ).order_by('month')
+        monthly_sales = self.rollup_totals.monthly('SO', start_date, today)
         
         # Create a list of the last 6 months
         months = []
@@ -209,10 +195,10 @@ class SalesDashboardChartView(TemplateView):
         sales_by_month = {month.strftime('%Y-%m'): 0 for month in months}
         
         # Fill in the actual sales data
-        for entry in monthly_sales:
-            month_str = entry['month'].strftime('%Y-%m')
+        for month, total in monthly_sales.items():
+            month_str = month.strftime('%Y-%m')
             if month_str in sales_by_month:
-                sales_by_month[month_str] = float(entry['total'])
+                sales_by_month[month_str] = float(total)
         
         # Format for Chart.js
         labels = [month for month in sales_by_month.keys()]
@@ -320,40 +306,20 @@ class SalesDashboardChartView(TemplateView):
             start_date = today - timedelta(days=6)
             date_range = [start_date + timedelta(days=i) for i in range(7)]
             
-            # Get daily sales data
-            daily_sales = SalesOrder.objects.filter(
-                document_date__gte=start_date,
-                document_date__lte=today
-            ).annotate(
-                day=TruncDay('document_date')
-            ).values('day').annotate(
-                total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField()))
-            ).order_by('day')
-            
-            # Get daily returns data
-            daily_returns = Return.objects.filter(
-                document_date__gte=start_date,
-                document_date__lte=today
-            ).annotate(
-                day=TruncDay('document_date')
-            ).values('day').annotate(
-                total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField()))
-            ).order_by('day')
+            # Get daily sales and returns data
+            daily_sales = self.rollup_totals.daily('SO', start_date, today)
+            daily_returns = self.rollup_totals.daily('RET', start_date, today)
             
             # Create dictionaries to store data by day
             sales_by_day = {day.strftime('%Y-%m-%d'): 0 for day in date_range}
             returns_by_day = {day.strftime('%Y-%m-%d'): 0 for day in date_range}
             
             # Fill in the actual data
-            for entry in daily_sales:
-                day_str = entry['day'].strftime('%Y-%m-%d')
-                if day_str in sales_by_day:
-                    sales_by_day[day_str] = float(entry['total'])
+            for day, total in daily_sales.items():
+                sales_by_day[day.strftime('%Y-%m-%d')] = float(total)
             
-            for entry in daily_returns:
-                day_str = entry['day'].strftime('%Y-%m-%d')
-                if day_str in returns_by_day:
-                    returns_by_day[day_str] = float(entry['total'])
+            for day, total in daily_returns.items():
+                returns_by_day[day.strftime('%Y-%m-%d')] = float(total)
             
             # Format for Chart.js
             labels = [day for day in sales_by_day.keys()]
@@ -367,8 +333,7 @@ class SalesDashboardChartView(TemplateView):
         else:
             # Get data for the last 6 months
             today = timezone.now().date()
-            start_date = (today.replace(day=1) - timedelta(days=1)).replace(day=1)  # First day of 6 months ago
-            start_date = start_date - timedelta(days=5*30)  # Approximate 5 months back
+            start_date = self.get_chart_start_date(today)
             
             # Create a list of the last 6 months
             months = []
@@ -376,40 +341,24 @@ class SalesDashboardChartView(TemplateView):
                 month = today.replace(day=1) - timedelta(days=i*30)  # Approximate
                 months.append(month.replace(day=1))
             
-            # Get monthly sales data
-            monthly_sales = SalesOrder.objects.filter(
-                document_date__gte=start_date,
-                document_date__lte=today
-            ).annotate(
-                month=TruncMonth('document_date')
-            ).values('month').annotate(
-                total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField()))
-            ).order_by('month')
-            
-            # Get monthly returns data
-            monthly_returns = Return.objects.filter(
-                document_date__gte=start_date,
-                document_date__lte=today
-            ).annotate(
-                month=TruncMonth('document_date')
-            ).values('month').annotate(
-                total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField()))
-            ).order_by('month')
+            # Get monthly sales and returns data
+            monthly_sales = self.rollup_totals.monthly('SO', start_date, today)
+            monthly_returns = self.rollup_totals.monthly('RET', start_date, today)
             
             # Create dictionaries to store data by month
             sales_by_month = {month.strftime('%Y-%m'): 0 for month in months}
             returns_by_month = {month.strftime('%Y-%m'): 0 for month in months}
             
             # Fill in the actual data
-            for entry in monthly_sales:
-                month_str = entry['month'].strftime('%Y-%m')
+            for month, total in monthly_sales.items():
+                month_str = month.strftime('%Y-%m')
                 if month_str in sales_by_month:
-                    sales_by_month[month_str] = float(entry['total'])
+                    sales_by_month[month_str] = float(total)
             
-            for entry in monthly_returns:
-                month_str = entry['month'].strftime('%Y-%m')
+            for month, total in monthly_returns.items():
+                month_str = month.strftime('%Y-%m')
                 if month_str in returns_by_month:
-                    returns_by_month[month_str] = float(entry['total'])
+                    returns_by_month[month_str] = float(total)
             
             # Format for Chart.js
             labels = [month for month in sales_by_month.keys()]
@@ -522,201 +471,90 @@ class SalesDashboardChartView(TemplateView):
             print(f"Error in get_todays_invoices: {str(e)}")
             return []
 
+    @cached_property
+    def rollup_totals(self):
+        """Document totals from the daily rollups for every window on the page, loaded once per request"""
+        today = timezone.now().date()
+        return RollupTotals(min(self.get_chart_start_date(today), today - timedelta(days=6)), today)
+
+    def get_chart_start_date(self, today):
+        """First day covered by the six-month charts"""
+        start_date = (today.replace(day=1) - timedelta(days=1)).replace(day=1)  # First day of 6 months ago
+        return start_date - timedelta(days=5*30)  # Approximate 5 months back
+
     def get_today_sales(self):
         """Get today's sales data"""
         today = timezone.now().date()
-        sales_data = SalesOrder.objects.filter(
-            document_date=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return sales_data
+        return self.rollup_totals.totals('SO', today, today)
 
     def get_today_deliveries(self):
         """Get today's deliveries data"""
         today = timezone.now().date()
-        delivery_data = Delivery.objects.filter(
-            document_date=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return delivery_data
+        return self.rollup_totals.totals('DEL', today, today)
 
     def get_today_invoices(self):
         """Get today's invoices data"""
         today = timezone.now().date()
-        invoice_data = ARInvoice.objects.filter(
-            document_date=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return invoice_data
+        return self.rollup_totals.totals('INV', today, today)
 
     def get_today_returns(self):
         """Get today's returns data"""
         today = timezone.now().date()
-        return_data = Return.objects.filter(
-            document_date=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return return_data
+        return self.rollup_totals.totals('RET', today, today)
 
     def get_today_quotations(self):
         """Get today's quotations data"""
         today = timezone.now().date()
-        quotation_data = SalesQuotation.objects.filter(
-            document_date=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return quotation_data
+        return self.rollup_totals.totals('QUO', today, today)
 
     def get_new_orders(self):
         """Get new orders data"""
         today = timezone.now().date()
-        new_orders_data = SalesOrder.objects.filter(
-            document_date=today,
-            status='Draft'  # Assuming 'New' status is 'Draft' in your model
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return new_orders_data
+        # Assuming 'New' status is 'Draft' in your model
+        return self.rollup_totals.totals('SO', today, today, drafts_only=True)
 
     def get_monthly_sales(self):
         """Get monthly sales data"""
         today = timezone.now().date()
-        first_day_of_month = today.replace(day=1)
-        sales_data = SalesOrder.objects.filter(
-            document_date__gte=first_day_of_month,
-            document_date__lte=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return sales_data
+        return self.rollup_totals.totals('SO', today.replace(day=1), today)
 
     def get_monthly_deliveries(self):
         """Get monthly deliveries data"""
         today = timezone.now().date()
-        first_day_of_month = today.replace(day=1)
-        delivery_data = Delivery.objects.filter(
-            document_date__gte=first_day_of_month,
-            document_date__lte=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return delivery_data
+        return self.rollup_totals.totals('DEL', today.replace(day=1), today)
 
     def get_monthly_invoices(self):
         """Get monthly invoices data"""
         today = timezone.now().date()
-        first_day_of_month = today.replace(day=1)
-        invoice_data = ARInvoice.objects.filter(
-            document_date__gte=first_day_of_month,
-            document_date__lte=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return invoice_data
+        return self.rollup_totals.totals('INV', today.replace(day=1), today)
 
     def get_monthly_returns(self):
         """Get monthly returns data"""
         today = timezone.now().date()
-        first_day_of_month = today.replace(day=1)
-        return_data = Return.objects.filter(
-            document_date__gte=first_day_of_month,
-            document_date__lte=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return return_data
+        return self.rollup_totals.totals('RET', today.replace(day=1), today)
 
     def get_monthly_quotations(self):
         """Get monthly quotations data"""
         today = timezone.now().date()
-        first_day_of_month = today.replace(day=1)
-        quotation_data = SalesQuotation.objects.filter(
-            document_date__gte=first_day_of_month,
-            document_date__lte=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return quotation_data
+        return self.rollup_totals.totals('QUO', today.replace(day=1), today)
 
     def get_monthly_orders(self):
         """Get monthly orders data"""
         today = timezone.now().date()
-        first_day_of_month = today.replace(day=1)
-        orders_data = SalesOrder.objects.filter(
-            document_date__gte=first_day_of_month,
-            document_date__lte=today
-        ).aggregate(
-            total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField())),
-            count=Count('id')
-        )
-        return orders_data
+        return self.rollup_totals.totals('SO', today.replace(day=1), today)
 
     def get_top_products(self, start_date, end_date):
         """Get top products by sales for a date range"""
         try:
-            # Create a proper expression with output_field for the multiplication
-            total_sales_expr = ExpressionWrapper(
-                F('quantity') * F('unit_price'), 
-                output_field=DecimalField(max_digits=18, decimal_places=6)
-            )
-            
-            # Get all order lines for orders in the date range
-            top_products = SalesOrderLine.objects.filter(
-                order__document_date__gte=start_date,
-                order__document_date__lte=end_date
-            ).values('item_name').annotate(
-                total_quantity=Sum('quantity'),
-                total_sales=Sum(total_sales_expr),
-                avg_price=ExpressionWrapper(
-                    Sum(total_sales_expr) / Sum('quantity'),
-                    output_field=DecimalField(max_digits=18, decimal_places=6)
-                )
-            ).order_by('-total_sales')[:5]
-            
-            return top_products
+            return top_items('SO', start_date, end_date)
         except Exception as e:
             print(f"Error in get_top_products: {str(e)}")
             return []
 
-    def get_top_customers(self):
-        try:
-            # Your code logic to get top customers goes here
-            pass
-        except Exception as e:
-            print(f"Error in get_top_customers: {str(e)}")
-            return []
-
     def get_top_customers(self, start_date, end_date):
         """Get top customers by sales for a date range"""
         try:
-            top_customers = SalesOrder.objects.filter(
-                document_date__gte=start_date,
-                document_date__lte=end_date,
-                customer__isnull=False  # Ensure customer exists
-            ).values('customer__id', 'customer__name').annotate(
-                customer_name=F('customer__name'),  # Explicit annotation
-                order_count=Count('id'),
-                invoice_count=Count('invoices', distinct=True),  # Use distinct to avoid duplicates
-                total_sales=Sum('total_amount')
-            ).order_by('-total_sales')[:5]
-            
-            return top_customers
+            return top_customers(start_date, end_date)
         except Exception as e:
             print(f"Error in get_top_customers: {str(e)}")
             return []
@@ -724,42 +562,7 @@ class SalesDashboardChartView(TemplateView):
     def get_sales_employee_orders(self, start_date, end_date):
         """Get sales employee performance for a date range - all orders without status filtering"""
         try:
-            # Get all sales employees
-            all_employees = SalesEmployee.objects.all()
-            employee_data = []
-            
-            for employee in all_employees:
-                # Get all orders for this employee in the date range
-                orders = SalesOrder.objects.filter(
-                    document_date__gte=start_date,
-                    document_date__lte=end_date,
-                    sales_employee=employee
-                )
-                
-                # Calculate metrics
-                order_count = orders.count()
-                total_amount = orders.aggregate(
-                    total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField()))
-                )['total']
-                
-                # Calculate average order value
-                avg_order = 0
-                if order_count > 0:
-                    avg_order = total_amount / order_count
-                
-                # Add to results if they have any orders in this period
-                if order_count > 0:
-                    employee_data.append({
-                        'employee_id': employee.id,
-                        'employee_name': employee.name,
-                        'order_count': order_count,
-                        'total_amount': total_amount,
-                        'avg_order': avg_order
-                    })
-            
-            # Sort by total amount descending
-            employee_data = sorted(employee_data, key=lambda x: x['total_amount'], reverse=True)
-            return employee_data
+            return sales_employee_totals(start_date, end_date)
         except Exception as e:
             print(f"Error in get_sales_employee_orders: {str(e)}")
             return []
@@ -771,45 +574,7 @@ class SalesDashboardChartView(TemplateView):
     def get_delivery_employee_deliveries(self, start_date, end_date):
         """Get delivery employee performance for a date range - all deliveries without status filtering"""
         try:
-            # Get all unique delivery employees
-            all_delivery_employees = Delivery.objects.filter(
-                document_date__gte=start_date,
-                document_date__lte=end_date,
-                deliveryemployee__isnull=False
-            ).values_list('deliveryemployee', flat=True).distinct()
-            
-            employee_data = []
-            
-            for employee_name in all_delivery_employees:
-                # Get all deliveries for this employee in the date range
-                deliveries = Delivery.objects.filter(
-                    document_date__gte=start_date,
-                    document_date__lte=end_date,
-                    deliveryemployee=employee_name
-                )
-                
-                # Calculate metrics
-                delivery_count = deliveries.count()
-                total_amount = deliveries.aggregate(
-                    total=Coalesce(Sum('total_amount'), Value(0, output_field=DecimalField()))
-                )['total']
-                
-                # Calculate average delivery value
-                avg_delivery = 0
-                if delivery_count > 0:
-                    avg_delivery = total_amount / delivery_count
-                
-                # Add to results
-                employee_data.append({
-                    'delivery_employee_name': employee_name,
-                    'delivery_count': delivery_count,
-                    'total_amount': total_amount,
-                    'avg_delivery': avg_delivery
-                })
-            
-            # Sort by total amount descending
-            employee_data = sorted(employee_data, key=lambda x: x['total_amount'], reverse=True)
-            return employee_data
+            return delivery_employee_totals(start_date, end_date)
         except Exception as e:
             print(f"Error in get_delivery_employee_deliveries: {str(e)}")
             return []
@@ -4,7 +4,7 @@ from decimal import Decimal
 from django.utils import timezone
 from Sales.models import SalesQuotation, SalesQuotationLine, SalesOrder, SalesEmployee, SalesOrderLine, Delivery, DeliveryLine, Return, ReturnLine, ARInvoice, ARInvoiceLine
 from BusinessPartnerMasterData.models import BusinessPartner
-from Inventory.models import Item
+from Inventory.item_cache import item_cache
 from config.views import GenericFilterView
 from ..forms.sales_report_forms import SalesReportFilterForm
 import logging
@@ -530,10 +530,10 @@ class SalesReportDetailsView(GenericFilterView):
         
         orders = context['sales_orders']
 
-        # Fetch all item codes and their purchase prices from Item model
+        # Purchase prices of all item codes, resolved through the shared item cache
         item_codes = set(line.item_code for order in orders for line in order.lines.all())
-        items = Item.objects.filter(code__in=item_codes).values('code', 'purchase_price')
-        item_price_map = {item['code']: Decimal(item['purchase_price'] or 0) for item in items}
+        items = item_cache.get_many(item_codes)
+        item_price_map = {code: Decimal(item.purchase_price or 0) for code, item in items.items()}
 
         # Enhance sales order lines with purchase price, purchase amount, and profit percentage
         for order in orders:
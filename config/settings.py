@@ -129,16 +129,9 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'permission.context_processors.permission_menu_context',
-                'BusinessPartnerMasterData.context_processors.business_partner_menu_context',
-                'Inventory.context_processors.inventory_menu_context',
-                'Sales.context_processors.sales_menu_context',
-                'Purchase.context_processors.purchase_menu_context',
-                'Finance.context_processors.finance_menu_context',
-                'Hrm.context_processors.hrm_menu_context',
-                'Banking.context_processors.banking_menu_context',
-                'global_settings.context_processors.global_settings_context',
-                'Production.context_processors.production_menu_context',
+                # All menu flags from one cached per-user map (permission/navigation.py)
+                'permission.context_processors.navigation_context',
+                'global_settings.context_processors.notification_context',
                 'django.template.context_processors.i18n',
             ],
         },
@@ -271,6 +264,19 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Attendance import processing: worker processes (1 = process inline) and employees per worker task
+ATTENDANCE_PROCESS_WORKERS = min(4, os.cpu_count() or 1)
+ATTENDANCE_PROCESS_CHUNK_SIZE = 25
+# Hours a generated attendance/overtime import preview (ImportSession) is kept
+IMPORT_SESSION_TTL_HOURS = 24
+
+# Seconds a user's cached menu/permission map and unread notification counts are kept. Both are
+# invalidated by signals; with the default per-process cache other workers only see changes on expiry.
+NAVIGATION_CACHE_TIMEOUT = 3600
+NOTIFICATION_COUNT_CACHE_TIMEOUT = 300
+# Seconds a compiled working-day calendar year is kept; Holiday saves/deletes invalidate it
+WORKING_CALENDAR_CACHE_TIMEOUT = 86400
+
 
 # CKEditor 5 File Storage Setup
 CKEDITOR_5_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"  # Default file system storage
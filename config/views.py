@@ -101,15 +101,19 @@ class GenericFilterView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
 import csv
 from django.http import HttpResponse
 from django.views import View
+from .exports import streaming_export_response
 class BaseExportView(LoginRequiredMixin, PermissionRequiredMixin, View):
     """
-    Base export view to export any model's data to CSV.
+    Base export view to export any model's data to CSV (or XLSX with ``?format=xlsx``).
+    Rows are streamed straight from the database cursor.
     """
     model = None  # Define in subclass
     filename = "export.csv"
     permission_required = ""
     field_names = []  # Define field names manually in subclass
     queryset_filter = None  # Optional queryset filtering method
+    export_format = "csv"  # Default format when the request does not ask for one
+    chunk_size = 2000  # Rows fetched per database round trip
 
     def get_queryset(self, request):
         """
@@ -122,21 +126,18 @@ class BaseExportView(LoginRequiredMixin, PermissionRequiredMixin, View):
 
     def get(self, request, *args, **kwargs):
         """
-        Generates and returns CSV file.
+        Streams the export file.
         """
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = f'attachment; filename="{self.filename}"'
-
-        writer = csv.writer(response)
-        writer.writerow(self.field_names)  # Write header row
-
         queryset = self.get_queryset(request)
         data = queryset.values_list(*[field.lower().replace(" ", "_") for field in self.field_names])
 
-        for row in data:
-            writer.writerow(row)
-
-        return response
+        return streaming_export_response(
+            self.filename,
+            self.field_names,
+            data.iterator(chunk_size=self.chunk_size),
+            file_format=request.GET.get("format", self.export_format),
+            sheet_name=self.model._meta.verbose_name_plural.title(),
+        )
 
 
 
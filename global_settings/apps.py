@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GlobalSettingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'global_settings'
+
+    def ready(self):
+        import global_settings.notifications
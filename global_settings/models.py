@@ -157,6 +157,20 @@ class GeneralSettings(models.Model):
         return f"{self.system_name} - Maintenance Mode: {'Enabled' if self.maintenance_mode else 'Disabled'}"
 
 
+# Document Numbering
+class DocumentSequence(models.Model):
+    """Last number issued for a document prefix, per year (0 for sequences that never reset)."""
+    prefix = models.CharField(max_length=20)
+    year = models.PositiveIntegerField(default=0)
+    last_value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('prefix', 'year')
+
+    def __str__(self):
+        return f"{self.prefix}{self.year or ''}: {self.last_value}"
+
 
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
@@ -0,0 +1,78 @@
+"""
+Cached unread notification counts for the header badge.
+
+The badge adds the user's own unread notifications to the unread broadcasts
+(``all_users=True``). Both counts live in the Django cache: a user's count
+under their own key, the broadcast count under a single shared key. The
+receivers below drop the affected key whenever a notification is saved or
+deleted, so the counts only hit the database after a change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import Notification
+
+CACHE_PREFIX = 'notifications:unread'
+BROADCAST_KEY = f'{CACHE_PREFIX}:all'
+
+
+def _user_key(user_id):
+    return f'{CACHE_PREFIX}:user:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'NOTIFICATION_COUNT_CACHE_TIMEOUT', 300)
+
+
+def unread_notification_count(user):
+    """Unread notifications addressed to ``user`` plus unread broadcasts."""
+    if not user.is_authenticated:
+        return 0
+    counts = cache.get_many([_user_key(user.pk), BROADCAST_KEY])
+    own = counts.get(_user_key(user.pk))
+    if own is None:
+        own = Notification.objects.filter(is_read=False, recipient=user).count()
+        cache.set(_user_key(user.pk), own, _timeout())
+    broadcast = counts.get(BROADCAST_KEY)
+    if broadcast is None:
+        broadcast = Notification.objects.filter(is_read=False, all_users=True).count()
+        cache.set(BROADCAST_KEY, broadcast, _timeout())
+    return own + broadcast
+
+
+def invalidate_notification_counts(notification):
+    keys = []
+    if notification.all_users:
+        keys.append(BROADCAST_KEY)
+    if notification.recipient_id:
+        keys.append(_user_key(notification.recipient_id))
+    for field, value in getattr(notification, '_previous_audience', {}).items():
+        if field == 'all_users' and value:
+            keys.append(BROADCAST_KEY)
+        elif field == 'recipient_id' and value:
+            keys.append(_user_key(value))
+    if keys:
+        cache.delete_many(set(keys))
+
+
+# ------------------------------------------
+# ✅ নটিফিকেশন বদলালে আগের প্রাপকের কাউন্টও মুছে ফেলতে হবে
+# ------------------------------------------
+def remember_notification_audience(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values('recipient_id', 'all_users').first()
+    instance._previous_audience = previous or {}
+
+
+# ------------------------------------------
+# ✅ নটিফিকেশন সেভ বা ডিলিট হলে ক্যাশ করা কাউন্ট মুছে যাবে
+# ------------------------------------------
+def clear_notification_counts(sender, instance, **kwargs):
+    invalidate_notification_counts(instance)
+
+
+pre_save.connect(remember_notification_audience, sender=Notification, dispatch_uid='notification_audience')
+post_save.connect(clear_notification_counts, sender=Notification, dispatch_uid='notification_count_save')
+post_delete.connect(clear_notification_counts, sender=Notification, dispatch_uid='notification_count_delete')
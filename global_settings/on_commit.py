@@ -0,0 +1,58 @@
+"""
+One deferred callback per key per transaction.
+
+Signals that fire once per saved line (GL posting, stock posting, sales
+rollups) only need their work done once the whole transaction commits.
+``defer_once(name, key, func, *args)`` registers ``func(*args)`` with
+``transaction.on_commit`` the first time ``key`` is seen and returns the
+pending ``OnCommitBatch``; later calls for the same key return that batch,
+whose ``args`` the caller may still extend.
+
+Pending batches are tracked per connection in a ``WeakValueDictionary``.
+The only strong reference to a batch is the callback Django queued, so
+when Django drops it (a rolled back transaction or savepoint) the entry
+disappears with it and the next save schedules the work again. Outside an
+atomic block ``transaction.on_commit`` runs the callback at once and
+nothing is batched.
+"""
+from weakref import WeakValueDictionary
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+class OnCommitBatch:
+    """A deferred call registered for one key; runs at most once."""
+
+    def __init__(self, pending, key, func, args):
+        self.pending = pending
+        self.key = key
+        self.func = func
+        self.args = args
+
+    def __call__(self):
+        # Work scheduled while this batch runs starts a batch of its own
+        if self.pending.get(self.key) is self:
+            del self.pending[self.key]
+        return self.func(*self.args)
+
+
+def _pending(name, using):
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if not hasattr(connection, 'pending_on_commit'):
+        connection.pending_on_commit = {}
+    return connection.pending_on_commit.setdefault(name, WeakValueDictionary())
+
+
+def defer_once(name, key, func, *args, using=None):
+    """
+    Run ``func(*args)`` when the transaction commits, once per ``key`` of
+    ``name``; returns the pending batch (already run outside a transaction).
+    """
+    pending = _pending(name, using)
+    batch = pending.get(key)
+    if batch is not None:
+        return batch
+    batch = OnCommitBatch(pending, key, func, args)
+    pending[key] = batch
+    transaction.on_commit(batch, using=using)
+    return batch
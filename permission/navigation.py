@@ -0,0 +1,169 @@
+"""
+Per-user navigation permission map.
+
+Which sidebar menus and submenu entries a user may see is declared once in
+``PERMISSION_FLAGS`` (single permission) and ``MENU_FLAGS`` (shown when the
+user has any of the listed permissions). ``get_navigation_map`` resolves all
+of them from one ``get_all_permissions()`` call and keeps the result in the
+Django cache, so rendering a page no longer re-checks dozens of permissions.
+
+Cached maps are dropped when a user's groups, direct permissions or
+superuser/active flags change, and all maps are invalidated at once (by
+bumping a generation counter) when a group's permissions change. With the
+default per-process cache other workers pick changes up after
+``NAVIGATION_CACHE_TIMEOUT`` seconds; configure a shared cache backend for
+immediate invalidation everywhere.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import NoReverseMatch, reverse
+
+CACHE_PREFIX = 'navigation'
+GENERATION_KEY = f'{CACHE_PREFIX}:generation'
+
+# Context flag -> permission
+PERMISSION_FLAGS = {
+    'can_view_user': 'auth.view_user',
+    'can_view_group': 'auth.view_group',
+    'can_view_permission': 'auth.view_permission',
+    'can_view_item': 'Inventory.view_item',
+    'can_view_warehouse': 'Inventory.view_warehouse',
+    'can_view_itemgroup': 'Inventory.view_itemgroup',
+    'can_view_unitofmeasure': 'Inventory.view_unitofmeasure',
+    'can_view_inventorytransaction': 'Inventory.view_inventorytransaction',
+    'can_view_goodsreceipt': 'Inventory.view_goodsreceipt',
+    'can_view_goodsissue': 'Inventory.view_goodsissue',
+    'can_view_inventorytransfer': 'Inventory.view_inventorytransfer',
+    'can_view_itemwarehouseinfo': 'Inventory.view_itemwarehouseinfo',
+}
+
+# Menu flag -> shown when the user has any of these permissions
+MENU_FLAGS = {
+    'show_permission_menu': (
+        'auth.view_user', 'auth.view_group', 'auth.view_permission',
+    ),
+    'show_business_partner_menu': (
+        'BusinessPartnerMasterData.view_businesspartner',
+        'BusinessPartnerMasterData.view_businesspartnergroup',
+        'BusinessPartnerMasterData.view_financialinformation',
+        'BusinessPartnerMasterData.view_contactinformation',
+        'BusinessPartnerMasterData.view_address',
+        'BusinessPartnerMasterData.view_contactperson',
+    ),
+    'show_inventory_menu': (
+        'Inventory.view_item', 'Inventory.view_warehouse', 'Inventory.view_itemgroup',
+        'Inventory.view_unitofmeasure', 'Inventory.view_inventorytransaction', 'Inventory.view_goodsreceipt',
+        'Inventory.view_goodsissue', 'Inventory.view_inventorytransfer', 'Inventory.view_itemwarehouseinfo',
+    ),
+    'show_sales_menu': (
+        'Sales.view_salesquotation', 'Sales.view_salesorder', 'Sales.view_delivery', 'Sales.view_return',
+        'Sales.view_arinvoice', 'Sales.view_salesemployee', 'Sales.view_freeitemdiscount',
+    ),
+    'show_purchase_menu': (
+        'Purchase.view_purchasequotation', 'Purchase.view_purchaseorder', 'Purchase.view_goodsreceiptpo',
+        'Purchase.view_goodsreturn', 'Purchase.view_apinvoice',
+    ),
+    'show_finance_menu': (
+        'Finance.view_account', 'Finance.view_accounttype', 'Finance.view_journalentry', 'Finance.view_payment',
+        'Finance.view_bankreconciliation', 'Finance.view_financialreport', 'Finance.view_taxreport',
+        'Finance.view_budget', 'Finance.view_generalledger',
+    ),
+    'show_hrm_menu': (
+        'Hrm.view_employee', 'Hrm.view_employeeseparation', 'Hrm.view_department', 'Hrm.view_designation',
+        'Hrm.view_location', 'Hrm.view_userlocation', 'Hrm.view_locationattendance', 'Hrm.view_shift',
+        'Hrm.view_roster', 'Hrm.view_rosterassignment', 'Hrm.view_leavetype', 'Hrm.view_leaveapplication',
+        'Hrm.view_shortleaveapplication', 'Hrm.view_leavebalance', 'Hrm.view_holiday', 'Hrm.view_zkdevice',
+        'Hrm.view_zkattendancelog', 'Hrm.view_zkuser',
+    ),
+    'show_payroll_menu': (
+        'Hrm.view_salarycomponent', 'Hrm.view_employeesalarystructure', 'Hrm.view_salarymonth',
+        'Hrm.view_employeesalary', 'Hrm.view_bonussetup', 'Hrm.view_bonusmonth', 'Hrm.view_employeebonus',
+        'Hrm.view_advancesetup', 'Hrm.view_employeeadvance', 'Hrm.view_advanceinstallment',
+    ),
+    'show_banking_menu': (
+        'Banking.view_payment', 'Banking.view_paymentmethod',
+    ),
+    'show_global_settings_menu': (
+        'global_settings.view_currency', 'global_settings.view_paymentterms', 'global_settings.view_companyinfo',
+        'global_settings.view_localization', 'global_settings.view_accounting', 'global_settings.view_usersettings',
+        'global_settings.view_emailsettings', 'global_settings.view_taxsettings',
+        'global_settings.view_paymentsettings', 'global_settings.view_backupsettings',
+        'global_settings.view_generalsettings',
+    ),
+    'show_production_menu': (
+        'Production.view_billofmaterials', 'Production.view_productionorder',
+        'Production.view_productionreceipt', 'Production.view_productionissue',
+    ),
+}
+
+NAVIGATION_FLAGS = ('show_dashboard_menu',) + tuple(PERMISSION_FLAGS) + tuple(MENU_FLAGS)
+
+
+def empty_navigation_map():
+    return dict.fromkeys(NAVIGATION_FLAGS, False)
+
+
+def _dashboard_available():
+    try:
+        reverse('permission:dashboard')
+        return True
+    except NoReverseMatch:
+        return False
+
+
+def build_navigation_map(user):
+    """Resolve every navigation flag for ``user`` without touching the cache."""
+    navigation = empty_navigation_map()
+    if not user.is_active:
+        return navigation
+    if user.is_superuser:
+        granted = None  # superusers pass every check
+    else:
+        granted = user.get_all_permissions()
+
+    def allowed(permission):
+        return granted is None or permission in granted
+
+    navigation['show_dashboard_menu'] = _dashboard_available()
+    for flag, permission in PERMISSION_FLAGS.items():
+        navigation[flag] = allowed(permission)
+    for flag, permissions in MENU_FLAGS.items():
+        navigation[flag] = any(allowed(permission) for permission in permissions)
+    return navigation
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def _user_key(user_id):
+    return f'{CACHE_PREFIX}:{_generation()}:{user_id}'
+
+
+def get_navigation_map(user):
+    """The cached navigation map of ``user`` (all flags False for anonymous users)."""
+    if not user.is_authenticated:
+        return empty_navigation_map()
+    key = _user_key(user.pk)
+    navigation = cache.get(key)
+    if navigation is None:
+        navigation = build_navigation_map(user)
+        cache.set(key, navigation, getattr(settings, 'NAVIGATION_CACHE_TIMEOUT', 3600))
+    return navigation
+
+
+def invalidate_navigation(user_ids=None):
+    """Drop the cached maps of some users, or of everybody when called bare."""
+    if user_ids is None:
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 2, None)
+        return
+    cache.delete_many([_user_key(user_id) for user_id in user_ids])
+
+
+def navigation_subset(user, flags):
+    """Only ``flags`` of the cached map, for the per-app menu context processors."""
+    navigation = get_navigation_map(user)
+    return {flag: navigation[flag] for flag in flags}
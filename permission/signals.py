@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from django.contrib.auth.models import User
+from django.contrib.auth.models import Group, Permission, User
 from .models import UserProfile
+from .navigation import invalidate_navigation
 
 # @receiver(post_save, sender=User)
 # def deactivate_new_user(sender, instance, created, **kwargs):
@@ -22,3 +23,45 @@ def save_user_profile(sender, instance, **kwargs):
         UserProfile.objects.create(user=instance)
     instance.profile.save()
 
+
+
+# ------------------------------------------
+# ✅ ইউজারের গ্রুপ বা পারমিশন বদলালে নেভিগেশন ক্যাশ মুছে যাবে
+# ------------------------------------------
+def _changed_user_ids(instance, action, reverse, pk_set):
+    if not reverse:
+        return [instance.pk]
+    if action == 'post_clear':
+        return None  # the cleared users are unknown by now; drop every map
+    return list(pk_set or ())
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def clear_user_navigation(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    user_ids = _changed_user_ids(instance, action, reverse, pk_set)
+    if user_ids is None or user_ids:
+        invalidate_navigation(user_ids)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def clear_group_navigation(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_navigation()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def clear_navigation_on_delete(sender, **kwargs):
+    invalidate_navigation()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def clear_saved_user_navigation(sender, instance, **kwargs):
+    # is_active / is_superuser may have changed; a login only touches last_login
+    if kwargs.get('update_fields') == frozenset({'last_login'}):
+        return
+    invalidate_navigation([instance.pk])